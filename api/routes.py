@@ -1,19 +1,31 @@
-from fastapi import APIRouter, File, UploadFile, HTTPException, Depends
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, File, UploadFile, HTTPException, Depends, Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from sqlalchemy.orm import Session
 from pathlib import Path
-import shutil
+import asyncio
+import json
 import time
 import logging
-from typing import List, Optional
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import uuid
 from datetime import datetime
 
 from config import settings
-from models.database import SessionLocal, InsuranceRecord
+from models.database import SessionLocal, InsuranceRecord, ProcessingJob, RecordStageTiming
 from models.schemas import UploadResponse, ExportRequest, InsuranceDataResponse
-from core.ocr_engine import OCREngine
-from core.company_detector import CompanyDetector
+from core.pipeline import PipelineExecutor, PipelineTimeout, build_message
+from core.job_queue import JobQueue, create_job
+from core.record_writer import RecordWriter
+from core import metrics
+from core.ocr_cache import OCRCache
 from core.template_manager import TemplateManager
+from core.upload_writer import (
+    StoredUpload, UploadTooLarge, read_upload, save_upload, unique_upload_path
+)
+from core.archive_reader import (
+    ARCHIVE_SUFFIXES, ArchiveError, archive_suffix, check_entry, list_entries
+)
+from core.ocr_engine import IMAGE_EXTENSIONS
 from core.exporter import DataExporter
 from core.validator import DataValidator
 
@@ -28,9 +40,10 @@ def get_db():
         db.close()
 
 # Initialize components
-ocr_engine = OCREngine()
-company_detector = CompanyDetector()
-template_manager = TemplateManager()
+pipeline = PipelineExecutor()
+job_queue = JobQueue(pipeline)
+record_writer = RecordWriter()
+ocr_cache = OCRCache()
 exporter = DataExporter()
 validator = DataValidator()
 
@@ -38,89 +51,112 @@ validator = DataValidator()
 Path(settings.UPLOAD_DIR).mkdir(exist_ok=True)
 Path(settings.EXPORT_DIR).mkdir(exist_ok=True)
 
-@router.post("/upload", response_model=UploadResponse)
-async def upload_file(
-    file: UploadFile = File(...),
-    db: Session = Depends(get_db)
-):
-    """Upload and process insurance document."""
-    start_time = time.time()
-    
-    # Validate file extension
+def _validate_extension(file: UploadFile) -> str:
+    """Reject unsupported file types; returns the file extension."""
     file_ext = Path(file.filename).suffix.lower()
     if file_ext not in settings.ALLOWED_EXTENSIONS:
         raise HTTPException(
             status_code=400,
             detail=f"Invalid file type. Allowed: {', '.join(settings.ALLOWED_EXTENSIONS)}"
         )
-    
-    # Check file size
-    file.file.seek(0, 2)
-    file_size = file.file.tell()
-    file.file.seek(0)
-    
-    if file_size > settings.MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=400,
-            detail=f"File too large. Max size: {settings.MAX_FILE_SIZE / 1024 / 1024}MB"
-        )
-    
-    file_path = Path(settings.UPLOAD_DIR) / file.filename
+    return file_ext
+
+
+async def _store_upload(file: UploadFile, path: Path) -> StoredUpload:
+    """Stream an upload to disk, enforcing MAX_FILE_SIZE as it is written."""
+    try:
+        return await save_upload(file, path)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+
+async def _read_upload(file: UploadFile) -> Tuple[bytes, str]:
+    """Read a small upload into memory, enforcing MAX_FILE_SIZE."""
+    try:
+        return await read_upload(file)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+
+def _fits_in_memory(file: UploadFile, file_ext: str) -> bool:
+    """Small images can be OCR'd from memory; PDFs always go to disk for poppler."""
+    return (
+        file_ext in IMAGE_EXTENSIONS
+        and file.size is not None
+        and file.size <= settings.IN_MEMORY_OCR_MAX_BYTES
+    )
+
+
+class ReceivedUpload(NamedTuple):
+    """An upload held in memory (small images) or stored in UPLOAD_DIR."""
+    filename: str
+    file_ext: str
+    data: Optional[bytes]
+    path: Optional[Path]
+    sha256: str
+    stages: Dict[str, float]  # upload_read / upload_write
+
+
+async def _receive_upload(file: UploadFile, allow_memory: bool = True) -> ReceivedUpload:
+    file_ext = _validate_extension(file)
+    stage_start = time.perf_counter()
+    if allow_memory and _fits_in_memory(file, file_ext):
+        # Small images are decoded straight from the upload buffer
+        data, file_hash = await _read_upload(file)
+        stage = {'upload_read': round(time.perf_counter() - stage_start, 4)}
+        return ReceivedUpload(file.filename, file_ext, data, None, file_hash, stage)
+    
+    file_path = unique_upload_path(file_ext)
+    stored = await _store_upload(file, file_path)
+    stage = {'upload_write': round(time.perf_counter() - stage_start, 4)}
+    return ReceivedUpload(file.filename, file_ext, None, file_path, stored.sha256, stage)
+
+
+async def _run_pipeline(upload: ReceivedUpload) -> dict:
+    # Steps 1-6: OCR, detection, extraction and validation in the worker pool
+    if upload.data is not None:
+        logger.info(f"Processing in memory: {upload.filename}")
+        return await pipeline.run_bytes(upload.data, upload.file_ext, upload.sha256)
+    logger.info(f"Processing: {upload.filename}")
+    return await pipeline.run(str(upload.path), upload.file_ext, upload.sha256)
+
+
+async def _save_record(upload: ReceivedUpload, result: dict, processing_time: float) -> int:
+    """Step 7: save the record and its stage timings, then record metrics."""
+    stages = {**result.get('stages', {}), **upload.stages}
+    record = InsuranceRecord.from_extraction(
+        upload.filename, result['extracted_data'], processing_time, result['needs_review']
+    )
+    
+    # Adds db_commit, the wait for the batch the record was inserted with
+    record_id = await record_writer.save(record, stages)
+    metrics.observe_document(result, upload.file_ext, processing_time, stages)
+    return record_id
+
+
+def _discard(upload: Optional[ReceivedUpload]) -> None:
+    if upload is not None and upload.path is not None and upload.path.exists():
+        upload.path.unlink()
+
+
+@router.post("/upload", response_model=UploadResponse)
+async def upload_file(file: UploadFile = File(...)):
+    """Upload and process insurance document."""
+    start_time = time.time()
+    upload = None
     
     try:
-        # Save uploaded file
-        with file_path.open("wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        upload = await _receive_upload(file)
+        result = await _run_pipeline(upload)
         
-        logger.info(f"Processing: {file.filename}")
-        
-        # Step 1: Extract text using OCR
-        text = ocr_engine.extract_text(str(file_path), file_ext)
-        
-        # Step 2: Detect insurance company
-        company_name, detection_confidence = company_detector.detect_company(text)
-        
-        # Step 3: Get appropriate extractor
-        extractor = template_manager.get_extractor(company_name, detection_confidence)
-        
-        # Step 4: Extract data
-        extracted_data = extractor.extract(text)
-        
-        # Step 5: Validate extracted data
-        validation_results = validator.validate_all(extracted_data)
-        
-        # Step 6: Determine if needs review
-        needs_review = validator.should_flag_for_review(extracted_data, validation_results)
+        extracted_data = result['extracted_data']
+        validation_results = result['validation_results']
+        needs_review = result['needs_review']
         
         # Calculate processing time
         processing_time = time.time() - start_time
         
-        # Step 7: Save to database
-        record = InsuranceRecord(
-            filename=file.filename,
-            policy_number=extracted_data.get('policy_number'),
-            policyholder_name=extracted_data.get('policyholder_name'),
-            property_address=extracted_data.get('property_address'),
-            coverage_amount=extracted_data.get('coverage_amount'),
-            liability_coverage=extracted_data.get('liability_coverage'),
-            deductible=extracted_data.get('deductible'),
-            effective_date=extracted_data.get('effective_date'),
-            expiration_date=extracted_data.get('expiration_date'),
-            premium_amount=extracted_data.get('premium_amount'),
-            insurance_company=extracted_data.get('insurance_company'),
-            detected_company=extracted_data.get('detected_company'),
-            confidence_score=extracted_data.get('confidence_score'),
-            raw_text=extracted_data.get('raw_text_preview'),
-            processing_time=processing_time,
-            needs_review=1 if needs_review else 0
-        )
-        
-        db.add(record)
-        db.commit()
-        db.refresh(record)
-        
-        # Clean up uploaded file
-        file_path.unlink()
+        record_id = await _save_record(upload, result, processing_time)
         
         # Prepare response
         response_data = InsuranceDataResponse(
@@ -129,25 +165,25 @@ async def upload_file(
             needs_review=needs_review
         )
         
-        message = "File processed successfully"
-        if needs_review:
-            message += " - Flagged for review"
-        if validation_results['warnings']:
-            message += f" ({len(validation_results['warnings'])} warnings)"
-        
         return UploadResponse(
             success=True,
-            message=message,
+            message=build_message(needs_review, validation_results),
             filename=file.filename,
             data=response_data,
-            record_id=record.id
+            record_id=record_id
         )
         
+    except HTTPException:
+        raise
+    except PipelineTimeout as e:
+        logger.error(f"Processing timed out: {file.filename}")
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         logger.error(f"Processing failed: {e}")
-        if file_path.exists():
-            file_path.unlink()
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        # Clean up uploaded file
+        _discard(upload)
 
 
 @router.post("/export")
@@ -263,7 +299,8 @@ async def get_record(record_id: int, db: Session = Depends(get_db)):
     if not record:
         raise HTTPException(status_code=404, detail="Record not found")
     
-    return record.to_dict()
+    timings = db.query(RecordStageTiming).filter(RecordStageTiming.record_id == record_id).all()
+    return {**record.to_dict(), 'stage_timings': {t.stage: t.seconds for t in timings}}
 
 
 @router.put("/records/{record_id}")
@@ -305,6 +342,7 @@ async def delete_record(record_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Record not found")
     
     db.delete(record)
+    db.query(RecordStageTiming).filter(RecordStageTiming.record_id == record_id).delete()
     db.commit()
     
     return {
@@ -346,7 +384,8 @@ async def get_stats(db: Session = Depends(get_db)):
             company: count for company, count in company_stats
         },
         "average_confidence": round(avg_confidence, 2),
-        "average_processing_time": round(avg_processing_time, 2)
+        "average_processing_time": round(avg_processing_time, 2),
+        "ocr_cache": ocr_cache.stats()
     }
 
 
@@ -360,11 +399,16 @@ async def health_check():
     }
 
 
+@router.get("/metrics")
+async def get_metrics():
+    """Stage and document latency histograms in the Prometheus text format."""
+    return Response(content=metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+
 @router.get("/companies")
 async def get_supported_companies():
     """Get list of supported insurance companies."""
-    companies = list(TemplateManager.EXTRACTOR_MAP.keys())
-    companies.remove('generic')  # Don't show generic in list
+    companies = TemplateManager.supported_companies()  # generic not listed
     
     return {
         "supported_companies": sorted(companies),
@@ -402,35 +446,235 @@ async def validate_record(record_id: int, db: Session = Depends(get_db)):
 
 
 @router.post("/batch-upload")
-async def batch_upload(
-    files: List[UploadFile] = File(...),
-    db: Session = Depends(get_db)
-):
-    """Upload multiple files at once."""
-    results = []
+async def batch_upload(request: Request, files: List[UploadFile] = File(...)):
+    """
+    Upload multiple files at once. Every file is stored first, then up to
+    BATCH_CONCURRENCY are processed at a time; one file failing does not
+    affect the others. Results stream back as NDJSON lines in completion
+    order (server-sent events with `Accept: text/event-stream`), then a summary.
+    """
+    received = []
+    for index, file in enumerate(files):
+        try:
+            # On disk even when small: the whole batch is held until processed
+            received.append((index, file.filename, await _receive_upload(file, allow_memory=False)))
+        except HTTPException as e:
+            received.append((index, file.filename, e))
+    
+    sse = "text/event-stream" in request.headers.get("accept", "")
+    return StreamingResponse(
+        _stream_batch(received, sse),
+        media_type="text/event-stream" if sse else "application/x-ndjson"
+    )
+
+
+async def _process_batch_item(index: int, filename: str, upload, semaphore: asyncio.Semaphore) -> dict:
+    item = {"index": index, "filename": filename}
+    if isinstance(upload, HTTPException):
+        return {**item, "success": False, "error": upload.detail}
+    
+    try:
+        async with semaphore:
+            start_time = time.time()
+            result = await _run_pipeline(upload)
+            processing_time = time.time() - start_time
+            record_id = await _save_record(upload, result, processing_time)
+        return {
+            **item,
+            "success": True,
+            "record_id": record_id,
+            "needs_review": result['needs_review'],
+            "message": build_message(result['needs_review'], result['validation_results']),
+            "processing_time": round(processing_time, 4),
+        }
+    except Exception as e:
+        logger.error(f"Batch item failed: {filename}: {e}")
+        return {**item, "success": False, "error": str(e) or e.__class__.__name__}
+    finally:
+        _discard(upload)
+
+
+async def _stream_batch(received: list, sse: bool):
+    concurrency = settings.BATCH_CONCURRENCY or pipeline.max_workers
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks = [
+        asyncio.create_task(_process_batch_item(index, filename, upload, semaphore))
+        for index, filename, upload in received
+    ]
+    
+    def encode(event: str, payload: dict) -> str:
+        data = json.dumps(payload, default=str)
+        return f"event: {event}\ndata: {data}\n\n" if sse else data + "\n"
+    
+    successful = 0
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            item = await next_done
+            successful += item["success"]
+            yield encode("result", item)
+        
+        yield encode("summary", {
+            "total": len(tasks),
+            "successful": successful,
+            "failed": len(tasks) - successful
+        })
+    finally:
+        # Client went away: stop what is still running or waiting. A task
+        # cancelled before it started never reaches its own cleanup.
+        for task in tasks:
+            task.cancel()
+        for _, _, upload in received:
+            if isinstance(upload, ReceivedUpload):
+                _discard(upload)
+
+
+async def _enqueue_upload(file: UploadFile, batch_id: Optional[str] = None) -> ProcessingJob:
+    """Persist an upload under a unique name and queue it for processing."""
+    file_ext = _validate_extension(file)
+    job_id = str(uuid.uuid4())
+    file_path = unique_upload_path(file_ext, name=job_id)
+    
+    stage_start = time.perf_counter()
+    stored = await _store_upload(file, file_path)
+    upload_seconds = round(time.perf_counter() - stage_start, 4)
+    
+    try:
+        job = await asyncio.to_thread(
+            create_job, job_id, file.filename, str(file_path), file_ext, batch_id,
+            file_hash=stored.sha256, upload_seconds=upload_seconds
+        )
+    except Exception:
+        file_path.unlink()
+        raise
+    
+    job_queue.submit(job.id)
+    return job
+
+
+@router.post("/jobs", status_code=202)
+async def submit_job(file: UploadFile = File(...)):
+    """Queue a document for background processing and return its job id."""
+    job = await _enqueue_upload(file)
+    logger.info(f"Queued job {job.id}: {file.filename}")
+    
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "filename": job.filename
+    }
+
+
+@router.post("/jobs/batch", status_code=202)
+async def submit_batch_jobs(files: List[UploadFile] = File(...)):
+    """Queue several documents under one batch id."""
+    batch_id = str(uuid.uuid4())
+    jobs = []
+    errors = []
     
     for file in files:
         try:
-            # Process each file (reuse upload logic)
-            result = await upload_file(file, db)
-            results.append({
-                "filename": file.filename,
-                "success": True,
-                "record_id": result.record_id
-            })
-        except Exception as e:
-            results.append({
-                "filename": file.filename,
-                "success": False,
-                "error": str(e)
-            })
-    
-    successful = sum(1 for r in results if r['success'])
-    failed = len(results) - successful
+            job = await _enqueue_upload(file, batch_id)
+            jobs.append({"job_id": job.id, "filename": job.filename, "status": job.status})
+        except HTTPException as e:
+            errors.append({"filename": file.filename, "error": e.detail})
+    
+    logger.info(f"Queued batch {batch_id}: {len(jobs)} jobs, {len(errors)} rejected")
+    
+    return {
+        "batch_id": batch_id,
+        "total": len(files),
+        "queued": len(jobs),
+        "rejected": len(errors),
+        "jobs": jobs,
+        "errors": errors
+    }
+
+
+@router.post("/jobs/archive", status_code=202)
+async def submit_archive(file: UploadFile = File(...)):
+    """
+    Queue every document in a ZIP or TAR archive under one batch id. The
+    archive is listed up front and stored as an archive job (id = batch id)
+    that the job queue expands; its documents are extracted one at a time,
+    a few ahead of processing, so it is never unpacked all at once.
+    Per-entry results: GET /jobs?batch_id=...
+    """
+    suffix = archive_suffix(file.filename or "")
+    if suffix is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid archive type. Allowed: {', '.join(ARCHIVE_SUFFIXES)}"
+        )
+    
+    batch_id = str(uuid.uuid4())
+    archive_path = unique_upload_path(suffix, name=batch_id)
+    try:
+        await save_upload(file, archive_path, settings.ARCHIVE_MAX_SIZE)
+        entries = await asyncio.to_thread(list_entries, archive_path)
+    except (UploadTooLarge, ArchiveError) as e:
+        if archive_path.exists():
+            archive_path.unlink()
+        raise HTTPException(status_code=413 if isinstance(e, UploadTooLarge) else 400, detail=str(e))
+    
+    errors = []
+    for entry in entries:
+        reason = check_entry(entry)
+        if reason:
+            errors.append({"filename": entry.name, "error": reason})
+    queued = len(entries) - len(errors)
+    
+    if queued:
+        try:
+            await asyncio.to_thread(
+                create_job, batch_id, (file.filename or "")[-255:], str(archive_path), suffix,
+                batch_id, ProcessingJob.ARCHIVE
+            )
+        except Exception:
+            archive_path.unlink()
+            raise
+        job_queue.submit_archive(batch_id)
+    else:
+        archive_path.unlink()
+    logger.info(f"Queued archive {file.filename} as batch {batch_id}: "
+                f"{queued} documents, {len(errors)} rejected")
     
     return {
-        "total": len(results),
-        "successful": successful,
-        "failed": failed,
-        "results": results
-    }
\ No newline at end of file
+        "batch_id": batch_id,
+        "filename": file.filename,
+        "total": len(entries),
+        "queued": queued,
+        "rejected": len(errors),
+        "errors": errors
+    }
+
+
+@router.get("/jobs")
+async def list_jobs(
+    batch_id: Optional[str] = None,
+    status: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_db)
+):
+    """List jobs, optionally filtered by batch or status."""
+    query = db.query(ProcessingJob)
+    
+    if batch_id:
+        query = query.filter(ProcessingJob.batch_id == batch_id)
+    if status:
+        query = query.filter(ProcessingJob.status == status)
+    
+    jobs = query.order_by(ProcessingJob.created_at.desc()).offset(skip).limit(limit).all()
+    
+    return [j.to_dict() for j in jobs]
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str, db: Session = Depends(get_db)):
+    """Get job status and, once completed, its result."""
+    job = db.query(ProcessingJob).filter(ProcessingJob.id == job_id).first()
+    
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return job.to_dict()
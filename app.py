@@ -8,7 +8,7 @@ import logging
 from pathlib import Path
 
 from config import settings
-from api.routes import router
+from api.routes import router, pipeline, job_queue, record_writer
 
 logging.basicConfig(
     level=logging.INFO,
@@ -52,11 +52,17 @@ async def startup_event():
     logger.info(f"Starting {settings.APP_NAME} v{settings.APP_VERSION}")
     Path(settings.UPLOAD_DIR).mkdir(exist_ok=True)
     Path(settings.EXPORT_DIR).mkdir(exist_ok=True)
+    pipeline.start()
+    if settings.JOB_QUEUE_IN_PROCESS:
+        await job_queue.start()
     logger.info("Application started successfully")
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Application shutting down")
+    await job_queue.stop()
+    await record_writer.close()
+    pipeline.shutdown()
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,97 @@
+"""
+Compare CompanyDetector.detect_company (literal prefilter + compiled regexes)
+with the original per-pattern re.search loop, on the built-in carriers and on
+a synthetic registry of several hundred carriers.
+
+    python -m benchmarks.bench_company_detection [--carriers 500] [--runs 200]
+"""
+import argparse
+import json
+import random
+import re
+import string
+import time
+
+from core.company_detector import CompanyDetector
+
+SAMPLE = """Like a good neighbor, State Farm is there
+State Farm Fire and Casualty Company
+Renters Policy Declarations
+Policy Number: 12-AB-3456-7  Named Insured: Jane Doe
+Personal Property $25,000  Personal Liability $100,000  Deductible $500
+Questions? Visit statefarm.com or call your agent.
+"""
+
+
+def legacy_detect_company(text: str):
+    text_sample = text[:2000]
+    best_match = ('generic', 0.0)
+    for company, data in CompanyDetector.COMPANY_PATTERNS.items():
+        match_count = 0
+        for pattern in data['patterns']:
+            if re.search(pattern, text_sample, re.IGNORECASE):
+                match_count += 1
+        if match_count > 0:
+            confidence = data['confidence'] * (match_count / len(data['patterns']))
+            if confidence > best_match[1]:
+                best_match = (company, confidence)
+    return best_match
+
+
+def synthetic_carriers(count: int, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    carriers = {}
+    for i in range(count):
+        name = "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 10)))
+        carriers[f"carrier_{i}"] = {
+            'patterns': [rf'{name.title()}\s*Insurance', rf'{name}\.com', rf'{name.upper()}\s+MUTUAL'],
+            'confidence': 0.95,
+        }
+    return carriers
+
+
+def time_per_call(func, text: str, runs: int) -> float:
+    func(text)
+    start = time.perf_counter()
+    for _ in range(runs):
+        func(text)
+    return 1000 * (time.perf_counter() - start) / runs
+
+
+def measure(text: str, runs: int) -> dict:
+    assert CompanyDetector.detect_company(text) == legacy_detect_company(text)
+    return {
+        'patterns': sum(len(d['patterns']) for d in CompanyDetector.COMPANY_PATTERNS.values()),
+        'legacy_ms': round(time_per_call(legacy_detect_company, text, runs), 3),
+        'prefiltered_ms': round(time_per_call(CompanyDetector.detect_company, text, runs), 3),
+    }
+
+
+def run(carriers: int, runs: int) -> dict:
+    text = (SAMPLE * 8)[:2000]
+    results = {'builtin': measure(text, runs)}
+
+    original = CompanyDetector.COMPANY_PATTERNS
+    try:
+        CompanyDetector.COMPANY_PATTERNS = {**original, **synthetic_carriers(carriers)}
+        start = time.perf_counter()
+        CompanyDetector.compile_patterns()
+        compile_ms = 1000 * (time.perf_counter() - start)
+        results[f'{carriers}_carriers'] = measure(text, runs)
+        results[f'{carriers}_carriers']['compile_ms'] = round(compile_ms, 1)
+    finally:
+        CompanyDetector.COMPANY_PATTERNS = original
+        CompanyDetector.compile_patterns()
+    return results
+
+
+if __name__ == "__main__":
+    import logging
+    logging.disable(logging.INFO)
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--carriers', type=int, default=500)
+    parser.add_argument('--runs', type=int, default=200)
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.carriers, args.runs), indent=2))
@@ -0,0 +1,92 @@
+"""
+Compare the projection-profile skew estimator with the previous
+Canny + HoughLines implementation for speed and angle accuracy.
+
+    python -m benchmarks.bench_deskew [--pages 5] [--width 2550]
+"""
+import argparse
+import json
+import time
+
+import cv2
+import numpy as np
+
+from core.image_processor import ImageProcessor
+
+ANGLES = [-7.0, -3.0, -1.5, -0.7, 0.0, 0.8, 2.0, 4.5]
+
+
+def legacy_hough_angle(image: np.ndarray) -> float:
+    """Angle chosen by the original deskew_image (full-resolution Hough)."""
+    edges = cv2.Canny(image, 50, 150, apertureSize=3)
+    lines = cv2.HoughLines(edges, 1, np.pi/180, 200)
+    if lines is None:
+        return 0.0
+    angles = []
+    for rho, theta in lines[:, 0]:
+        angles.append(np.degrees(theta) - 90)
+    return float(np.median(angles))
+
+
+def make_page(width: int, seed: int) -> np.ndarray:
+    """Letter-proportioned page of declaration-like text lines."""
+    rng = np.random.default_rng(seed)
+    height = int(width * 11 / 8.5)
+    page = np.full((height, width, 3), 255, np.uint8)
+    scale = width / 2550
+    words = ["Policy", "Number:", "Coverage", "$25,000", "Named", "Insured", "Deductible",
+             "Premium", "Effective", "01/01/2025", "Liability", "Address", "Renters"]
+    y = int(200 * scale)
+    while y < height - int(200 * scale):
+        line = " ".join(rng.choice(words, size=rng.integers(3, 9)))
+        cv2.putText(page, line, (int(150 * scale), y), cv2.FONT_HERSHEY_SIMPLEX,
+                    1.6 * scale, (0, 0, 0), max(1, int(3 * scale)))
+        y += int(rng.integers(60, 110) * scale)
+    return page
+
+
+def rotate(image: np.ndarray, angle: float) -> np.ndarray:
+    h, w = image.shape[:2]
+    M = cv2.getRotationMatrix2D((w // 2, h // 2), angle, 1.0)
+    return cv2.warpAffine(image, M, (w, h), flags=cv2.INTER_CUBIC,
+                          borderMode=cv2.BORDER_REPLICATE)
+
+
+def run(pages: int, width: int) -> dict:
+    results = {'legacy_hough': {'seconds': [], 'errors': []},
+               'projection_profile': {'seconds': [], 'errors': []}}
+
+    for seed in range(pages):
+        page = make_page(width, seed)
+        for skew in ANGLES:
+            skewed = rotate(page, skew)
+            expected = -skew  # rotation that undoes the skew
+
+            start = time.perf_counter()
+            angle = legacy_hough_angle(skewed)
+            results['legacy_hough']['seconds'].append(time.perf_counter() - start)
+            results['legacy_hough']['errors'].append(abs(angle - expected))
+
+            start = time.perf_counter()
+            angle = ImageProcessor.estimate_skew(skewed)
+            results['projection_profile']['seconds'].append(time.perf_counter() - start)
+            results['projection_profile']['errors'].append(abs(angle - expected))
+
+    summary = {}
+    for name, data in results.items():
+        summary[name] = {
+            'mean_ms': round(1000 * float(np.mean(data['seconds'])), 1),
+            'p95_ms': round(1000 * float(np.percentile(data['seconds'], 95)), 1),
+            'mean_abs_error_deg': round(float(np.mean(data['errors'])), 3),
+            'max_abs_error_deg': round(float(np.max(data['errors'])), 3),
+        }
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pages', type=int, default=3)
+    parser.add_argument('--width', type=int, default=2550, help="page width in pixels (2550 = 300 DPI)")
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.pages, args.width), indent=2))
@@ -0,0 +1,92 @@
+"""
+Compare anchored field extraction (BaseExtractor.extract) with the original
+path that ran re.search over the whole text for every pattern, on a
+multi-page declarations text for each registry carrier.
+
+    python -m benchmarks.bench_extraction [--pages 4] [--runs 50]
+"""
+import argparse
+import json
+import re
+import time
+
+from core.carrier_registry import registry
+from core.template_manager import TemplateManager
+
+PAGE = """{carrier} Insurance Company - Renters Policy Declarations
+Policy Number: XY-{n:07d}          Policy Period: 01/01/2025 to 01/01/2026
+Named Insured: John Smith
+Property Address: 123 Main Street Apt 4, Austin, TX 78701
+SECTION I - PROPERTY COVERAGES       LIMIT          PREMIUM
+Personal Property (Coverage C)      $25,000        $112.00
+Loss of Use (Coverage D)            $7,500         Included
+SECTION II - LIABILITY COVERAGES
+Personal Liability (Coverage E)     $100,000       $18.00
+Medical Payments to Others          $1,000         Included
+Deductible: $500 applies to all Section I perils
+Forms and endorsements: HO-4 (05/11), FE-5398, ML-55 Identity Restoration
+This policy is issued in reliance upon the statements in the application.
+Questions about your coverage? Contact your agent or visit us online.
+""" + "Lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor\n" * 25
+
+
+def legacy_extract(fields, text):
+    data = {}
+    for field, patterns in fields.items():
+        data[field] = None
+        for pattern in patterns:
+            try:
+                match = re.search(pattern, text, re.IGNORECASE | re.MULTILINE)
+                if match:
+                    data[field] = ' '.join(match.group(1).strip().split())
+                    break
+            except Exception:
+                continue
+    return data
+
+
+def run(pages: int, runs: int) -> dict:
+    carriers = registry.carriers
+    results = {}
+    total_legacy = total_anchored = 0.0
+
+    for key, carrier in carriers.items():
+        text = "".join(PAGE.format(carrier=carrier.name, n=n) for n in range(pages))
+        extractor = TemplateManager._shared_extractor(key)
+        extractor.extract(text)  # build the compiled table outside the timing
+        legacy_extract(carrier.fields, text)
+
+        start = time.perf_counter()
+        for _ in range(runs):
+            legacy_extract(carrier.fields, text)
+        legacy = (time.perf_counter() - start) / runs
+
+        start = time.perf_counter()
+        for _ in range(runs):
+            extractor.extract(text)
+        anchored = (time.perf_counter() - start) / runs
+
+        total_legacy += legacy
+        total_anchored += anchored
+        results[key] = {'legacy_ms': round(1000 * legacy, 3), 'anchored_ms': round(1000 * anchored, 3)}
+
+    results['_summary'] = {
+        'text_chars': len(text),
+        'carriers': len(carriers),
+        'legacy_docs_per_s': round(len(carriers) / total_legacy, 1),
+        'anchored_docs_per_s': round(len(carriers) / total_anchored, 1),
+        'speedup': round(total_legacy / total_anchored, 2),
+    }
+    return results
+
+
+if __name__ == "__main__":
+    import logging
+    logging.disable(logging.INFO)
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pages', type=int, default=4)
+    parser.add_argument('--runs', type=int, default=50)
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.pages, args.runs), indent=2))
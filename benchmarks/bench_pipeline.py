@@ -0,0 +1,394 @@
+"""
+End-to-end pipeline benchmark on synthetic declarations for every registry
+carrier: OCREngine -> CompanyDetector -> extractor -> DataValidator, exactly
+as process_document runs it. Documents come as text-layer PDFs, rendered
+scans (PNG), noised scans (PNG) and noised scanned PDFs; the same --seed
+always produces the same files. Reports per-stage p50/p95, docs/s, peak RSS
+and detection/extraction quality, and saves everything as JSON.
+
+    python -m benchmarks.bench_pipeline [--docs 2] [--pages 2] [--kinds text_pdf,scan_png]
+                                        [--workers 1] [--seed 0] [--output run.json]
+                                        [--compare previous.json]
+
+Kinds that need tesseract or poppler are skipped (and listed) when those
+binaries are missing. The OCR cache is off and the database is in memory,
+so repeated runs measure the same work and never touch insurance.db.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import re
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from config import settings
+
+KINDS = ('text_pdf', 'scan_png', 'noisy_png', 'scan_pdf')
+NEEDS = {
+    'text_pdf': (),
+    'scan_png': ('tesseract',),
+    'noisy_png': ('tesseract',),
+    'scan_pdf': ('tesseract', 'pdftoppm'),
+}
+SCAN_WIDTH = 2550  # letter at 300 DPI
+NAMES = ['John Smith', 'Maria Garcia', 'David Lee', 'Aisha Khan', 'Robert Brown', 'Emily Chen']
+STREETS = ['Main Street', 'Oak Hollow Dr', 'Cedar Ave', 'Lakeview Blvd', 'Pine Rd']
+CITIES = [('Austin', 'TX', '78701'), ('Columbus', 'OH', '43215'), ('Denver', 'CO', '80202')]
+
+
+def example_match(pattern: str) -> Optional[str]:
+    """
+    A short string the pattern matches (first branch, minimum repeats, first
+    character of each class), or None if the pattern uses something else.
+    """
+    import re._parser as sre_parse
+    from re._constants import (ANY, AT, BRANCH, CATEGORY, CATEGORY_DIGIT, CATEGORY_SPACE,
+                               CATEGORY_WORD, IN, LITERAL, MAX_REPEAT, MIN_REPEAT, NEGATE,
+                               RANGE, SUBPATTERN)
+
+    category = {CATEGORY_DIGIT: '0', CATEGORY_SPACE: ' ', CATEGORY_WORD: 'a'}
+
+    def emit(items) -> str:
+        out = []
+        for op, av in items:
+            if op is LITERAL:
+                out.append(chr(av))
+            elif op is ANY:
+                out.append('x')
+            elif op is AT:
+                continue
+            elif op is IN:
+                first_op, first_av = av[0]
+                if first_op is NEGATE:
+                    raise ValueError("negated class")
+                if first_op is LITERAL:
+                    out.append(chr(first_av))
+                elif first_op is RANGE:
+                    out.append(chr(first_av[0]))
+                elif first_op is CATEGORY and first_av in category:
+                    out.append(category[first_av])
+                else:
+                    raise ValueError(first_op)
+            elif op in (MAX_REPEAT, MIN_REPEAT):
+                low, _, body = av
+                # \s* between words reads better as one space
+                out.append(emit(body) * max(low, 1 if _is_space(body) else 0))
+            elif op is SUBPATTERN:
+                out.append(emit(av[3]))
+            elif op is BRANCH:
+                out.append(emit(av[1][0]))
+            else:
+                raise ValueError(op)
+        return "".join(out)
+
+    def _is_space(body) -> bool:
+        return len(body) == 1 and body[0][0] is IN and body[0][1] == [(CATEGORY, CATEGORY_SPACE)]
+
+    try:
+        sample = emit(sre_parse.parse(pattern, re.IGNORECASE))
+    except (ValueError, re.error):
+        return None
+    return sample if re.search(pattern, sample, re.IGNORECASE) else None
+
+
+def make_document(carrier, rng: random.Random, pages: int) -> List[List[str]]:
+    """Declarations lines per page: carrier header, common field labels, filler."""
+    name = rng.choice(NAMES)
+    city, state, zip_code = rng.choice(CITIES)
+    street = f"{rng.randint(100, 99999)} {rng.choice(STREETS)} Apt {rng.randint(1, 400)}"
+    coverage = rng.choice([15, 20, 25, 30, 40, 50]) * 1000
+    header = [carrier.name + " Insurance Company", "Renters Policy Declarations"]
+    header += [sample for sample in (example_match(p) for p in carrier.detect) if sample]
+    body = [
+        f"Policy Number: {rng.choice('ABHRSX')}{rng.choice('OPT')}-{rng.randint(1000000, 9999999)}",
+        f"Named Insured: {name}",
+        f"Property Address: {street}, {city}, {state} {zip_code}",
+        f"Personal Property: ${coverage:,}",
+        f"Personal Liability: ${rng.choice([100, 300, 500]) * 1000:,}",
+        f"Deductible: ${rng.choice([250, 500, 1000]):,}",
+        "Effective Date: 01/01/2025",
+        "Expiration Date: 01/01/2026",
+        f"Total Premium: ${rng.randint(90, 400)}.{rng.randint(0, 99):02d}",
+    ]
+    filler = ["This policy is issued in reliance upon the statements in your application.",
+              "Forms and endorsements: HO-4 (05/11), FE-5398, ML-55 Identity Restoration."]
+    document = [header + body + filler * 4]
+    for number in range(2, pages + 1):
+        document.append([f"{carrier.name} - Page {number}"] + filler * 12)
+    return document
+
+
+def write_text_pdf(pages: List[List[str]], path: Path) -> None:
+    """Minimal PDF with a Helvetica text layer (no extra dependency)."""
+    objects: List[bytes] = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    pages_id = len(pages) * 2 + 2
+    page_ids = []
+    for lines in pages:
+        escaped = (line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") for line in lines)
+        content = ("BT /F1 11 Tf 50 750 Td 14 TL " + " ".join(f"({line}) Tj T*" for line in escaped)
+                   + " ET").encode('latin-1', 'replace')
+        stream = add(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content))
+        page_ids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 792] /Contents %d 0 R "
+            b"/Resources << /Font << /F1 %d 0 R >> >> >>" % (pages_id, stream, font)
+        ))
+    add(b"<< /Type /Pages /Kids [%s] /Count %d >>"
+        % (" ".join(f"{page} 0 R" for page in page_ids).encode(), len(page_ids)))
+    catalog = add(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, catalog, xref)
+    path.write_bytes(bytes(out))
+
+
+def render_page(lines: List[str], rng: random.Random, noisy: bool) -> np.ndarray:
+    """Grayscale page at 300 DPI; noisy adds skew, blur and sensor noise."""
+    height = int(SCAN_WIDTH * 11 / 8.5)
+    page = np.full((height, SCAN_WIDTH), 255, np.uint8)
+    y = 200
+    for line in lines:
+        cv2.putText(page, line, (150, y), cv2.FONT_HERSHEY_SIMPLEX, 1.5, 0, 3, cv2.LINE_AA)
+        y += 70
+    if noisy:
+        angle = rng.uniform(-2.0, 2.0)
+        matrix = cv2.getRotationMatrix2D((SCAN_WIDTH / 2, height / 2), angle, 1.0)
+        page = cv2.warpAffine(page, matrix, (SCAN_WIDTH, height), borderValue=255)
+        page = cv2.GaussianBlur(page, (3, 3), 0)
+        noise = np.random.default_rng(rng.randint(0, 2**31)).normal(0, 12, page.shape)
+        page = np.clip(page + noise, 0, 255).astype(np.uint8)
+    return page
+
+
+def build_corpus(directory: Path, kinds: List[str], docs: int, pages: int, seed: int) -> List[dict]:
+    from core.carrier_registry import GENERIC, registry
+
+    corpus = []
+    for key, carrier in registry.carriers.items():
+        if key == GENERIC:
+            continue
+        for index in range(docs):
+            rng = random.Random(f"{seed}:{key}:{index}")
+            document = make_document(carrier, rng, pages)
+            for kind in kinds:
+                stem = directory / f"{key}-{index}-{kind}"
+                if kind == 'text_pdf':
+                    path = stem.with_suffix('.pdf')
+                    write_text_pdf(document, path)
+                elif kind in ('scan_png', 'noisy_png'):
+                    path = stem.with_suffix('.png')
+                    cv2.imwrite(str(path), render_page(document[0], rng, kind == 'noisy_png'))
+                else:
+                    path = stem.with_suffix('.pdf')
+                    images = [Image.fromarray(render_page(lines, rng, True)) for lines in document]
+                    images[0].save(path, save_all=True, append_images=images[1:], resolution=300)
+                corpus.append({'carrier': key, 'kind': kind, 'path': str(path), 'ext': path.suffix})
+    return corpus
+
+
+def _warm_up(tesseract_slots=None) -> None:
+    """
+    Build the pipeline components and every carrier's compiled patterns up
+    front (also the pool initializer), so one-off setup isn't timed.
+    """
+    from core.carrier_registry import registry
+    from core.pipeline import _get_components, _init_worker
+    from core.template_manager import TemplateManager
+
+    _init_worker(tesseract_slots)
+    _get_components()[1].sync_registry()
+    for key in registry.carriers:
+        TemplateManager._shared_extractor(key).compiled_patterns()
+
+
+def _run_one(item: dict) -> dict:
+    from core.pipeline import process_document
+
+    start = time.perf_counter()
+    result = process_document(item['path'], item['ext'])
+    seconds = time.perf_counter() - start
+    data = result['extracted_data']
+    return {
+        **item,
+        'seconds': seconds,
+        'stages': result['stages'],
+        'strategy': result['ocr_metrics'].get('strategy'),
+        'detected': data.get('detected_company'),
+        'confidence_score': data.get('confidence_score'),
+    }
+
+
+def _percentiles(values: List[float]) -> dict:
+    return {
+        'p50_ms': round(1000 * float(np.percentile(values, 50)), 3),
+        'p95_ms': round(1000 * float(np.percentile(values, 95)), 3),
+        'n': len(values),
+    }
+
+
+def summarize(rows: List[dict], wall: float) -> dict:
+    from core.carrier_registry import registry
+
+    stage_values: Dict[str, List[float]] = {}
+    for row in rows:
+        for stage, seconds in row['stages'].items():
+            stage_values.setdefault(stage, []).append(seconds)
+
+    by_kind = {}
+    for kind in sorted({row['kind'] for row in rows}):
+        kind_rows = [row for row in rows if row['kind'] == kind]
+        by_kind[kind] = {
+            **_percentiles([row['seconds'] for row in kind_rows]),
+            'carrier_accuracy': round(sum(
+                row['detected'] == registry.get(row['carrier']).name for row in kind_rows
+            ) / len(kind_rows), 3),
+            'mean_fields_found_pct': round(float(np.mean([row['confidence_score'] or 0
+                                                          for row in kind_rows])), 1),
+            'strategies': sorted({row['strategy'] for row in kind_rows}),
+        }
+
+    usage_self = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    usage_children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return {
+        'documents': len(rows),
+        'wall_seconds': round(wall, 3),
+        'docs_per_s': round(len(rows) / wall, 2) if wall else None,
+        'document': _percentiles([row['seconds'] for row in rows]),
+        'stages': {stage: _percentiles(values) for stage, values in sorted(stage_values.items())},
+        'by_kind': by_kind,
+        # ru_maxrss is KiB on Linux; children = the largest pool worker
+        'peak_rss_mb': round(max(usage_self, usage_children) / 1024, 1),
+    }
+
+
+def _environment(args) -> dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'cpus': os.cpu_count(),
+        'args': vars(args),
+        'settings': {name: getattr(settings, name) for name in (
+            'OCR_DPI', 'PAGE_STAGES', 'PREPROCESS_MODE', 'OCR_PAGE_WORKERS', 'MAX_OCR_PAGES',
+            'ZONAL_OCR_ENABLED', 'EARLY_DETECTION_ENABLED', 'EXTRACTION_FIELD_TIMEOUT')},
+    }
+
+
+def compare(current: dict, previous: dict) -> dict:
+    """p50 ratio (current / previous) per stage and for whole documents; < 1 is faster."""
+    def ratio(new, old):
+        return round(new / old, 3) if old else None
+
+    now, before = current['summary'], previous['summary']
+    return {
+        'previous_commit': previous['environment'].get('commit'),
+        'docs_per_s': ratio(now['docs_per_s'] or 0, before['docs_per_s'] or 0),
+        'document_p50': ratio(now['document']['p50_ms'], before['document']['p50_ms']),
+        'stages_p50': {
+            stage: ratio(values['p50_ms'], before['stages'][stage]['p50_ms'])
+            for stage, values in now['stages'].items() if stage in before['stages']
+        },
+    }
+
+
+def run(args) -> dict:
+    # Fixed work per run: no cached OCR text, no writes to the real database
+    settings.OCR_CACHE_ENABLED = False
+    settings.DATABASE_URL = 'sqlite://'
+
+    tesseract_cmd = __import__('pytesseract').pytesseract.tesseract_cmd
+    available = {'tesseract': shutil.which(tesseract_cmd), 'pdftoppm': shutil.which('pdftoppm')}
+    kinds = [kind for kind in args.kinds.split(',') if kind]
+    unknown = set(kinds) - set(KINDS)
+    if unknown:
+        raise SystemExit(f"Unknown kinds: {', '.join(sorted(unknown))} (choose from {', '.join(KINDS)})")
+    skipped = {kind: [tool for tool in NEEDS[kind] if not available[tool]] for kind in kinds}
+    skipped = {kind: missing for kind, missing in skipped.items() if missing}
+    kinds = [kind for kind in kinds if kind not in skipped]
+
+    with tempfile.TemporaryDirectory(prefix="bench-pipeline-") as directory:
+        corpus = build_corpus(Path(directory), kinds, args.docs, args.pages, args.seed)
+        if not corpus:
+            raise SystemExit(f"Nothing to run; skipped kinds: {skipped}")
+
+        if args.workers > 1:
+            pool = ProcessPoolExecutor(args.workers, initializer=_warm_up)
+            list(pool.map(_warm_up, [None] * args.workers))  # wait until every worker is up
+        else:
+            pool = None
+            _warm_up()
+        _run_one(corpus[0])  # first document pays for lazy imports
+
+        start = time.perf_counter()
+        if pool is not None:
+            with pool:
+                rows = list(pool.map(_run_one, corpus))
+        else:
+            rows = [_run_one(item) for item in corpus]
+        wall = time.perf_counter() - start
+
+    return {
+        'environment': _environment(args),
+        'skipped_kinds': {kind: f"missing {', '.join(tools)}" for kind, tools in skipped.items()},
+        'summary': summarize(rows, wall),
+        'documents': [
+            {key: row[key] for key in ('carrier', 'kind', 'strategy', 'detected', 'confidence_score')}
+            | {'ms': round(1000 * row['seconds'], 3)}
+            for row in rows
+        ],
+    }
+
+
+if __name__ == "__main__":
+    import logging
+    logging.disable(logging.WARNING)
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--docs', type=int, default=2, help="documents per carrier and kind")
+    parser.add_argument('--pages', type=int, default=2)
+    parser.add_argument('--kinds', default=",".join(KINDS))
+    parser.add_argument('--workers', type=int, default=1, help="> 1 runs documents in a process pool")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="write the full JSON result here")
+    parser.add_argument('--compare', help="previous --output file to compare against")
+    args = parser.parse_args()
+
+    result = run(args)
+    if args.compare:
+        result['comparison'] = compare(result, json.loads(Path(args.compare).read_text()))
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=2, default=str))
+
+    printed = {key: result[key] for key in ('skipped_kinds', 'summary', 'comparison') if key in result}
+    json.dump(printed, sys.stdout, indent=2, default=str)
+    print()
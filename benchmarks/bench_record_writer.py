@@ -0,0 +1,109 @@
+"""
+Insert throughput of per-record commits (the old upload_file behaviour)
+against RecordWriter's batched commits, on a fresh SQLite file per run set
+up like the app's (SQLITE_* settings; try SQLITE_JOURNAL_MODE=WAL
+SQLITE_SYNCHRONOUS=NORMAL), so commits pay for real journal writes. `--concurrency` uploads save at once, as when the pipeline pool
+finishes several documents together.
+
+    python -m benchmarks.bench_record_writer [--records 500] [--concurrency 8]
+                                             [--batch-sizes 1,10,50] [--delay 0]
+                                             [--database-url sqlite:///path.db]
+
+Pass a --database-url (e.g. a scratch Postgres database) to measure that
+instead; its tables are created if missing and rows are left in place.
+"""
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from config import settings
+
+STAGES = {'text_layer': 0.0008, 'detect_company': 0.0005, 'extract_fields': 0.029, 'validate': 0.002}
+EXTRACTED = {
+    'policy_number': 'SF-1234567', 'policyholder_name': 'John Smith',
+    'property_address': '123 Main Street Apt 4, Austin, TX 78701', 'coverage_amount': '$25,000',
+    'liability_coverage': '$100,000', 'deductible': '$500', 'effective_date': '01/01/2025',
+    'expiration_date': '01/01/2026', 'premium_amount': '$180.00',
+    'insurance_company': 'State Farm', 'detected_company': 'state_farm',
+    'confidence_score': 100.0, 'raw_text_preview': 'State Farm Insurance\n' * 20,
+}
+
+
+async def save_all(writer, records: int, concurrency: int) -> list:
+    from models.database import InsuranceRecord
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def save(index: int) -> int:
+        async with semaphore:
+            record = InsuranceRecord.from_extraction(f'doc-{index}.pdf', EXTRACTED, 0.25, False)
+            start = time.perf_counter()
+            record_id = await writer.save(record, dict(STAGES))
+            latencies.append(time.perf_counter() - start)
+            return record_id
+
+    ids = await asyncio.gather(*(save(index) for index in range(records)))
+    await writer.close()
+    assert len(set(ids)) == records
+    return latencies
+
+
+def run_one(database_url: str, batch_size: int, records: int, concurrency: int, delay: float) -> dict:
+    from sqlalchemy.orm import sessionmaker
+    from core.record_writer import RecordWriter
+    from models.database import Base, create_db_engine
+
+    engine = create_db_engine(database_url)
+    Base.metadata.create_all(engine)
+    writer = RecordWriter(batch_size, delay, sessionmaker(autocommit=False, autoflush=False, bind=engine))
+
+    start = time.perf_counter()
+    latencies = asyncio.run(save_all(writer, records, concurrency))
+    seconds = time.perf_counter() - start
+    engine.dispose()
+
+    return {
+        'batch_size': batch_size,
+        'records_per_second': round(records / seconds, 1),
+        'seconds': round(seconds, 3),
+        'save_p50_ms': round(1000 * float(np.percentile(latencies, 50)), 2),
+        'save_p95_ms': round(1000 * float(np.percentile(latencies, 95)), 2),
+    }
+
+
+def run(records: int, concurrency: int, batch_sizes: list, delay: float, database_url: str = None) -> dict:
+    # Nothing here may touch insurance.db, which models.database opens on import
+    settings.DATABASE_URL = 'sqlite://'
+
+    results = []
+    with tempfile.TemporaryDirectory() as scratch:
+        for batch_size in batch_sizes:
+            url = database_url or f"sqlite:///{Path(scratch) / f'records-{batch_size}.db'}"
+            results.append(run_one(url, batch_size, records, concurrency, delay))
+
+    baseline = next((r for r in results if r['batch_size'] == 1), results[0])
+    for result in results:
+        result['speedup'] = round(result['records_per_second'] / baseline['records_per_second'], 2)
+    return {'records': records, 'concurrency': concurrency, 'delay': delay, 'results': results}
+
+
+if __name__ == "__main__":
+    import logging
+    logging.disable(logging.WARNING)
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--records', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=8, help="saves in flight at once")
+    parser.add_argument('--batch-sizes', default="1,10,50", help="1 = one commit per record")
+    parser.add_argument('--delay', type=float, default=settings.DB_WRITE_BATCH_DELAY)
+    parser.add_argument('--database-url')
+    args = parser.parse_args()
+
+    batch_sizes = [int(size) for size in args.batch_sizes.split(",")]
+    print(json.dumps(run(args.records, args.concurrency, batch_sizes, args.delay, args.database_url), indent=2))
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import List, Optional
 
 class Settings(BaseSettings):
     APP_NAME: str = "Renters Insurance Extractor"
@@ -9,16 +9,69 @@ class Settings(BaseSettings):
     PORT: int = 8000
     
     DATABASE_URL: str = "sqlite:///./insurance.db"
+    # SQLite connection pragmas; empty / 0 leaves SQLite's own setting
+    SQLITE_JOURNAL_MODE: str = ""  # WAL: readers no longer block on writers; persists in the file
+    SQLITE_SYNCHRONOUS: str = ""  # NORMAL: fsync at checkpoints, not every commit; safe with WAL
+    SQLITE_BUSY_TIMEOUT: float = 5.0  # seconds to wait for a lock before "database is locked"
+    # Per connection, and every pipeline worker process holds its own connections
+    SQLITE_MMAP_SIZE: int = 0  # bytes
+    SQLITE_CACHE_SIZE: int = 0  # page cache, bytes
+    # Connection pool for server databases (PostgreSQL)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800  # seconds; reconnect before server-side idle timeouts
     
     MAX_FILE_SIZE: int = 20 * 1024 * 1024
     ALLOWED_EXTENSIONS: set = {'.pdf', '.png', '.jpg', '.jpeg', '.tiff', '.bmp'}
     UPLOAD_DIR: str = "uploads"
+    IN_MEMORY_OCR_MAX_BYTES: int = 5 * 1024 * 1024  # smaller images skip the disk
     EXPORT_DIR: str = "exports"
     
+    CARRIER_REGISTRY_PATH: str = "extractors/carriers.yaml"  # .yaml/.yml or .json
+    CARRIER_REGISTRY_RELOAD_INTERVAL: float = 5.0  # seconds between change checks, 0 = never reload
+    EXTRACTION_FIELD_TIMEOUT: float = 0.5  # seconds of pattern matching per field, 0 = off
+    
     TESSERACT_CMD: Optional[str] = None
     OCR_DPI: int = 300
     OCR_LANG: str = "eng"
-    
+    MAX_OCR_PAGES: int = 5  # pages rendered and OCR'd per scanned PDF
+    PDF_TEXT_MIN_CHARS: int = 50  # pages with less embedded text are OCR'd
+    PAGE_STAGES: List[str] = ["deskew", "denoise", "contrast", "binarize"]  # + "orient"
+    PREPROCESS_MODE: str = "auto"  # auto | fast | full
+    PREPROCESS_NOISE_THRESHOLD: float = 4.0  # noise sigma above which NL-means runs
+    DESKEW_WORK_WIDTH: int = 800  # skew is estimated on a copy this wide
+    DESKEW_MAX_ANGLE: float = 10.0
+    DESKEW_MIN_ANGLE: float = 0.5  # smaller skew is left alone
+    OCR_LAYOUT: bool = False  # word boxes from tesseract so extractors can read values beside labels
+    OCR_PAGE_WORKERS: int = 4  # pages OCR'd in parallel per document
+    OCR_MAX_TESSERACT_PROCS: int = 0  # cap across all uploads and workers, 0 = one per CPU core
+    ZONAL_OCR_ENABLED: bool = True  # known forms OCR only their template's field zones
+    ZONAL_MIN_CONFIDENCE: float = 70.0  # default per-zone tesseract confidence, below -> full OCR
+    EARLY_DETECTION_ENABLED: bool = True  # detect the carrier from page 1's header before full OCR
+    EARLY_DETECTION_DPI: int = 150
+    EARLY_DETECTION_HEADER: float = 0.3  # top fraction of page 1 OCR'd for detection
+    OCR_CACHE_ENABLED: bool = True
+    OCR_CACHE_MAX_BYTES: int = 100 * 1024 * 1024
+    OCR_CACHE_STATS_FLUSH_INTERVAL: float = 10.0  # seconds between writes of hit/miss counters
+
+    PIPELINE_WORKERS: int = 0  # 0 = one worker per CPU core
+    PIPELINE_TIMEOUT: float = 300.0  # seconds per document, 0 = no limit
+    BATCH_CONCURRENCY: int = 0  # /batch-upload files in flight, 0 = match PIPELINE_WORKERS
+
+    DB_WRITE_BATCH_SIZE: int = 50  # records per insert transaction, 1 = commit each record
+    DB_WRITE_BATCH_DELAY: float = 0.0  # extra seconds a record waits for others to share its commit
+
+    JOB_QUEUE_IN_PROCESS: bool = True  # False = leave jobs to `python worker.py`
+    JOB_CONCURRENCY: int = 0  # 0 = match PIPELINE_WORKERS
+    JOB_POLL_INTERVAL: float = 5.0
+    JOB_STALE_AFTER: float = 0  # seconds without a heartbeat before a running job is requeued, 0 = 6 polls (min 60)
+    JOB_MAX_ATTEMPTS: int = 3  # starts before an interrupted job is failed instead of requeued
+
+    ARCHIVE_MAX_SIZE: int = 500 * 1024 * 1024
+    ARCHIVE_MAX_ENTRIES: int = 1000
+    ARCHIVE_PREFETCH: int = 0  # entries extracted ahead of the job queue, 0 = twice JOB_CONCURRENCY
+
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -0,0 +1,146 @@
+import hashlib
+import tarfile
+import zipfile
+import zlib
+from pathlib import Path, PurePosixPath
+from typing import BinaryIO, Callable, Iterator, List, NamedTuple, Optional, Tuple
+
+from config import settings
+from core.upload_writer import CHUNK_SIZE, StoredUpload, UploadTooLarge, unique_upload_path
+
+# Longest first so '.tar.gz' wins over '.gz'
+ARCHIVE_SUFFIXES = ('.tar.gz', '.tgz', '.tar', '.zip')
+
+
+class ArchiveError(Exception):
+    """Raised when an archive cannot be opened or read."""
+
+
+_READ_ERRORS = (zipfile.BadZipFile, tarfile.TarError, zlib.error, EOFError, OSError)
+
+
+class ArchiveEntry(NamedTuple):
+    name: str  # path inside the archive
+    file_ext: str
+    size: int  # uncompressed size as declared by the archive
+
+
+def archive_suffix(filename: str) -> Optional[str]:
+    """The archive suffix of `filename` ('.zip', '.tar', '.tar.gz', '.tgz'), or None."""
+    lowered = filename.lower()
+    return next((suffix for suffix in ARCHIVE_SUFFIXES if lowered.endswith(suffix)), None)
+
+
+def _is_junk(name: str) -> bool:
+    """Folders, macOS resource forks and dotfiles that archivers add."""
+    path = PurePosixPath(name)
+    return '__MACOSX' in path.parts or path.name.startswith('.')
+
+
+def _iter_members(path: Path) -> Iterator[Tuple[ArchiveEntry, Callable[[], BinaryIO]]]:
+    """
+    (entry, open) for every regular file in one sequential pass; open() returns
+    a stream over the entry and is only valid until the next item. Tar archives
+    are read in stream mode so compressed ones are decompressed once, front to
+    back, rather than once per entry.
+    """
+    try:
+        if zipfile.is_zipfile(path):
+            with zipfile.ZipFile(path) as archive:
+                for info in archive.infolist():
+                    if info.is_dir() or _is_junk(info.filename):
+                        continue
+                    entry = ArchiveEntry(info.filename, PurePosixPath(info.filename).suffix.lower(),
+                                         info.file_size)
+                    yield entry, lambda info=info: archive.open(info)
+        else:
+            with tarfile.open(path, mode='r|*') as archive:
+                for member in archive:
+                    if not member.isfile() or _is_junk(member.name):
+                        continue
+                    entry = ArchiveEntry(member.name, PurePosixPath(member.name).suffix.lower(),
+                                         member.size)
+                    yield entry, lambda member=member: archive.extractfile(member)
+    except _READ_ERRORS as e:
+        raise ArchiveError(f"Cannot read archive: {e}") from e
+
+
+def check_entry(entry: ArchiveEntry, max_size: Optional[int] = None) -> Optional[str]:
+    """Why an entry cannot be processed, or None if it can."""
+    max_size = max_size or settings.MAX_FILE_SIZE
+    if entry.file_ext not in settings.ALLOWED_EXTENSIONS:
+        return f"Invalid file type. Allowed: {', '.join(sorted(settings.ALLOWED_EXTENSIONS))}"
+    if entry.size > max_size:
+        return f"File too large. Max size: {max_size / 1024 / 1024}MB"
+    return None
+
+
+def list_entries(path: Path) -> List[ArchiveEntry]:
+    """
+    Every file in the archive without extracting anything. Raises ArchiveError
+    if it is unreadable or holds more than ARCHIVE_MAX_ENTRIES files.
+    """
+    entries = []
+    for entry, _ in _iter_members(path):
+        entries.append(entry)
+        if len(entries) > settings.ARCHIVE_MAX_ENTRIES:
+            raise ArchiveError(f"Archive has more than {settings.ARCHIVE_MAX_ENTRIES} files")
+    return entries
+
+
+def _copy_entry(source: BinaryIO, path: Path, max_size: int) -> StoredUpload:
+    """Copy one entry in chunks, enforcing the size limit on the bytes actually read."""
+    part_path = path.with_name(path.name + ".part")
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with source, open(part_path, 'wb') as out:
+            while True:
+                chunk = source.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_size:
+                    # Declared sizes can lie (zip bombs); the stream can't
+                    raise UploadTooLarge(f"File too large. Max size: {max_size / 1024 / 1024}MB")
+                digest.update(chunk)
+                out.write(chunk)
+        part_path.replace(path)
+    except BaseException:
+        if part_path.exists():
+            part_path.unlink()
+        raise
+    return StoredUpload(path=path, size=size, sha256=digest.hexdigest())
+
+
+def extract_entries(path: Path, max_size: Optional[int] = None,
+                    destination: Optional[Callable[[int, ArchiveEntry], Optional[Path]]] = None
+                    ) -> Iterator[Tuple[int, ArchiveEntry, Optional[StoredUpload], Optional[str]]]:
+    """
+    Write the entries check_entry accepts to UPLOAD_DIR one at a time, as the
+    consumer asks for them, yielding (index, entry, stored, None); index counts
+    accepted entries, so it is stable across reads of the same archive. An
+    entry that fails while being copied (larger than declared, encrypted)
+    yields (index, entry, None, reason). Only entries the consumer has taken
+    are ever on disk, so it controls how far extraction runs ahead of
+    processing. `destination(index, entry)` picks each entry's path, or None
+    to skip it (default: a fresh unique path).
+    """
+    max_size = max_size or settings.MAX_FILE_SIZE
+    destination = destination or (lambda index, entry: unique_upload_path(entry.file_ext))
+    index = -1
+    for entry, open_entry in _iter_members(path):
+        if check_entry(entry, max_size):
+            continue
+        index += 1
+        entry_path = destination(index, entry)
+        if entry_path is None:
+            continue
+        try:
+            stored = _copy_entry(open_entry(), entry_path, max_size)
+        except (UploadTooLarge, RuntimeError) as e:  # RuntimeError: encrypted zip entry
+            yield index, entry, None, str(e)
+            continue
+        except _READ_ERRORS as e:
+            raise ArchiveError(f"Cannot read {entry.name}: {e}") from e
+        yield index, entry, stored, None
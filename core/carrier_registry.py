@@ -0,0 +1,251 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+import yaml
+
+from config import settings
+from core.pattern_analysis import backtracking_risks
+
+logger = logging.getLogger(__name__)
+
+GENERIC = 'generic'
+
+# Fields whose risky patterns have been logged by this process
+_reported_risky: Set[str] = set()
+
+
+class CarrierRegistryError(Exception):
+    """Raised when the registry file is missing, malformed or has a bad pattern."""
+
+
+class ZoneTemplate(NamedTuple):
+    """Field rectangles of one form version, as (x, y, width, height) page fractions."""
+    form: str
+    page: int
+    identify: List[str]  # patterns that tell this form apart from the carrier's others
+    min_confidence: float  # any zone below this mean tesseract confidence -> full OCR
+    fields: Dict[str, Tuple[float, float, float, float]]
+
+
+class Carrier(NamedTuple):
+    key: str
+    name: str
+    confidence: float
+    detect: List[str]
+    fields: Dict[str, List[str]]
+    labels: Dict[str, List[str]] = {}  # field -> printed labels, used when OCR word boxes exist
+    zones: List[ZoneTemplate] = []  # zonal OCR templates, tried in order
+
+
+def _string_list(value, where: str, kind: str = "pattern") -> List[str]:
+    if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+        raise CarrierRegistryError(f"{where} must be a list of {kind} strings")
+    return value
+
+
+def parse_carriers(data: dict) -> Dict[str, Carrier]:
+    """Validate registry data and compile every pattern once so typos fail the load."""
+    if not isinstance(data, dict) or not isinstance(data.get('carriers'), dict):
+        raise CarrierRegistryError("registry must have a top-level 'carriers' mapping")
+
+    carriers = {}
+    for key, spec in data['carriers'].items():
+        if not isinstance(spec, dict):
+            raise CarrierRegistryError(f"carrier '{key}' must be a mapping")
+        detect = _string_list(spec.get('detect', []), f"{key}.detect")
+        fields = spec.get('fields') or {}
+        if not isinstance(fields, dict):
+            raise CarrierRegistryError(f"{key}.fields must be a mapping")
+        fields = {field: _string_list(patterns, f"{key}.fields.{field}")
+                  for field, patterns in fields.items()}
+
+        labels = spec.get('labels') or {}
+        if not isinstance(labels, dict):
+            raise CarrierRegistryError(f"{key}.labels must be a mapping")
+        labels = {field: _string_list(names, f"{key}.labels.{field}", "label")
+                  for field, names in labels.items()}
+
+        zones = _parse_zones(spec.get('zones') or {}, key)
+        # A zonal document gets no full-page OCR, so a template must cover every field
+        for template in zones:
+            uncovered = [field for field in dict.fromkeys([*fields, *labels]) if field not in template.fields]
+            if uncovered:
+                raise CarrierRegistryError(
+                    f"{key}.zones.{template.form} has no zone for {', '.join(uncovered)}"
+                )
+
+        for pattern in detect:
+            _compile(pattern, re.IGNORECASE, f"{key}.detect")
+        for field, patterns in fields.items():
+            for pattern in patterns:
+                _compile(pattern, re.IGNORECASE | re.MULTILINE, f"{key}.fields.{field}")
+
+        carriers[key] = Carrier(
+            key=key,
+            name=str(spec.get('name', key)),
+            confidence=float(spec.get('confidence', 0.95)),
+            detect=detect,
+            fields=fields,
+            labels=labels,
+            zones=zones,
+        )
+
+    if GENERIC not in carriers:
+        raise CarrierRegistryError(f"registry needs a '{GENERIC}' fallback carrier")
+    _report_risky_patterns(carriers)
+    return carriers
+
+
+def _parse_zones(zones, key: str) -> List[ZoneTemplate]:
+    if not isinstance(zones, dict):
+        raise CarrierRegistryError(f"{key}.zones must be a mapping of form name to template")
+
+    templates = []
+    for form, spec in zones.items():
+        where = f"{key}.zones.{form}"
+        if not isinstance(spec, dict) or not isinstance(spec.get('fields'), dict) or not spec['fields']:
+            raise CarrierRegistryError(f"{where} needs a non-empty 'fields' mapping")
+        identify = _string_list(spec.get('identify', []), f"{where}.identify")
+        for pattern in identify:
+            _compile(pattern, re.IGNORECASE, f"{where}.identify")
+
+        fields = {}
+        for field, box in spec['fields'].items():
+            if (not isinstance(box, list) or len(box) != 4
+                    or not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in box)):
+                raise CarrierRegistryError(f"{where}.fields.{field} must be [x, y, width, height]")
+            x, y, width, height = (float(v) for v in box)
+            if width <= 0 or height <= 0 or x < 0 or y < 0 or x + width > 1 or y + height > 1:
+                raise CarrierRegistryError(
+                    f"{where}.fields.{field} must lie inside the page (fractions of 0..1)"
+                )
+            fields[field] = (x, y, width, height)
+
+        templates.append(ZoneTemplate(
+            form=str(form),
+            page=int(spec.get('page', 1)),
+            identify=identify,
+            min_confidence=float(spec.get('min_confidence', settings.ZONAL_MIN_CONFIDENCE)),
+            fields=fields,
+        ))
+    return templates
+
+
+def _report_risky_patterns(carriers: Dict[str, Carrier]) -> None:
+    """
+    Log field patterns that can backtrack super-linearly on garbled OCR text,
+    each field once per process rather than on every reload.
+    """
+    risky = set()
+    for carrier in carriers.values():
+        for field, patterns in carrier.fields.items():
+            for pattern in patterns:
+                risks = backtracking_risks(pattern, re.IGNORECASE | re.MULTILINE)
+                key = f"{carrier.key}.{field}"
+                if risks and key not in _reported_risky:
+                    risky.add(key)
+                    logger.debug(f"{key}: {pattern!r}: {'; '.join(risks)}")
+    if risky:
+        _reported_risky.update(risky)
+        logger.info(
+            f"{len(risky)} carrier fields have super-linear patterns, matched under "
+            f"EXTRACTION_FIELD_TIMEOUT: {', '.join(sorted(risky))}"
+        )
+
+
+def _compile(pattern: str, flags: int, where: str) -> None:
+    try:
+        re.compile(pattern, flags)
+    except re.error as e:
+        raise CarrierRegistryError(f"bad pattern in {where}: {pattern!r}: {e}") from e
+
+
+def load_file(path: Path) -> Dict[str, Carrier]:
+    """Read a .yaml/.yml or .json registry file."""
+    try:
+        with open(path, encoding='utf-8') as f:
+            if path.suffix == '.json':
+                data = json.load(f)
+            else:
+                data = yaml.safe_load(f)
+    except (OSError, ValueError, yaml.YAMLError) as e:
+        raise CarrierRegistryError(f"cannot read carrier registry {path}: {e}") from e
+    return parse_carriers(data)
+
+
+class CarrierRegistry:
+    """
+    Carriers loaded from CARRIER_REGISTRY_PATH. refresh() re-reads the file
+    when its mtime or size changes, checking at most every `reload_interval`
+    seconds. A broken edit is logged once and the previous carriers stay in use.
+    `version` increases on every successful load so callers can rebuild
+    anything derived from the registry.
+    """
+
+    def __init__(self, path: Optional[str] = None, reload_interval: Optional[float] = None):
+        self.path = Path(path or settings.CARRIER_REGISTRY_PATH)
+        self.reload_interval = (reload_interval if reload_interval is not None
+                                else settings.CARRIER_REGISTRY_RELOAD_INTERVAL)
+        self.version = 0
+        self._carriers: Dict[str, Carrier] = {}
+        self._signature_loaded: Optional[tuple] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _signature(self) -> tuple:
+        try:
+            stat = os.stat(self.path)
+        except OSError as e:
+            raise CarrierRegistryError(f"cannot read carrier registry {self.path}: {e}") from e
+        return stat.st_mtime_ns, stat.st_size
+
+    def load(self) -> None:
+        with self._lock:
+            signature = self._signature()
+            self._carriers = load_file(self.path)
+            self._signature_loaded = signature
+            self._checked_at = time.monotonic()
+            self.version += 1
+        logger.info(f"Loaded {len(self._carriers)} carriers from {self.path}")
+
+    def refresh(self) -> None:
+        if self.version == 0:
+            self.load()
+            return
+        if self.reload_interval <= 0 or time.monotonic() - self._checked_at < self.reload_interval:
+            return
+
+        self._checked_at = time.monotonic()
+        try:
+            signature = self._signature()
+        except CarrierRegistryError as e:
+            logger.error(f"Carrier registry unavailable, keeping previous version: {e}")
+            return
+        if signature == self._signature_loaded:
+            return
+        try:
+            self.load()
+        except (OSError, CarrierRegistryError) as e:
+            logger.error(f"Carrier registry reload failed, keeping previous version: {e}")
+            self._signature_loaded = signature  # don't retry until the file changes again
+
+    @property
+    def carriers(self) -> Dict[str, Carrier]:
+        self.refresh()
+        return self._carriers
+
+    def get(self, key: str) -> Optional[Carrier]:
+        return self.carriers.get(key)
+
+    @property
+    def generic(self) -> Carrier:
+        return self.carriers[GENERIC]
+
+
+registry = CarrierRegistry()
@@ -1,160 +1,87 @@
 import re
-from typing import Tuple
+from collections import defaultdict
+from typing import Dict, List, Pattern, Tuple
 import logging
 
+from core.carrier_registry import registry
+from core.literal_scanner import LiteralScanner
+from core.pattern_analysis import is_plain_literal, required_literal
+
 logger = logging.getLogger(__name__)
 
 class CompanyDetector:
-    COMPANY_PATTERNS = {
-        'state_farm': {
-            'patterns': [
-                r'State\s*Farm',
-                r'statefarm\.com',
-                r'Like\s*a\s*good\s*neighbor',
-            ],
-            'confidence': 0.95
-        },
-        'allstate': {
-            'patterns': [
-                r'Allstate',
-                r'allstate\.com',
-                r'You\'re\s*in\s*good\s*hands',
-            ],
-            'confidence': 0.95
-        },
-        'progressive': {
-            'patterns': [
-                r'Progressive',
-                r'progressive\.com',
-            ],
-            'confidence': 0.95
-        },
-        'usaa': {
-            'patterns': [
-                r'USAA',
-                r'usaa\.com',
-            ],
-            'confidence': 0.95
-        },
-        'nationwide': {
-            'patterns': [
-                r'Nationwide',
-                r'nationwide\.com',
-                r'NATIONWIDE\s+MUTUAL\s+INSURANCE',
-                r'NATIONWIDE\s+24-HOUR\s+CLAIM',
-                r'TENANT\s+CUSTOMER\s+NOTICE',  # Specific to this doc type
-            ],
-            'confidence': 0.95
-        },
-        'travelers': {
-            'patterns': [
-                r'Travelers',
-                r'travelers\.com',
-            ],
-            'confidence': 0.95
-        },
-        'liberty_mutual': {
-            'patterns': [
-                r'Liberty\s*Mutual',
-                r'libertymutual\.com',
-            ],
-            'confidence': 0.95
-        },
-        'farmers': {
-            'patterns': [
-                r'Farmers\s*Insurance',
-                r'farmers\.com',
-            ],
-            'confidence': 0.95
-        },
-        'geico': {
-            'patterns': [
-                r'GEICO',
-                r'geico\.com',
-            ],
-            'confidence': 0.95
-        },
-        'american_family': {
-            'patterns': [
-                r'American\s*Family',
-                r'amfam\.com',
-            ],
-            'confidence': 0.95
-        },
-        'erie': {
-            'patterns': [
-                r'Erie\s*Insurance',
-                r'erieinsurance\.com',
-            ],
-            'confidence': 0.95
-        },
-        'amica': {
-            'patterns': [
-                r'Amica\s*Mutual',
-                r'amica\.com',
-            ],
-            'confidence': 0.95
-        },
-        'csaa': {
-            'patterns': [
-                r'CSAA\s*Insurance',
-                r'AAA\s*Insurance',
-                r'csaa-ig\.com',
-            ],
-            'confidence': 0.95
-        },
-        'chubb': {
-            'patterns': [
-                r'Chubb',
-                r'chubb\.com',
-            ],
-            'confidence': 0.95
-        },
-        'hartford': {
-            'patterns': [
-                r'The\s*Hartford',
-                r'thehartford\.com',
-            ],
-            'confidence': 0.95
-        },
-        'country_financial': {
-            'patterns': [
-                r'Country\s*Financial',
-                r'countryfinancial\.com',
-            ],
-            'confidence': 0.95
-        },
-        'lemonade': {
-            'patterns': [
-                r'Lemonade\s*Insurance',
-                r'lemonade\.com',
-            ],
-            'confidence': 0.95
-        },
-        'hanover': {
-            'patterns': [
-                r'The\s*Hanover',
-                r'hanover\.com',
-            ],
-            'confidence': 0.95
-        },
-    }
+    # key -> {'patterns': [...], 'confidence': float}, synced from the carrier registry
+    COMPANY_PATTERNS: Dict[str, dict] = {}
+    _registry_version = 0
+    
+    # Built by compile_patterns(): literal -> [(company, compiled or None)],
+    # where None means the literal is the whole pattern and needs no regex run.
+    _by_literal: Dict[str, List[Tuple[str, Pattern]]] = {}
+    _unfiltered: List[Tuple[str, Pattern]] = []
+    _scanner: LiteralScanner = LiteralScanner([])
+    _rank: Dict[str, int] = {}
+    
+    @classmethod
+    def compile_patterns(cls) -> None:
+        """
+        Compile COMPANY_PATTERNS once and index them by a literal each match must
+        contain, so detection is one Aho-Corasick pass over the sample plus a
+        regex check only for patterns whose literal was seen.
+        """
+        by_literal = defaultdict(list)
+        unfiltered = []
+        for company, data in cls.COMPANY_PATTERNS.items():
+            for pattern in data['patterns']:
+                literal = required_literal(pattern, re.IGNORECASE)
+                if literal is None:
+                    unfiltered.append((company, re.compile(pattern, re.IGNORECASE)))
+                elif is_plain_literal(pattern, re.IGNORECASE):
+                    by_literal[literal].append((company, None))
+                else:
+                    by_literal[literal].append((company, re.compile(pattern, re.IGNORECASE)))
+        
+        cls._by_literal = dict(by_literal)
+        cls._unfiltered = unfiltered
+        cls._scanner = LiteralScanner(by_literal)
+        cls._rank = {company: rank for rank, company in enumerate(cls.COMPANY_PATTERNS)}
+    
+    @classmethod
+    def sync_registry(cls) -> None:
+        """Rebuild COMPANY_PATTERNS and the compiled index when the registry changes."""
+        registry.refresh()
+        if registry.version == cls._registry_version:
+            return
+        cls.COMPANY_PATTERNS = {
+            key: {'patterns': carrier.detect, 'confidence': carrier.confidence}
+            for key, carrier in registry.carriers.items() if carrier.detect
+        }
+        cls.compile_patterns()
+        cls._registry_version = registry.version
     
     @staticmethod
     def detect_company(text: str) -> Tuple[str, float]:
+        cls = CompanyDetector
+        cls.sync_registry()
         text_sample = text[:2000]
         best_match = ('generic', 0.0)
         
-        for company, data in CompanyDetector.COMPANY_PATTERNS.items():
-            match_count = 0
-            for pattern in data['patterns']:
-                if re.search(pattern, text_sample, re.IGNORECASE):
-                    match_count += 1
-            
-            if match_count > 0:
-                confidence = data['confidence'] * (match_count / len(data['patterns']))
-                if confidence > best_match[1]:
-                    best_match = (company, confidence)
+        match_counts: Dict[str, int] = defaultdict(int)
+        candidates = list(cls._unfiltered)
+        for literal in cls._scanner.find(text_sample):
+            candidates.extend(cls._by_literal[literal])
+        for company, regex in candidates:
+            if regex is None or regex.search(text_sample):
+                match_counts[company] += 1
+        
+        # Same order as COMPANY_PATTERNS so ties resolve as before
+        for company in sorted(match_counts, key=cls._rank.__getitem__):
+            data = cls.COMPANY_PATTERNS[company]
+            confidence = data['confidence'] * (match_counts[company] / len(data['patterns']))
+            if confidence > best_match[1]:
+                best_match = (company, confidence)
         
         logger.info(f"Detected: {best_match[0]} ({best_match[1]:.2f})")
-        return best_match
\ No newline at end of file
+        return best_match
+
+
+CompanyDetector.sync_registry()
@@ -0,0 +1,413 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Collection, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import func
+
+from config import settings
+from models.database import SessionLocal, InsuranceRecord, ProcessingJob, RecordStageTiming
+from core.archive_reader import ArchiveEntry, extract_entries
+from core.metrics import observe_document
+from core.pipeline import PipelineExecutor, build_message
+from core.upload_writer import unique_upload_path
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks while an archive batch has ARCHIVE_PREFETCH jobs waiting
+ARCHIVE_WAIT_INTERVAL = 0.5
+# Floor for the default JOB_STALE_AFTER
+MIN_STALE_AFTER = 60.0
+
+
+def create_job(job_id: str, filename: str, file_path: Optional[str], file_ext: str,
+               batch_id: Optional[str] = None, kind: str = ProcessingJob.DOCUMENT,
+               error: Optional[str] = None, file_hash: Optional[str] = None,
+               upload_seconds: Optional[float] = None) -> ProcessingJob:
+    """Persist a new queued job, or with an `error` one that failed before it could be queued."""
+    db = SessionLocal()
+    try:
+        job = ProcessingJob(
+            id=job_id,
+            batch_id=batch_id,
+            kind=kind,
+            filename=filename,
+            file_path=file_path,
+            file_ext=file_ext,
+            file_hash=file_hash,
+            upload_seconds=upload_seconds,
+            status=ProcessingJob.FAILED if error else ProcessingJob.QUEUED,
+            error=error,
+            finished_at=datetime.utcnow() if error else None,
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        return job
+    finally:
+        db.close()
+
+
+def claim_job(job_id: str) -> Optional[ProcessingJob]:
+    """
+    Atomically move a job from queued to running.
+    Returns None if another consumer already claimed it.
+    """
+    db = SessionLocal()
+    try:
+        claimed = db.query(ProcessingJob).filter(
+            ProcessingJob.id == job_id,
+            ProcessingJob.status == ProcessingJob.QUEUED
+        ).update({
+            ProcessingJob.status: ProcessingJob.RUNNING,
+            ProcessingJob.started_at: datetime.utcnow(),
+            ProcessingJob.heartbeat_at: datetime.utcnow(),
+            ProcessingJob.attempts: ProcessingJob.attempts + 1,
+        }, synchronize_session=False)
+        db.commit()
+
+        if not claimed:
+            return None
+        return db.query(ProcessingJob).filter(ProcessingJob.id == job_id).first()
+    finally:
+        db.close()
+
+
+def complete_job(job_id: str, filename: str, result: dict, processing_time: float,
+                 stages: Optional[Dict[str, float]] = None) -> int:
+    """
+    Save the extracted record, its stage timings and the job's completion in
+    one transaction. `stages` adds timings measured outside the pipeline.
+    """
+    extracted_data = result['extracted_data']
+    needs_review = result['needs_review']
+
+    db = SessionLocal()
+    try:
+        record = InsuranceRecord.from_extraction(
+            filename, extracted_data, processing_time, needs_review
+        )
+        db.add(record)
+        db.flush()
+        stages = {**result.get('stages', {}), **(stages or {})}
+        db.add_all(RecordStageTiming.for_record(record.id, stages))
+
+        response = {
+            'success': True,
+            'message': build_message(needs_review, result['validation_results']),
+            'filename': filename,
+            'data': {
+                **{k: v for k, v in extracted_data.items() if k != 'raw_text_preview'},
+                'processing_time': processing_time,
+                'needs_review': needs_review,
+            },
+            'record_id': record.id,
+        }
+
+        db.query(ProcessingJob).filter(ProcessingJob.id == job_id).update({
+            ProcessingJob.status: ProcessingJob.COMPLETED,
+            ProcessingJob.record_id: record.id,
+            ProcessingJob.result: json.dumps(response, default=str),
+            ProcessingJob.finished_at: datetime.utcnow(),
+        }, synchronize_session=False)
+        db.commit()
+        return record.id
+    finally:
+        db.close()
+
+
+def fail_job(job_id: str, error: str) -> None:
+    db = SessionLocal()
+    try:
+        db.query(ProcessingJob).filter(ProcessingJob.id == job_id).update({
+            ProcessingJob.status: ProcessingJob.FAILED,
+            ProcessingJob.error: error,
+            ProcessingJob.finished_at: datetime.utcnow(),
+        }, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def finish_job(job_id: str, result: dict) -> None:
+    """Mark a job completed with a result but no record (an expanded archive)."""
+    db = SessionLocal()
+    try:
+        db.query(ProcessingJob).filter(ProcessingJob.id == job_id).update({
+            ProcessingJob.status: ProcessingJob.COMPLETED,
+            ProcessingJob.result: json.dumps(result, default=str),
+            ProcessingJob.finished_at: datetime.utcnow(),
+        }, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def queued_job_ids(limit: int = 100, kind: str = ProcessingJob.DOCUMENT) -> List[str]:
+    db = SessionLocal()
+    try:
+        rows = db.query(ProcessingJob.id).filter(
+            ProcessingJob.status == ProcessingJob.QUEUED,
+            # Jobs queued before the kind column existed are documents
+            func.coalesce(ProcessingJob.kind, ProcessingJob.DOCUMENT) == kind
+        ).order_by(ProcessingJob.created_at).limit(limit).all()
+        return [row[0] for row in rows]
+    finally:
+        db.close()
+
+
+def batch_job_ids(batch_id: str) -> Set[str]:
+    db = SessionLocal()
+    try:
+        return {row[0] for row in db.query(ProcessingJob.id).filter(ProcessingJob.batch_id == batch_id)}
+    finally:
+        db.close()
+
+
+def archive_entry_job_id(batch_id: str, index: int) -> str:
+    """Job id of an archive's index-th document, the same on every expansion of the archive."""
+    return str(uuid.uuid5(uuid.UUID(batch_id), str(index)))
+
+
+def count_queued(batch_id: str) -> int:
+    db = SessionLocal()
+    try:
+        return db.query(ProcessingJob).filter(
+            ProcessingJob.batch_id == batch_id,
+            ProcessingJob.status == ProcessingJob.QUEUED
+        ).count()
+    finally:
+        db.close()
+
+
+def heartbeat_jobs(job_ids: Collection[str]) -> None:
+    """Mark running jobs as still alive so requeue_stale_jobs leaves them alone."""
+    if not job_ids:
+        return
+    db = SessionLocal()
+    try:
+        db.query(ProcessingJob).filter(
+            ProcessingJob.id.in_(list(job_ids)),
+            ProcessingJob.status == ProcessingJob.RUNNING
+        ).update({ProcessingJob.heartbeat_at: datetime.utcnow()}, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def requeue_stale_jobs(older_than: float, max_attempts: Optional[int] = None) -> Tuple[int, int]:
+    """
+    Return jobs stuck in 'running' (their consumer died mid-job) to the queue.
+    Only jobs without a heartbeat for `older_than` seconds are touched, so work
+    still running in another worker process is left alone. A job that has
+    already been started `max_attempts` times is failed instead, so a document
+    that kills its worker can't take the queue down forever.
+    Returns (requeued, failed).
+    """
+    max_attempts = max_attempts or settings.JOB_MAX_ATTEMPTS
+    now = datetime.utcnow()
+    cutoff = now - timedelta(seconds=older_than)
+    db = SessionLocal()
+    try:
+        stale = db.query(ProcessingJob).filter(
+            ProcessingJob.status == ProcessingJob.RUNNING,
+            func.coalesce(ProcessingJob.heartbeat_at, ProcessingJob.started_at) < cutoff
+        )
+        failed = stale.filter(ProcessingJob.attempts >= max_attempts).update({
+            ProcessingJob.status: ProcessingJob.FAILED,
+            ProcessingJob.error: f"Abandoned after {max_attempts} attempts",
+            ProcessingJob.finished_at: now,
+        }, synchronize_session=False)
+        requeued = stale.update({ProcessingJob.status: ProcessingJob.QUEUED}, synchronize_session=False)
+        db.commit()
+        return requeued, failed
+    finally:
+        db.close()
+
+
+class JobQueue:
+    """
+    In-process consumer for persisted jobs with bounded concurrency.
+    Jobs live in the database, so anything queued before a restart (or by
+    another process) is picked up by the periodic poll.
+    Archive jobs are expanded into document jobs by tasks of their own, not
+    by the consumers, so an archive waiting for its documents to be
+    processed never holds the slot they need.
+    """
+
+    def __init__(self, pipeline: PipelineExecutor, concurrency: Optional[int] = None,
+                 poll_interval: Optional[float] = None, stale_after: Optional[float] = None):
+        self.pipeline = pipeline
+        self.concurrency = concurrency or settings.JOB_CONCURRENCY or pipeline.max_workers
+        self.poll_interval = poll_interval or settings.JOB_POLL_INTERVAL
+        # Several missed heartbeats (one per poll) before a job counts as abandoned;
+        # requeueing a job that is still running would process it twice
+        self.stale_after = (stale_after or settings.JOB_STALE_AFTER
+                            or max(self.poll_interval * 6, MIN_STALE_AFTER))
+        self._queue: Optional[asyncio.Queue] = None
+        self._pending: Set[str] = set()
+        self._running: Set[str] = set()
+        self._expanding: Dict[str, asyncio.Task] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._consume()) for _ in range(self.concurrency)]
+        self._tasks.append(asyncio.create_task(self._poll()))
+        logger.info(f"Job queue started with concurrency {self.concurrency}")
+
+    async def stop(self) -> None:
+        tasks = self._tasks + list(self._expanding.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info("Job queue stopped")
+
+    def submit(self, job_id: str) -> None:
+        """Hand a persisted job to the local consumers."""
+        if self._queue is None or job_id in self._pending:
+            return
+        self._pending.add(job_id)
+        self._queue.put_nowait(job_id)
+
+    def submit_archive(self, job_id: str) -> None:
+        """Start expanding a persisted archive job into document jobs."""
+        if self._queue is None or job_id in self._expanding:
+            return
+        task = asyncio.create_task(self.expand_archive(job_id))
+        self._expanding[job_id] = task
+        task.add_done_callback(lambda _: self._expanding.pop(job_id, None))
+
+    async def _poll(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(heartbeat_jobs, set(self._running))
+                await self._requeue_stale()
+                for job_id in await asyncio.to_thread(queued_job_ids):
+                    self.submit(job_id)
+                for job_id in await asyncio.to_thread(queued_job_ids, kind=ProcessingJob.ARCHIVE):
+                    self.submit_archive(job_id)
+            except Exception as e:
+                logger.error(f"Job poll failed: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def _requeue_stale(self) -> None:
+        requeued, failed = await asyncio.to_thread(requeue_stale_jobs, self.stale_after)
+        if requeued:
+            logger.info(f"Requeued {requeued} interrupted jobs")
+        if failed:
+            logger.warning(f"Failed {failed} jobs that were interrupted {settings.JOB_MAX_ATTEMPTS} times")
+
+    async def _consume(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self.run_job(job_id)
+            except Exception as e:
+                logger.error(f"Job {job_id} crashed: {e}")
+            finally:
+                self._pending.discard(job_id)
+                self._queue.task_done()
+
+    async def run_job(self, job_id: str) -> None:
+        job = await asyncio.to_thread(claim_job, job_id)
+        if job is None:
+            return
+        self._running.add(job_id)
+
+        logger.info(f"Running job {job_id}: {job.filename}")
+        start_time = time.time()
+        file_path = Path(job.file_path)
+        stages = {'upload_write': job.upload_seconds} if job.upload_seconds is not None else {}
+
+        try:
+            # Hashed while the upload was written, so the OCR cache needn't re-read the file
+            result = await self.pipeline.run(str(file_path), job.file_ext, job.file_hash)
+            processing_time = time.time() - start_time
+            await asyncio.to_thread(complete_job, job_id, job.filename, result, processing_time, stages)
+            observe_document(result, job.file_ext, processing_time, stages)
+            logger.info(f"Job {job_id} completed in {processing_time:.2f}s")
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {e}")
+            await asyncio.to_thread(fail_job, job_id, str(e) or e.__class__.__name__)
+        finally:
+            self._running.discard(job_id)
+            if file_path.exists():
+                file_path.unlink()
+
+    async def expand_archive(self, job_id: str) -> None:
+        """
+        Extract an archive job's documents into queued jobs of its batch, a
+        few at a time, pausing while ARCHIVE_PREFETCH of them are waiting.
+        Entry jobs have fixed ids and paths, so an expansion interrupted by a
+        restart resumes after the entries it had already queued.
+        """
+        job = await asyncio.to_thread(claim_job, job_id)
+        if job is None:
+            return
+        self._running.add(job_id)
+
+        batch_id = job.batch_id
+        archive_path = Path(job.file_path)
+        prefetch = settings.ARCHIVE_PREFETCH or self.concurrency * 2
+        done = await asyncio.to_thread(batch_job_ids, batch_id)
+
+        def destination(index: int, entry: ArchiveEntry) -> Optional[Path]:
+            entry_id = archive_entry_job_id(batch_id, index)
+            return None if entry_id in done else unique_upload_path(entry.file_ext, name=entry_id)
+
+        entries = extract_entries(archive_path, destination=destination)
+        queued = failed = 0
+        finished = False
+        try:
+            while True:
+                while await asyncio.to_thread(count_queued, batch_id) >= prefetch:
+                    await asyncio.sleep(ARCHIVE_WAIT_INTERVAL)
+
+                # The generator reads the archive sequentially; one thread call per entry
+                item = await asyncio.to_thread(next, entries, None)
+                if item is None:
+                    break
+
+                index, entry, stored, error = item
+                entry_id = archive_entry_job_id(batch_id, index)
+                filename = entry.name[-255:]
+                if stored is None:
+                    await asyncio.to_thread(create_job, entry_id, filename, None, entry.file_ext,
+                                            batch_id, error=error)
+                    failed += 1
+                    continue
+
+                try:
+                    await asyncio.to_thread(
+                        create_job, entry_id, filename, str(stored.path), entry.file_ext, batch_id,
+                        file_hash=stored.sha256
+                    )
+                except Exception:
+                    stored.path.unlink()
+                    raise
+                self.submit(entry_id)
+                queued += 1
+
+            await asyncio.to_thread(finish_job, job_id, {'batch_id': batch_id, 'queued': queued,
+                                                         'failed': failed})
+            finished = True
+            logger.info(f"Archive {job.filename} expanded: {queued} queued, {failed} failed")
+        except Exception as e:
+            logger.error(f"Archive expansion failed for batch {batch_id}: {e}")
+            await asyncio.to_thread(fail_job, job_id, str(e) or e.__class__.__name__)
+            finished = True
+        finally:
+            self._running.discard(job_id)
+            await asyncio.to_thread(entries.close)
+            # An interrupted expansion keeps its archive for the requeued job
+            if finished and archive_path.exists():
+                archive_path.unlink()
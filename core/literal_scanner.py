@@ -0,0 +1,84 @@
+from collections import deque
+from typing import Dict, Iterable, List, Set
+
+# Characters that re.IGNORECASE treats as equal to an ASCII letter but that
+# str.lower() does not map onto one (U+212A KELVIN SIGN already lowers to 'k').
+_IGNORECASE_FOLD = str.maketrans({'İ': 'i', 'ı': 'i', 'ſ': 's'})
+
+
+def fold_case(text: str) -> str:
+    """Lowercase text so that ASCII literals match exactly where re.IGNORECASE would."""
+    return text.translate(_IGNORECASE_FOLD).lower()
+
+
+class LiteralScanner:
+    """
+    Aho-Corasick automaton over lowercase ASCII literals. find() reports every
+    literal present in a text in a single pass, however many literals there are.
+    """
+
+    def __init__(self, literals: Iterable[str]):
+        self.literals = sorted({literal.lower() for literal in literals if literal})
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[str]] = [[]]
+
+        for literal in self.literals:
+            state = 0
+            for char in literal:
+                nxt = self._goto[state].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                    self._goto[state][char] = nxt
+                state = nxt
+            self._out[state].append(literal)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(char, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find(self, text: str) -> Set[str]:
+        goto, fail, out = self._goto, self._fail, self._out
+        found: Set[str] = set()
+        state = 0
+        for char in fold_case(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
+
+
+class AnchorIndex:
+    """
+    Case-folded copy of a document with lazily built, cached occurrence lists
+    per literal. Offsets line up with the original text (fold_case never
+    changes the length), so they can be fed straight to Pattern.match(text, pos).
+    """
+
+    def __init__(self, text: str):
+        self.folded = fold_case(text)
+        self._positions: Dict[str, List[int]] = {}
+
+    def positions(self, literal: str) -> List[int]:
+        found = self._positions.get(literal)
+        if found is None:
+            found = []
+            find = self.folded.find
+            pos = find(literal)
+            while pos != -1:
+                found.append(pos)
+                pos = find(literal, pos + 1)
+            self._positions[literal] = found
+        return found
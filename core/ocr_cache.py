@@ -0,0 +1,200 @@
+import hashlib
+import logging
+import multiprocessing.util
+import threading
+import time
+from datetime import datetime
+from typing import Optional, Dict, Any
+
+from sqlalchemy import func
+
+from config import settings
+from models.database import SessionLocal, OCRCacheEntry, OCRCacheStats
+
+logger = logging.getLogger(__name__)
+
+STATS_ROW_ID = 1
+COUNTERS = ('hits', 'misses', 'evictions')
+
+
+def file_sha256(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class OCRCache:
+    """
+    Persistent OCR text cache with size-bounded LRU eviction.
+    Cache failures are logged and treated as misses so OCR never breaks on them.
+    Lookups only read: hit/miss counts and LRU access times are kept in
+    memory and written every OCR_CACHE_STATS_FLUSH_INTERVAL seconds, before
+    an eviction, when stats() is read and when the process exits.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None, enabled: Optional[bool] = None,
+                 flush_interval: Optional[float] = None):
+        self.max_bytes = max_bytes if max_bytes is not None else settings.OCR_CACHE_MAX_BYTES
+        self.enabled = enabled if enabled is not None else settings.OCR_CACHE_ENABLED
+        self.flush_interval = (flush_interval if flush_interval is not None
+                               else settings.OCR_CACHE_STATS_FLUSH_INTERVAL)
+        self._lock = threading.Lock()
+        self._counts: Dict[str, int] = dict.fromkeys(COUNTERS, 0)
+        self._accessed: Dict[str, datetime] = {}
+        self._flushed_at = time.monotonic()
+        # Pool workers exit without running atexit hooks, but do run these
+        multiprocessing.util.Finalize(self, self.flush, exitpriority=10)
+
+    @staticmethod
+    def make_key(file_hash: str, *settings_parts: Any) -> str:
+        """Combine the content hash with every setting that affects OCR output."""
+        raw = "|".join([file_hash] + [str(part) for part in settings_parts])
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        db = SessionLocal()
+        try:
+            text = db.query(OCRCacheEntry.text).filter(OCRCacheEntry.key == key).scalar()
+        except Exception as e:
+            logger.warning(f"OCR cache lookup failed: {e}")
+            return None
+        finally:
+            db.close()
+
+        with self._lock:
+            if text is not None:
+                self._counts['hits'] += 1
+                self._accessed[key] = datetime.utcnow()
+            else:
+                self._counts['misses'] += 1
+        if time.monotonic() - self._flushed_at >= self.flush_interval:
+            self.flush()
+        return text
+
+    def put(self, key: str, text: str) -> None:
+        if not self.enabled:
+            return
+        size = len(text.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        db = SessionLocal()
+        try:
+            # Eviction order depends on the access times not written yet
+            self._write_pending(db)
+            db.merge(OCRCacheEntry(
+                key=key, text=text, size=size, last_accessed_at=datetime.utcnow()
+            ))
+            db.flush()
+            self._evict(db)
+            db.commit()
+        except Exception as e:
+            logger.warning(f"OCR cache store failed: {e}")
+            db.rollback()
+        finally:
+            db.close()
+
+    def flush(self) -> None:
+        """Write the counters and access times gathered since the last flush."""
+        with self._lock:
+            if not (self._accessed or any(self._counts.values())):
+                self._flushed_at = time.monotonic()
+                return
+        db = SessionLocal()
+        try:
+            self._write_pending(db)
+            db.commit()
+        except Exception as e:
+            logger.warning(f"OCR cache stats flush failed: {e}")
+            db.rollback()
+        finally:
+            db.close()
+
+    def _write_pending(self, db) -> None:
+        with self._lock:
+            counts, self._counts = self._counts, dict.fromkeys(COUNTERS, 0)
+            accessed, self._accessed = self._accessed, {}
+            self._flushed_at = time.monotonic()
+        try:
+            for key, accessed_at in accessed.items():
+                db.query(OCRCacheEntry).filter(OCRCacheEntry.key == key).update(
+                    {OCRCacheEntry.last_accessed_at: accessed_at}, synchronize_session=False
+                )
+            for counter, amount in counts.items():
+                if amount:
+                    self._count(db, counter, amount)
+        except Exception:
+            # Put them back for the next flush rather than losing them
+            with self._lock:
+                for counter, amount in counts.items():
+                    self._counts[counter] += amount
+                self._accessed = {**accessed, **self._accessed}
+            raise
+
+    def _evict(self, db) -> None:
+        """Drop least recently used entries until the cache fits in max_bytes."""
+        total = db.query(func.coalesce(func.sum(OCRCacheEntry.size), 0)).scalar()
+        if total <= self.max_bytes:
+            return
+
+        excess = total - self.max_bytes
+        victims = []
+        oldest = db.query(OCRCacheEntry.key, OCRCacheEntry.size).order_by(
+            OCRCacheEntry.last_accessed_at
+        ).limit(1000).all()
+        for key, size in oldest:
+            if excess <= 0:
+                break
+            victims.append(key)
+            excess -= size
+
+        db.query(OCRCacheEntry).filter(OCRCacheEntry.key.in_(victims)).delete(
+            synchronize_session=False
+        )
+        evicted = len(victims)
+
+        if evicted:
+            self._count(db, 'evictions', evicted)
+            logger.info(f"OCR cache evicted {evicted} entries")
+
+    @staticmethod
+    def _count(db, counter: str, amount: int = 1) -> None:
+        column = getattr(OCRCacheStats, counter)
+        updated = db.query(OCRCacheStats).filter(OCRCacheStats.id == STATS_ROW_ID).update(
+            {column: column + amount}, synchronize_session=False
+        )
+        if not updated:
+            db.add(OCRCacheStats(id=STATS_ROW_ID, hits=0, misses=0, evictions=0))
+            db.flush()
+            db.query(OCRCacheStats).filter(OCRCacheStats.id == STATS_ROW_ID).update(
+                {column: column + amount}, synchronize_session=False
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        self.flush()
+        db = SessionLocal()
+        try:
+            row = db.query(OCRCacheStats).filter(OCRCacheStats.id == STATS_ROW_ID).first()
+            entries, size = db.query(
+                func.count(OCRCacheEntry.key),
+                func.coalesce(func.sum(OCRCacheEntry.size), 0)
+            ).one()
+            hits = row.hits if row else 0
+            misses = row.misses if row else 0
+            lookups = hits + misses
+            return {
+                'enabled': self.enabled,
+                'entries': entries,
+                'size_bytes': size,
+                'max_bytes': self.max_bytes,
+                'hits': hits,
+                'misses': misses,
+                'evictions': row.evictions if row else 0,
+                'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+            }
+        finally:
+            db.close()
@@ -1,88 +1,410 @@
 import cv2
-import pytesseract
-from pdf2image import convert_from_path
+import hashlib
+import json
+from pdf2image import convert_from_path, pdfinfo_from_path
 from PIL import Image
 import PyPDF2
 import numpy as np
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple, Union
 from config import settings
-from core.image_processor import ImageProcessor
+from core.image_processor import ImageProcessor, PAGE_STAGES, PREPROCESSING_VERSION
+from core.ocr_cache import OCRCache, file_sha256
+from core.timing import StageTimer, merge_stages
+from core.tesseract import image_to_data, image_to_string
+from core.word_boxes import WordBoxes
+from core.zonal_ocr import ZONAL_VERSION, ZoneText, crop_zone, prepare_zone, template_key, zone_text
+from pytesseract import Output
 
 logger = logging.getLogger(__name__)
 
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.tiff', '.bmp')
+
+
+class TextLayer(NamedTuple):
+    """A PDF's embedded text per page, and the per-page metrics of reading it."""
+    pages: List[str]
+    metrics: List[dict]
+
+
 class OCREngine:
     def __init__(self):
         self.processor = ImageProcessor()
         self.dpi = settings.OCR_DPI
         self.lang = settings.OCR_LANG
-        self.max_pages = getattr(settings, "MAX_OCR_PAGES", 5)  # default to 5 pages if not defined
+        self.max_pages = settings.MAX_OCR_PAGES
+        self.tesseract_config = '--psm 6 --oem 3'
+        self.min_page_chars = settings.PDF_TEXT_MIN_CHARS
+        self.cache = OCRCache()
 
-    def extract_text_from_pdf(self, file_path: str) -> str:
-        text = ""
+        unknown = set(settings.PAGE_STAGES) - set(PAGE_STAGES)
+        if unknown:
+            raise ValueError(f"Unknown PAGE_STAGES: {', '.join(sorted(unknown))}")
+        self.page_workers = max(1, settings.OCR_PAGE_WORKERS)
+        self._page_pool = None
+
+    def _get_page_pool(self) -> ThreadPoolExecutor:
+        # Threads are enough: tesseract runs as a subprocess and OpenCV releases the GIL
+        if self._page_pool is None:
+            self._page_pool = ThreadPoolExecutor(
+                max_workers=self.page_workers, thread_name_prefix="ocr-page"
+            )
+        return self._page_pool
+
+    def read_text_layer(self, file_path: str) -> TextLayer:
+        """The embedded text of every page, without rendering or OCR."""
+        page_texts = []
+        metrics = []
         try:
             with open(file_path, 'rb') as file:
                 pdf_reader = PyPDF2.PdfReader(file)
-                for page in pdf_reader.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
+                for number, page in enumerate(pdf_reader.pages, start=1):
+                    start_time = time.perf_counter()
+                    page_text = page.extract_text() or ""
+                    page_texts.append(page_text)
+                    seconds = round(time.perf_counter() - start_time, 4)
+                    metrics.append({
+                        'page': number, 'source': 'text', 'chars': len(page_text.strip()),
+                        'seconds': seconds, 'stages': {'text_layer': seconds}
+                    })
         except Exception as e:
             logger.warning(f"Direct PDF extraction failed: {e}")
+            page_count = pdfinfo_from_path(file_path)["Pages"]
+            page_texts = [""] * page_count
+            metrics = [
+                {'page': number, 'source': 'text', 'chars': 0, 'seconds': 0.0}
+                for number in range(1, page_count + 1)
+            ]
+        return TextLayer(page_texts, metrics)
 
-        # If little to no text found, use OCR instead
-        if len(text.strip()) < 100:
-            logger.info("Scanned PDF detected - switching to OCR")
-            text = self._ocr_pdf(file_path)
+    def has_text_layer(self, text_layer: TextLayer, page_number: int = 1) -> bool:
+        """Whether a page has enough embedded text to skip OCR."""
+        pages = text_layer.metrics
+        return page_number <= len(pages) and pages[page_number - 1]['chars'] >= self.min_page_chars
 
-        return text
+    def extract_text_from_pdf(self, file_path: str, page_metrics: Optional[List[dict]] = None,
+                              layout: Optional[List[WordBoxes]] = None,
+                              text_layer: Optional[TextLayer] = None) -> str:
+        """
+        Use the embedded text layer page by page and OCR only the pages
+        without usable text (scanned pages in a mixed packet).
+        Per-page decisions are appended to page_metrics when given, and word
+        boxes of the OCR'd pages to layout (text-layer pages have none).
+        Pass the read_text_layer() result when the caller already has it.
+        """
+        if text_layer is None:
+            text_layer = self.read_text_layer(file_path)
+        page_texts = list(text_layer.pages)
+        metrics = [dict(page) for page in text_layer.metrics]
 
-    def _ocr_pdf(self, file_path: str) -> str:
-        try:
-            images = convert_from_path(file_path, dpi=self.dpi)
-            text = ""
-
-            # Limit OCR to the first N pages (default 5)
-            max_pages = min(self.max_pages, len(images))
-            logger.info(f"OCR limited to first {max_pages} pages out of {len(images)}")
-
-            for i, image in enumerate(images[:max_pages]):
-                logger.info(f"OCR processing page {i+1}/{max_pages}")
-                cv_image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-                processed = self.processor.preprocess_image(cv_image)
-                page_text = pytesseract.image_to_string(
-                    processed, lang=self.lang, config='--psm 6 --oem 3'
+        scanned = [m['page'] for m in metrics if m['chars'] < self.min_page_chars]
+
+        # Limit OCR to the first N image-only pages (default 5)
+        to_ocr = scanned[:self.max_pages]
+        if to_ocr:
+            logger.info(f"OCR needed for {len(scanned)} of {len(page_texts)} pages, "
+                        f"processing {len(to_ocr)}")
+            results = self._ocr_pages(file_path, to_ocr, layout is not None)
+            for page_number, (page_text, seconds, timer, boxes) in zip(to_ocr, results):
+                page_texts[page_number - 1] = page_text
+                if boxes is not None:
+                    layout.append(boxes)
+                text_layer = metrics[page_number - 1].get('stages', {})
+                metrics[page_number - 1].update(
+                    source='ocr', chars=len(page_text.strip()), seconds=round(seconds, 4),
+                    stages={**text_layer, **timer.as_dict()}, **timer.details
                 )
-                text += page_text + "\n"
 
-            # Log skipped pages if any
-            if len(images) > max_pages:
-                skipped = len(images) - max_pages
-                logger.info(f"Skipped OCR for remaining {skipped} pages")
+        for page_number in scanned[self.max_pages:]:
+            metrics[page_number - 1]['source'] = 'skipped'
+        if len(scanned) > len(to_ocr):
+            logger.info(f"Skipped OCR for remaining {len(scanned) - len(to_ocr)} pages")
 
-            return text
+        if page_metrics is not None:
+            page_metrics.extend(metrics)
 
+        return "".join(page_text + "\n" for page_text in page_texts if page_text)
+
+    def _ocr_pages(self, file_path: str, page_numbers: List[int],
+                   with_layout: bool = False) -> List[Tuple[str, float, StageTimer, Optional[WordBoxes]]]:
+        """OCR the given PDF pages in parallel; returns (text, seconds, timer, boxes) in input order."""
+        try:
+            # Each task renders and OCRs a single page, so at most
+            # page_workers bitmaps are alive no matter how long the PDF is.
+            # map() keeps the results in page order.
+            return list(self._get_page_pool().map(
+                lambda page_number: self._ocr_page(file_path, page_number, with_layout),
+                page_numbers
+            ))
         except Exception as e:
             logger.error(f"OCR PDF failed: {e}")
             raise
 
-    def extract_text_from_image(self, file_path: str) -> str:
+    def _render_page(self, file_path: str, page_number: int, dpi: Optional[int] = None) -> np.ndarray:
+        """Rasterise one PDF page as a grayscale array (at OCR_DPI unless given)."""
+        images = convert_from_path(
+            file_path, dpi=dpi or self.dpi, first_page=page_number, last_page=page_number,
+            grayscale=True
+        )
         try:
-            processed = self.processor.enhance_for_ocr(file_path)
-            text = pytesseract.image_to_string(
-                processed, lang=self.lang, config='--psm 6 --oem 3'
-            )
-            return text
+            return np.array(images[0])
+        finally:
+            for image in images:
+                image.close()
+
+    def _ocr_page(self, file_path: str, page_number: int,
+                  with_layout: bool = False) -> Tuple[str, float, StageTimer, Optional[WordBoxes]]:
+        logger.info(f"OCR processing page {page_number}")
+        start_time = time.perf_counter()
+        timer = StageTimer()
+        with timer.stage('rasterize'):
+            page = self._render_page(file_path, page_number)
+        processed = self.processor.process_page(page, timer=timer)
+        del page
+        if with_layout:
+            boxes = self._ocr_image_layout(processed, timer, page_number)
+            text = boxes.to_text()
+        else:
+            boxes = None
+            text = self._ocr_image(processed, timer)
+        return text, time.perf_counter() - start_time, timer, boxes
+
+    def extract_text_from_image(self, file_path: str, timer: Optional[StageTimer] = None,
+                                layout: Optional[List[WordBoxes]] = None) -> str:
+        try:
+            processed = self.processor.enhance_for_ocr(file_path, timer)
+            return self._ocr_processed(processed, timer, layout)
+        except Exception as e:
+            logger.error(f"Image OCR failed: {e}")
+            raise
+
+    def extract_text_from_image_bytes(self, data: Union[bytes, memoryview],
+                                      timer: Optional[StageTimer] = None,
+                                      layout: Optional[List[WordBoxes]] = None) -> str:
+        try:
+            processed = self.processor.enhance_for_ocr_bytes(data, timer)
+            return self._ocr_processed(processed, timer, layout)
         except Exception as e:
             logger.error(f"Image OCR failed: {e}")
             raise
 
-    def extract_text(self, file_path: str, file_type: str) -> str:
+    def _ocr_processed(self, processed: np.ndarray, timer: Optional[StageTimer],
+                       layout: Optional[List[WordBoxes]]) -> str:
+        if layout is None:
+            return self._ocr_image(processed, timer)
+        boxes = self._ocr_image_layout(processed, timer)
+        layout.append(boxes)
+        return boxes.to_text()
+
+    def _ocr_image(self, processed: np.ndarray, timer: Optional[StageTimer] = None) -> str:
+        timer = timer or StageTimer()
+        with timer.stage('tesseract'):
+            return image_to_string(processed, lang=self.lang, config=self.tesseract_config)
+
+    def _ocr_image_layout(self, processed: np.ndarray, timer: Optional[StageTimer] = None,
+                          page_number: int = 1) -> WordBoxes:
+        """One tesseract run returning word boxes; the page text is rebuilt from them."""
+        timer = timer or StageTimer()
+        with timer.stage('tesseract'):
+            data = image_to_data(processed, lang=self.lang, config=self.tesseract_config,
+                                 output_type=Output.DICT)
+        return WordBoxes.from_tesseract(data, page=page_number)
+
+    def read_header(self, source: Union[str, bytes, memoryview], file_type: str,
+                    timer: Optional[StageTimer] = None) -> str:
+        """
+        Cheap first look at a scanned page 1 for carrier detection: OCR of the
+        top EARLY_DETECTION_HEADER of the page at EARLY_DETECTION_DPI.
+        """
+        timer = timer or StageTimer()
+        if file_type == '.pdf':
+            with timer.stage('rasterize'):
+                page = self._render_page(source, 1, dpi=settings.EARLY_DETECTION_DPI)
+            header = page[:max(1, round(page.shape[0] * settings.EARLY_DETECTION_HEADER))]
+        else:
+            with timer.stage('rasterize'):
+                page = self._load_page(source, file_type, 1)
+            header = page[:max(1, round(page.shape[0] * settings.EARLY_DETECTION_HEADER))]
+            # Images are assumed to be scanned at about OCR_DPI
+            scale = settings.EARLY_DETECTION_DPI / self.dpi
+            if scale < 1:
+                header = cv2.resize(header, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+        with timer.stage('binarize'):
+            _, header = cv2.threshold(header, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        with timer.stage('tesseract'):
+            return image_to_string(header, lang=self.lang, config=self.tesseract_config)
+
+    def extract_zones(self, source: Union[str, bytes, memoryview], file_type: str, template,
+                      page_metrics: Optional[List[dict]] = None) -> Optional[Dict[str, ZoneText]]:
+        """
+        OCR only the field zones of a ZoneTemplate, in parallel, from the
+        template's page of a file path (PDF or image) or in-memory image.
+        Returns None when that page doesn't exist.
+        """
+        start_time = time.perf_counter()
+        timer = StageTimer()
+        with timer.stage('rasterize'):
+            page = self._load_page(source, file_type, template.page)
+        if page is None:
+            return None
+
+        def read(box) -> ZoneText:
+            zone = prepare_zone(crop_zone(page, box))
+            data = image_to_data(zone, lang=self.lang, config=self.tesseract_config,
+                                 output_type=Output.DICT)
+            return zone_text(data)
+
+        with timer.stage('tesseract'):
+            results = dict(zip(template.fields, self._get_page_pool().map(read, template.fields.values())))
+
+        if page_metrics is not None:
+            page_metrics.append({
+                'page': template.page, 'source': 'zonal', 'form': template.form,
+                'zones': len(results), 'chars': sum(len(zone.text) for zone in results.values()),
+                'seconds': round(time.perf_counter() - start_time, 4), 'stages': timer.as_dict()
+            })
+        return results
+
+    def _load_page(self, source: Union[str, bytes, memoryview], file_type: str,
+                   page_number: int) -> Optional[np.ndarray]:
+        """One page as a grayscale array at the OCR resolution, or None if out of range."""
+        if file_type == '.pdf':
+            if page_number > pdfinfo_from_path(source)["Pages"]:
+                return None
+            return self._render_page(source, page_number)
+        if page_number != 1:
+            return None
+        if isinstance(source, str):
+            page = cv2.imread(source, cv2.IMREAD_GRAYSCALE)
+        else:
+            page = cv2.imdecode(np.frombuffer(source, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+        if page is None:
+            raise ValueError("Could not read image for zonal OCR")
+        return page
+
+    def _ocr_single_image(self, ocr: Callable[[StageTimer], str], page_metrics: List[dict]) -> str:
+        """OCR a standalone image, recording it as page 1."""
+        start_time = time.perf_counter()
+        timer = StageTimer()
+        text = ocr(timer)
+        page_metrics.append({
+            'page': 1, 'source': 'ocr', 'chars': len(text.strip()),
+            'seconds': round(time.perf_counter() - start_time, 4),
+            'stages': timer.as_dict(), **timer.details
+        })
+        return text
+
+    def extract_text(self, file_path: str, file_type: str,
+                     file_hash: Optional[str] = None, metrics: Optional[dict] = None,
+                     layout: Optional[List[WordBoxes]] = None, lookup: bool = True,
+                     text_layer: Optional[TextLayer] = None) -> str:
         """
         Automatically select extraction method based on file type.
+        Results are cached by content hash plus OCR settings, so a re-upload
+        of the same document skips OCR entirely.
+        Per-page details are recorded in metrics when a dict is passed.
+        Passing a layout list switches OCR to word boxes (appended per page);
+        the cache only holds text, so such calls always run OCR.
+        lookup=False skips the cache read (the caller already missed) but
+        still stores the result. A PDF's text_layer is reused when given.
         """
+        return self._extract_cached(
+            lambda: file_hash or file_sha256(file_path), file_type, metrics,
+            lambda page_metrics: self._extract_text(file_path, file_type, page_metrics, layout, text_layer),
+            layout, lookup
+        )
+
+    def extract_text_from_bytes(self, data: Union[bytes, memoryview], file_type: str,
+                                file_hash: Optional[str] = None,
+                                metrics: Optional[dict] = None,
+                                layout: Optional[List[WordBoxes]] = None, lookup: bool = True) -> str:
+        """
+        OCR an image held in memory (e.g. the upload buffer) without writing
+        it to disk. Only image types are supported; PDFs need a file for poppler.
+        """
+        if file_type not in IMAGE_EXTENSIONS:
+            raise ValueError(f"Unsupported in-memory file type: {file_type}")
+
+        return self._extract_cached(
+            lambda: file_hash or hashlib.sha256(data).hexdigest(), file_type, metrics,
+            lambda page_metrics: self._ocr_single_image(
+                lambda timer: self.extract_text_from_image_bytes(data, timer, layout), page_metrics
+            ),
+            layout, lookup
+        )
+
+    def _extract_cached(self, get_hash: Callable[[], str], file_type: str,
+                        metrics: Optional[dict], extract: Callable[[List[dict]], str],
+                        layout: Optional[List[WordBoxes]] = None, lookup: bool = True) -> str:
+        if metrics is None:
+            metrics = {}
+        metrics['pages'] = []
+        metrics['cache_hit'] = False
+
+        if self.cache.enabled:
+            file_hash = get_hash()
+            if lookup and layout is None:
+                text = self.cached_text(file_hash, file_type, metrics)
+                if text is not None:
+                    return text
+
+        text = extract(metrics['pages'])
+        metrics['stages'] = merge_stages(page.get('stages') for page in metrics['pages'])
+
+        if self.cache.enabled:
+            self.cache.put(self.cache_key(file_hash, file_type), text)
+        return text
+
+    def cached_text(self, file_hash: str, file_type: str, metrics: dict) -> Optional[str]:
+        """A document's cached OCR text, recording the hit in metrics; None on a miss."""
+        text = self.cache.get(self.cache_key(file_hash, file_type))
+        if text is not None:
+            logger.info("OCR cache hit")
+            metrics.update(pages=[], cache_hit=True, stages={})
+        return text
+
+    def cached_zones(self, file_hash: str, file_type: str) -> Optional[Dict[str, Any]]:
+        """
+        A document's cached zone reads as {'carrier', 'form', 'template', 'zones'},
+        or None on a miss. 'template' is the template_key() they were read with.
+        """
+        value = self.cache.get(self.zones_cache_key(file_hash, file_type))
+        if value is None:
+            return None
+        cached = json.loads(value)
+        cached['zones'] = {field: ZoneText(*zone) for field, zone in cached['zones'].items()}
+        return cached
+
+    def cache_zones(self, file_hash: str, file_type: str, carrier: str, template,
+                    zones: Dict[str, ZoneText]) -> None:
+        self.cache.put(self.zones_cache_key(file_hash, file_type), json.dumps({
+            'carrier': carrier, 'form': template.form, 'template': template_key(template),
+            'zones': {field: list(zone) for field, zone in zones.items()},
+        }))
+
+    def cache_key(self, file_hash: str, file_type: str) -> str:
+        return self.cache.make_key(
+            file_hash, file_type, self.dpi, self.lang, self.tesseract_config,
+            self.max_pages, self.min_page_chars, PREPROCESSING_VERSION, ",".join(settings.PAGE_STAGES),
+            settings.PREPROCESS_MODE, settings.PREPROCESS_NOISE_THRESHOLD,
+            settings.DESKEW_WORK_WIDTH, settings.DESKEW_MAX_ANGLE, settings.DESKEW_MIN_ANGLE
+        )
+
+    def zones_cache_key(self, file_hash: str, file_type: str) -> str:
+        return self.cache.make_key(file_hash, file_type, 'zones', self.dpi, self.lang,
+                                   self.tesseract_config, ZONAL_VERSION)
+
+    def _extract_text(self, file_path: str, file_type: str, page_metrics: List[dict],
+                      layout: Optional[List[WordBoxes]] = None,
+                      text_layer: Optional[TextLayer] = None) -> str:
         if file_type == '.pdf':
-            return self.extract_text_from_pdf(file_path)
-        elif file_type in ['.png', '.jpg', '.jpeg', '.tiff', '.bmp']:
-            return self.extract_text_from_image(file_path)
+            return self.extract_text_from_pdf(file_path, page_metrics, layout, text_layer)
+        elif file_type in IMAGE_EXTENSIONS:
+            return self._ocr_single_image(
+                lambda timer: self.extract_text_from_image(file_path, timer, layout), page_metrics
+            )
         else:
             raise ValueError(f"Unsupported file type: {file_type}")
@@ -0,0 +1,270 @@
+"""
+Static inspection of extractor/detector regexes: literals for cheap
+prefilters that don't change what the patterns match, and a backtracking
+risk check for patterns that can go super-linear on garbled OCR text.
+"""
+import re
+from typing import FrozenSet, List, Optional, Tuple
+
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+    from re import _constants as sre_constants
+except ImportError:  # pragma: no cover - older interpreters
+    import sre_parse
+    import sre_constants
+
+LITERAL = sre_constants.LITERAL
+SUBPATTERN = sre_constants.SUBPATTERN
+MAXREPEAT = sre_constants.MAXREPEAT
+BACKTRACKING_REPEATS = (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT)
+
+MIN_LITERAL_LENGTH = 3
+
+
+def _literal_runs(items, runs: List[str], current: List[str]) -> None:
+    for op, av in items:
+        if op is LITERAL:
+            current.append(chr(av))
+        elif op is SUBPATTERN and not av[1] and not av[2]:
+            # plain (possibly capturing) group: its contents are required
+            _literal_runs(av[3], runs, current)
+        else:
+            if current:
+                runs.append(''.join(current))
+                current.clear()
+
+
+def required_literal(pattern: str, flags: int = 0) -> Optional[str]:
+    """
+    Longest ASCII literal that any match of `pattern` must contain, lowercased,
+    or None when there is no usable one (alternation at the top level, only
+    character classes, too short, ...).
+    """
+    try:
+        parsed = sre_parse.parse(pattern, flags)
+    except re.error:
+        return None
+
+    runs: List[str] = []
+    current: List[str] = []
+    _literal_runs(parsed, runs, current)
+    if current:
+        runs.append(''.join(current))
+
+    runs = [run for run in runs if run.isascii() and len(run) >= MIN_LITERAL_LENGTH]
+    if not runs:
+        return None
+    return max(runs, key=len).lower()
+
+
+def _leading_run(items, prefix: List[str]) -> bool:
+    """Append the literal prefix of items to prefix; True if items are all literal."""
+    for op, av in items:
+        if op is LITERAL:
+            prefix.append(chr(av))
+        elif op is SUBPATTERN and not av[1] and not av[2]:
+            if not _leading_run(av[3], prefix):
+                return False
+        else:
+            return False
+    return True
+
+
+def leading_literal(pattern: str, flags: int = 0, min_length: int = 2) -> Optional[str]:
+    """
+    Lowercased ASCII literal that every match of `pattern` starts with, or None.
+    Under re.IGNORECASE a search can then only succeed at positions where this
+    literal occurs, which is what the anchored extraction relies on.
+    """
+    try:
+        parsed = sre_parse.parse(pattern, flags)
+    except re.error:
+        return None
+
+    prefix: List[str] = []
+    _leading_run(parsed, prefix)
+    literal = ''.join(prefix)
+    if len(literal) < min_length or not literal.isascii():
+        return None
+    return literal.lower()
+
+
+def is_plain_literal(pattern: str, flags: int = 0) -> bool:
+    """True when the pattern is nothing but a literal string."""
+    try:
+        parsed = sre_parse.parse(pattern, flags)
+    except re.error:
+        return False
+    return len(parsed) > 0 and all(op is LITERAL for op, _ in parsed)
+
+
+# --- backtracking risk -------------------------------------------------------
+#
+# Character sets are approximated over ASCII, which is enough to tell whether
+# two quantified pieces can consume the same characters.
+
+ASCII = frozenset(range(128))
+_CATEGORIES = {
+    sre_constants.CATEGORY_DIGIT: frozenset(range(48, 58)),
+    sre_constants.CATEGORY_SPACE: frozenset(b' \t\n\r\f\v'),
+    sre_constants.CATEGORY_WORD: frozenset(b'abcdefghijklmnopqrstuvwxyz'
+                                           b'ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_'),
+}
+_CATEGORIES[sre_constants.CATEGORY_NOT_DIGIT] = ASCII - _CATEGORIES[sre_constants.CATEGORY_DIGIT]
+_CATEGORIES[sre_constants.CATEGORY_NOT_SPACE] = ASCII - _CATEGORIES[sre_constants.CATEGORY_SPACE]
+_CATEGORIES[sre_constants.CATEGORY_NOT_WORD] = ASCII - _CATEGORIES[sre_constants.CATEGORY_WORD]
+
+# Three or more overlapping unbounded quantifiers in a row is at least cubic
+MAX_OVERLAP_CHAIN = 2
+
+
+def _with_case(codes, flags: int) -> FrozenSet[int]:
+    chars = set(code for code in codes if code < 128)
+    if flags & re.IGNORECASE:
+        for code in list(chars):
+            chars.add(ord(chr(code).lower()))
+            chars.add(ord(chr(code).upper()))
+    return frozenset(chars)
+
+
+def _single_char_set(op, av, flags: int) -> Optional[FrozenSet[int]]:
+    """Characters matched by a one-character item, or None for anything else."""
+    if op is LITERAL:
+        return _with_case([av], flags)
+    if op is sre_constants.NOT_LITERAL:
+        return ASCII - _with_case([av], flags)
+    if op is sre_constants.ANY:
+        return ASCII if flags & re.DOTALL else ASCII - {10}
+    if op is sre_constants.IN:
+        chars = set()
+        negate = False
+        for item_op, item_av in av:
+            if item_op is sre_constants.NEGATE:
+                negate = True
+            elif item_op is LITERAL:
+                chars |= _with_case([item_av], flags)
+            elif item_op is sre_constants.RANGE:
+                chars |= _with_case(range(item_av[0], item_av[1] + 1), flags)
+            elif item_op is sre_constants.CATEGORY:
+                chars |= _CATEGORIES.get(item_av, ASCII)
+            else:
+                chars |= ASCII
+        return ASCII - chars if negate else frozenset(chars)
+    return None
+
+
+def _edge_set(items, flags: int, last: bool = False) -> Tuple[FrozenSet[int], bool]:
+    """Possible first (or last) characters of a sequence, and whether it can be empty."""
+    result = set()
+    for op, av in (reversed(list(items)) if last else items):
+        chars, nullable = _item_edge_set(op, av, flags, last)
+        result |= chars
+        if not nullable:
+            return frozenset(result), False
+    return frozenset(result), True
+
+
+def _item_edge_set(op, av, flags: int, last: bool) -> Tuple[FrozenSet[int], bool]:
+    chars = _single_char_set(op, av, flags)
+    if chars is not None:
+        return chars, False
+    if op is SUBPATTERN:
+        return _edge_set(av[3], flags, last)
+    if op is sre_constants.BRANCH:
+        result, nullable = set(), False
+        for branch in av[1]:
+            branch_chars, branch_nullable = _edge_set(branch, flags, last)
+            result |= branch_chars
+            nullable = nullable or branch_nullable
+        return frozenset(result), nullable
+    if op in BACKTRACKING_REPEATS or op is sre_constants.POSSESSIVE_REPEAT:
+        body_chars, body_nullable = _edge_set(av[2], flags, last)
+        return body_chars, body_nullable or av[0] == 0
+    if op in (sre_constants.AT, sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+        return frozenset(), True
+    if op is sre_constants.ATOMIC_GROUP:
+        return _edge_set(av, flags, last)
+    return ASCII, True
+
+
+def _flatten(items):
+    """Sequence items with plain groups expanded in place."""
+    for op, av in items:
+        if op is SUBPATTERN and not av[1] and not av[2]:
+            yield from _flatten(av[3])
+        else:
+            yield op, av
+
+
+def _scan(items, flags: int, risks: List[str]) -> None:
+    chain: List[FrozenSet[int]] = []
+    longest = 0
+
+    for op, av in _flatten(items):
+        if op in BACKTRACKING_REPEATS:
+            min_count, max_count, body = av
+            if max_count == MAXREPEAT:
+                first, nullable = _edge_set(body, flags)
+                last, _ = _edge_set(body, flags, last=True)
+                low, high = body.getwidth()
+                if low != high and (nullable or first & last):
+                    risks.append("repeated variable-length group whose iterations can split "
+                                 "the same text several ways (exponential backtracking)")
+                for sub_op, sub_av in _flatten(body):
+                    if sub_op is sre_constants.BRANCH:
+                        firsts = [_edge_set(branch, flags)[0] for branch in sub_av[1]]
+                        if any(a & b for i, a in enumerate(firsts) for b in firsts[i + 1:]):
+                            risks.append("repeated alternation with overlapping "
+                                         "branches (exponential backtracking)")
+
+                chars = _single_char_set(*body[0], flags) if len(body) == 1 else None
+                if chars is not None:
+                    if chain and chain[-1] & chars:
+                        chain.append(chars)
+                    else:
+                        chain = [chars]
+                    longest = max(longest, len(chain))
+                    continue
+            elif min_count == 0:
+                _scan(body, flags, risks)
+                # An optional piece only links its neighbours into one chain when
+                # it can match their characters too: \s*:?\s* is two runs, not one
+                edges = _edge_set(body, flags)[0] | _edge_set(body, flags, last=True)[0]
+                if not (chain and chain[-1] & edges):
+                    chain = []
+                continue
+            _scan(body, flags, risks)
+            chain = []
+        elif op is SUBPATTERN:
+            _scan(av[3], flags, risks)
+            chain = []
+        elif op is sre_constants.BRANCH:
+            for branch in av[1]:
+                _scan(branch, flags, risks)
+            chain = []
+        elif op in (sre_constants.AT, sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+            continue
+        else:
+            chain = []
+
+    if longest > MAX_OVERLAP_CHAIN:
+        risks.append(f"{longest} adjacent unbounded quantifiers over overlapping "
+                     f"characters (polynomial backtracking, degree {longest})")
+
+
+def backtracking_risks(pattern: str, flags: int = 0) -> List[str]:
+    """
+    Reasons the pattern may backtrack super-linearly, empty if it looks safe.
+    Heuristic: flags ambiguous repeated groups such as (a|aa)+ or (x+x+)+ and runs of
+    three or more adjacent unbounded quantifiers that can consume the same
+    characters, like [A-Z\\s]+\\n?[A-Z\\s]+\\n?[A-Z]+. Optional pieces that can't
+    match their neighbours' characters break a run, so label patterns such
+    as Address\\s*:?\\s*(.+?) are not flagged.
+    """
+    try:
+        parsed = sre_parse.parse(pattern, flags)
+    except re.error:
+        return []
+    risks: List[str] = []
+    _scan(parsed, flags | parsed.state.flags, risks)
+    return list(dict.fromkeys(risks))
@@ -0,0 +1,365 @@
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, List, Optional, Tuple
+
+from config import settings
+from core.timing import StageTimer, merge_stages
+
+logger = logging.getLogger(__name__)
+
+# Per-process pipeline components, created lazily inside each worker
+_components = None
+
+
+def _get_components():
+    global _components
+    if _components is None:
+        from core.ocr_engine import OCREngine
+        from core.company_detector import CompanyDetector
+        from core.template_manager import TemplateManager
+        from core.validator import DataValidator
+
+        _components = (OCREngine(), CompanyDetector(), TemplateManager(), DataValidator())
+    return _components
+
+
+def _init_worker(tesseract_slots) -> None:
+    """Pool initializer: share the tesseract process cap across workers."""
+    # Don't reuse database connections inherited from the parent process
+    from models.database import engine
+    engine.dispose(close=False)
+
+    from core.tesseract import set_tesseract_slots
+    set_tesseract_slots(tesseract_slots)
+
+
+def process_document(file_path: str, file_ext: str, file_hash: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Run the OCR -> detect -> extract -> validate pipeline for one document.
+    Module-level so it can be pickled and executed in a worker process.
+    The OCR cache is checked first. On a miss a PDF's text layer is read
+    once; a scanned page 1 then has its header OCR'd cheaply to detect the
+    carrier. A form with a zonal template has only its zones OCR'd, and
+    everything else (or a low-confidence zonal read) goes through full OCR.
+    """
+    ocr_engine = _get_components()[0]
+
+    ocr_metrics = {}
+    file_hash = _content_hash(file_path, file_hash)
+    text_layer = None
+    result = _process_cached(file_path, file_ext, file_hash, ocr_metrics)
+    if result is None:
+        if file_ext == '.pdf':
+            text_layer = ocr_engine.read_text_layer(file_path)
+        result = _process_early(file_path, file_ext, ocr_metrics, file_hash, text_layer)
+    if result is not None:
+        return result
+
+    # Step 1: Extract text using OCR
+    layout = [] if settings.OCR_LAYOUT else None
+    text = ocr_engine.extract_text(file_path, file_ext, file_hash, metrics=ocr_metrics, layout=layout,
+                                   lookup=False, text_layer=text_layer)
+
+    return _process_text(text, ocr_metrics, layout)
+
+
+def process_document_bytes(data: bytes, file_ext: str, file_hash: Optional[str] = None) -> Dict[str, Any]:
+    """Same as process_document for an image held in memory."""
+    ocr_engine = _get_components()[0]
+
+    ocr_metrics = {}
+    file_hash = _content_hash(data, file_hash)
+    result = _process_cached(data, file_ext, file_hash, ocr_metrics)
+    if result is None:
+        result = _process_early(data, file_ext, ocr_metrics, file_hash)
+    if result is not None:
+        return result
+
+    # Step 1: Extract text using OCR, decoding straight from the buffer
+    layout = [] if settings.OCR_LAYOUT else None
+    text = ocr_engine.extract_text_from_bytes(data, file_ext, file_hash, metrics=ocr_metrics,
+                                              layout=layout, lookup=False)
+
+    return _process_text(text, ocr_metrics, layout)
+
+
+def _content_hash(source, file_hash: Optional[str]) -> Optional[str]:
+    """The document's SHA-256, computed once here when the OCR cache needs it and none was given."""
+    if file_hash or not _get_components()[0].cache.enabled:
+        return file_hash
+    if isinstance(source, str):
+        from core.ocr_cache import file_sha256
+        return file_sha256(source)
+    return hashlib.sha256(source).hexdigest()
+
+
+def _process_cached(source, file_ext: str, file_hash: Optional[str],
+                    ocr_metrics: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Result from the OCR cache, before any OCR runs: the document's zone reads
+    if it took the zonal path, else its full text. None on a miss.
+    """
+    from core.zonal_ocr import template_key
+
+    ocr_engine, _, template_manager, _ = _get_components()
+    if not file_hash:
+        return None
+
+    if settings.ZONAL_OCR_ENABLED:
+        cached = ocr_engine.cached_zones(file_hash, file_ext)
+        if cached is not None:
+            template = template_manager.get_zone_template(cached['carrier'], form=cached['form'])
+            # Reads made with an edited template are stale
+            if template is not None and template_key(template) == cached['template']:
+                logger.info("OCR cache hit (zones)")
+                ocr_metrics['zonal'] = {'form': template.form,
+                                        'confidence': {field: zone.confidence
+                                                       for field, zone in cached['zones'].items()}}
+                return _zonal_result(cached['carrier'], cached['zones'], [], ocr_metrics, cache_hit=True)
+
+    if settings.OCR_LAYOUT:  # the cache holds text only, not word boxes
+        return None
+    text = ocr_engine.cached_text(file_hash, file_ext, ocr_metrics)
+    if text is None:
+        return None
+    return _process_text(text, ocr_metrics)
+
+
+def _process_early(source, file_ext: str, ocr_metrics: Dict[str, Any], file_hash: Optional[str] = None,
+                   text_layer=None) -> Optional[Dict[str, Any]]:
+    """Pick the extraction strategy before full OCR; None means run full OCR."""
+    if not settings.ZONAL_OCR_ENABLED:
+        return None
+    carrier, template = _detect_early(source, file_ext, ocr_metrics, text_layer)
+    if template is None:
+        return None
+    return _process_zones(source, file_ext, carrier, template, ocr_metrics, file_hash)
+
+
+def _detect_early(source, file_ext: str, ocr_metrics: Dict[str, Any],
+                  text_layer=None) -> Tuple[Optional[str], Any]:
+    """
+    Detect the carrier from a low-DPI OCR of page 1's header and return
+    (carrier, zonal template), or (None, None) when the zonal path doesn't
+    apply. PDFs whose page 1 has a text layer keep the text path, which
+    needs no OCR, and skip the header read.
+    """
+    ocr_engine, company_detector, template_manager, _ = _get_components()
+    if not settings.EARLY_DETECTION_ENABLED or not template_manager.has_zone_templates():
+        return None, None
+    if text_layer is not None and ocr_engine.has_text_layer(text_layer):
+        return None, None
+
+    start_time = time.perf_counter()
+    timer = StageTimer()
+    try:
+        header = ocr_engine.read_header(source, file_ext, timer)
+    except Exception as e:
+        logger.warning(f"Early detection failed, using full OCR: {e}")
+        return None, None
+    company, confidence = company_detector.detect_company(header)
+    # Kept for the full path, which reuses a confident detection
+    ocr_metrics['detection'] = {
+        'company': company, 'confidence': round(confidence, 2),
+        'seconds': round(time.perf_counter() - start_time, 4), 'stages': timer.as_dict()
+    }
+
+    # The header holds only some of a carrier's detect patterns, so a form
+    # whose identify patterns matched is trusted below the usual threshold
+    template = template_manager.get_zone_template(company, header)
+    if template is None or not (template.identify or confidence >= 0.70):
+        return None, None
+    return company, template
+
+
+def _process_zones(source, file_ext: str, carrier: str, template, ocr_metrics: Dict[str, Any],
+                   file_hash: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Zonal path for a known carrier. Returns None, with the reason recorded
+    in ocr_metrics['zonal'], when the caller should run full OCR instead.
+    Confident zone reads are cached for re-uploads of the same document.
+    """
+    ocr_engine = _get_components()[0]
+
+    page_metrics = []
+    try:
+        zones = ocr_engine.extract_zones(source, file_ext, template, page_metrics)
+    except Exception as e:
+        logger.warning(f"Zonal OCR failed for {carrier}/{template.form}, using full OCR: {e}")
+        zones = None
+    if zones is None:
+        ocr_metrics['zonal'] = {'form': template.form, 'fallback': 'unavailable'}
+        return None
+
+    confidences = {field: zone.confidence for field, zone in zones.items()}
+    low = [field for field, confidence in confidences.items() if confidence < template.min_confidence]
+    ocr_metrics['zonal'] = {'form': template.form, 'confidence': confidences}
+    if low:
+        logger.info(f"Zonal OCR confidence too low for {carrier}/{template.form} "
+                    f"({', '.join(low)}), using full OCR")
+        ocr_metrics['zonal']['fallback'] = low
+        return None
+
+    if file_hash:
+        ocr_engine.cache_zones(file_hash, file_ext, carrier, template, zones)
+    return _zonal_result(carrier, zones, page_metrics, ocr_metrics)
+
+
+def _zonal_result(carrier: str, zones: Dict[str, Any], page_metrics: List[dict],
+                  ocr_metrics: Dict[str, Any], cache_hit: bool = False) -> Dict[str, Any]:
+    """
+    Extract and validate a record from zone reads alone; the rest of the
+    page is never OCR'd. Templates cover all of their carrier's fields.
+    """
+    _, _, template_manager, validator = _get_components()
+    extractor = template_manager.get_extractor(carrier, 1.0)
+    ocr_metrics.update(strategy='zonal', pages=page_metrics, cache_hit=cache_hit,
+                       stages=merge_stages([page.get('stages') for page in page_metrics]))
+    timer = StageTimer()
+    with timer.stage('extract_fields'):
+        extracted_data = extractor.extract_zones({field: zone.text for field, zone in zones.items()})
+    with timer.stage('validate'):
+        validation_results = validator.validate_all(extracted_data)
+        needs_review = validator.should_flag_for_review(extracted_data, validation_results)
+
+    return {
+        'extracted_data': extracted_data,
+        'validation_results': validation_results,
+        'needs_review': needs_review,
+        'ocr_metrics': ocr_metrics,
+        'stages': _document_stages(ocr_metrics, timer),
+    }
+
+
+def _process_text(text: str, ocr_metrics: Dict[str, Any],
+                  layout: Optional[List[Any]] = None) -> Dict[str, Any]:
+    from core.word_boxes import WordBoxes
+
+    _, company_detector, template_manager, validator = _get_components()
+    # Word boxes of the OCR'd pages; text-layer pages have none
+    boxes = WordBoxes.concat(layout) if layout else None
+    if boxes is not None:
+        ocr_metrics['layout_words'] = len(boxes)
+    if ocr_metrics.get('cache_hit'):
+        ocr_metrics['strategy'] = 'cache'
+    else:
+        pages = ocr_metrics.get('pages', [])
+        ocr_metrics['strategy'] = 'full' if any(page['source'] == 'ocr' for page in pages) else 'text'
+
+    timer = StageTimer()
+
+    # Step 2: Detect insurance company, unless the header read already did
+    detection = ocr_metrics.get('detection')
+    if detection and detection['confidence'] >= 0.70:
+        company_name, detection_confidence = detection['company'], detection['confidence']
+    else:
+        with timer.stage('detect_company'):
+            company_name, detection_confidence = company_detector.detect_company(text)
+
+    # Step 3: Get appropriate extractor
+    extractor = template_manager.get_extractor(company_name, detection_confidence)
+
+    # Step 4: Extract data
+    with timer.stage('extract_fields'):
+        extracted_data = extractor.extract(text, layout=boxes)
+
+    # Step 5: Validate extracted data
+    with timer.stage('validate'):
+        validation_results = validator.validate_all(extracted_data)
+
+        # Step 6: Determine if needs review
+        needs_review = validator.should_flag_for_review(extracted_data, validation_results)
+
+    return {
+        'extracted_data': extracted_data,
+        'validation_results': validation_results,
+        'needs_review': needs_review,
+        'ocr_metrics': ocr_metrics,
+        'stages': _document_stages(ocr_metrics, timer),
+    }
+
+
+def _document_stages(ocr_metrics: Dict[str, Any], timer: StageTimer) -> Dict[str, float]:
+    """OCR stages summed over pages, the early header read, and the text stages."""
+    detection = ocr_metrics.get('detection')
+    early = {'early_detection': detection['seconds']} if detection else {}
+    return merge_stages([ocr_metrics.get('stages'), early, timer.stages])
+
+
+class PipelineTimeout(Exception):
+    """Raised when a document exceeds PIPELINE_TIMEOUT."""
+
+
+class PipelineExecutor:
+    """Run the document pipeline in a process pool so the event loop stays free."""
+
+    def __init__(self, max_workers: Optional[int] = None, timeout: Optional[float] = None):
+        self.max_workers = max_workers or settings.PIPELINE_WORKERS or os.cpu_count() or 1
+        self.timeout = timeout if timeout is not None else settings.PIPELINE_TIMEOUT
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def start(self) -> None:
+        if self._pool is None:
+            logger.info(f"Starting pipeline pool with {self.max_workers} workers")
+            from core.tesseract import max_tesseract_procs
+            tesseract_slots = multiprocessing.BoundedSemaphore(max_tesseract_procs())
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=_init_worker,
+                initargs=(tesseract_slots,)
+            )
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            logger.info("Shutting down pipeline pool")
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    async def run(self, file_path: str, file_ext: str,
+                  file_hash: Optional[str] = None) -> Dict[str, Any]:
+        """Process a document stored on disk."""
+        return await self._submit(file_path, process_document, file_path, file_ext, file_hash)
+
+    async def run_bytes(self, data: bytes, file_ext: str,
+                        file_hash: Optional[str] = None) -> Dict[str, Any]:
+        """Process an image held in memory; it never touches UPLOAD_DIR."""
+        return await self._submit("<memory>", process_document_bytes, data, file_ext, file_hash)
+
+    async def _submit(self, label: str, func, *args) -> Dict[str, Any]:
+        """
+        Run func in the pool and await the result.
+        A timed-out job is abandoned by the caller; the worker finishes it in
+        the background because a single pool task cannot be killed.
+        """
+        self.start()
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._pool, func, *args)
+
+        try:
+            return await asyncio.wait_for(future, timeout=self.timeout or None)
+        except asyncio.TimeoutError:
+            logger.error(f"Pipeline timed out after {self.timeout}s: {label}")
+            raise PipelineTimeout(f"Processing exceeded {self.timeout} seconds")
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM); replace the pool so later jobs still run
+            logger.error("Pipeline worker crashed - restarting pool")
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+            self.start()
+            raise
+
+
+def build_message(needs_review: bool, validation_results: Dict[str, Any]) -> str:
+    """Human-readable summary for a processed document."""
+    message = "File processed successfully"
+    if needs_review:
+        message += " - Flagged for review"
+    if validation_results['warnings']:
+        message += f" ({len(validation_results['warnings'])} warnings)"
+    return message
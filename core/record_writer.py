@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from config import settings
+from models.database import SessionLocal, InsuranceRecord, RecordStageTiming
+
+logger = logging.getLogger(__name__)
+
+# A record with its stage timings and the perf_counter() its save started at, saved together
+PendingRecord = Tuple[InsuranceRecord, Dict[str, float], float]
+
+
+def write_records(records: List[PendingRecord],
+                  session_factory: Callable[[], Session] = SessionLocal) -> List[int]:
+    """
+    Insert records and their stage timings in one transaction; returns their
+    ids. Each record's stages get a db_commit entry, stored with the others:
+    the time from its save to its insert, i.e. the wait for its batch plus
+    the insert, but not the COMMIT the timing rows themselves are part of.
+    """
+    db = session_factory()
+    try:
+        db.add_all([record for record, _, _ in records])
+        db.flush()
+        inserted = time.perf_counter()
+        ids = [record.id for record, _, _ in records]
+        for record_id, (_, stages, started) in zip(ids, records):
+            stages['db_commit'] = round(inserted - started, 4)
+            db.add_all(RecordStageTiming.for_record(record_id, stages))
+        db.commit()
+        return ids
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+class RecordWriter:
+    """
+    Write-behind batching for InsuranceRecord inserts. save() queues a record
+    and returns its id once the transaction holding it has committed. A batch
+    is written when it reaches `max_batch` records or `max_delay` seconds after
+    its first one, and only one batch is written at a time, so records that
+    arrive during a commit go into the next one instead of each waiting for
+    an fsync of its own; under load that grouping happens even with no delay.
+    If a batch fails, its records are retried one per transaction so a bad
+    record only fails its own save().
+    """
+
+    def __init__(self, max_batch: Optional[int] = None, max_delay: Optional[float] = None,
+                 session_factory: Callable[[], Session] = SessionLocal):
+        self.max_batch = max_batch or settings.DB_WRITE_BATCH_SIZE
+        self.max_delay = max_delay if max_delay is not None else settings.DB_WRITE_BATCH_DELAY
+        self.session_factory = session_factory
+        self._pending: List[Tuple[PendingRecord, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._writing: Optional[asyncio.Task] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def save(self, record: InsuranceRecord, stages: Optional[Dict[str, float]] = None) -> int:
+        """Queue a record; `stages` gains its db_commit timing (see write_records)."""
+        pending = (record, {} if stages is None else stages, time.perf_counter())
+        if self.max_batch <= 1:
+            return (await asyncio.to_thread(write_records, [pending], self.session_factory))[0]
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((pending, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._flush)
+        return await future
+
+    async def close(self) -> None:
+        """Write whatever is queued and wait for it to commit."""
+        self._flush()
+        while self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending or self._writing is not None:
+            return  # the running write picks the queue up when it finishes
+
+        batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+        self._writing = asyncio.create_task(self._write(batch))
+        self._tasks.add(self._writing)
+        self._writing.add_done_callback(self._written)
+
+    def _written(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        self._writing = None
+        if len(self._pending) >= self.max_batch or (self._pending and self._timer is None):
+            self._flush()
+
+    async def _write(self, batch: list) -> None:
+        records = [pending for pending, _ in batch]
+        try:
+            ids = await asyncio.to_thread(write_records, records, self.session_factory)
+        except Exception as e:
+            if len(batch) == 1:
+                _settle(batch[0][1], error=e)
+                return
+            logger.error(f"Batch insert of {len(batch)} records failed, retrying one by one: {e}")
+            for pending, future in batch:
+                try:
+                    record_id = (await asyncio.to_thread(
+                        write_records, [pending], self.session_factory
+                    ))[0]
+                except Exception as e:
+                    _settle(future, error=e)
+                else:
+                    _settle(future, record_id)
+            return
+
+        for (_, future), record_id in zip(batch, ids):
+            _settle(future, record_id)
+
+
+def _settle(future: asyncio.Future, record_id: Optional[int] = None,
+            error: Optional[BaseException] = None) -> None:
+    if future.done():  # the caller was cancelled; the record is saved regardless
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(record_id)
@@ -1,51 +1,22 @@
 from extractors.base_extractor import BaseExtractor
-from extractors.state_farm_extractor import StateFarmExtractor
-from extractors.allstate_extractor import AllstateExtractor
-from extractors.progressive_extractor import ProgressiveExtractor
-from extractors.usaa_extractor import USAAExtractor
-from extractors.nationwide_extractor import NationwideExtractor
-from extractors.travelers_extractor import TravelersExtractor
-from extractors.liberty_mutual_extractor import LibertyMutualExtractor
-from extractors.farmers_extractor import FarmersExtractor
-from extractors.geico_extractor import GEICOExtractor
-from extractors.american_family_extractor import AmericanFamilyExtractor
-from extractors.erie_extractor import ErieExtractor
-from extractors.amica_extractor import AmicaExtractor
-from extractors.csaa_extractor import CSAAExtractor
-from extractors.chubb_extractor import ChubbExtractor
-from extractors.hartford_extractor import HartfordExtractor
-from extractors.country_financial_extractor import CountryFinancialExtractor
-from extractors.lemonade_extractor import LemonadeExtractor
-from extractors.hanover_extractor import HanoverExtractor
-from extractors.generic_extractor import GenericExtractor
+from extractors.registry_extractor import RegistryExtractor
+from core.carrier_registry import GENERIC, ZoneTemplate, registry
+from typing import Dict, Optional
 import logging
+import re
 
 logger = logging.getLogger(__name__)
 
 class TemplateManager:
-    """Route extraction to appropriate company-specific extractor."""
+    """Route extraction to the carrier's patterns from the carrier registry."""
     
-    EXTRACTOR_MAP = {
-        'state_farm': StateFarmExtractor,
-        'allstate': AllstateExtractor,
-        'progressive': ProgressiveExtractor,
-        'usaa': USAAExtractor,
-        'nationwide': NationwideExtractor,
-        'travelers': TravelersExtractor,
-        'liberty_mutual': LibertyMutualExtractor,
-        'farmers': FarmersExtractor,
-        'geico': GEICOExtractor,
-        'american_family': AmericanFamilyExtractor,
-        'erie': ErieExtractor,
-        'amica': AmicaExtractor,
-        'csaa': CSAAExtractor,
-        'chubb': ChubbExtractor,
-        'hartford': HartfordExtractor,
-        'country_financial': CountryFinancialExtractor,
-        'lemonade': LemonadeExtractor,
-        'hanover': HanoverExtractor,
-        'generic': GenericExtractor,
-    }
+    # One shared extractor per carrier, rebuilt when the registry reloads
+    _extractors: Dict[str, BaseExtractor] = {}
+    _registry_version = 0
+    
+    @staticmethod
+    def supported_companies() -> list:
+        return [key for key in registry.carriers if key != GENERIC]
     
     @staticmethod
     def get_extractor(company_name: str, confidence: float) -> BaseExtractor:
@@ -54,11 +25,46 @@ class TemplateManager:
         Falls back to generic if confidence < 70% or company not found.
         """
         # Use company-specific extractor if high confidence
-        if confidence >= 0.70 and company_name in TemplateManager.EXTRACTOR_MAP:
-            extractor_class = TemplateManager.EXTRACTOR_MAP[company_name]
+        if confidence >= 0.70 and registry.get(company_name) is not None:
             logger.info(f"Using {company_name} extractor (confidence: {confidence:.2f})")
-            return extractor_class()
+            return TemplateManager._shared_extractor(company_name)
         
         # Fallback to generic extractor
         logger.info(f"Using generic extractor (company: {company_name}, confidence: {confidence:.2f})")
-        return GenericExtractor()
\ No newline at end of file
+        return TemplateManager._shared_extractor(GENERIC)
+    
+    @staticmethod
+    def has_zone_templates() -> bool:
+        return any(carrier.zones for carrier in registry.carriers.values())
+    
+    @staticmethod
+    def get_zone_template(company_name: str, text: Optional[str] = None,
+                          form: Optional[str] = None) -> Optional[ZoneTemplate]:
+        """
+        First zonal template of the carrier whose identify patterns all match
+        `text`, or the one named `form`. Without either, the first template
+        is assumed.
+        """
+        carrier = registry.get(company_name)
+        if carrier is None or company_name == GENERIC:
+            return None
+        for template in carrier.zones:
+            if form is not None:
+                if template.form == form:
+                    return template
+            elif text is None or all(re.search(pattern, text, re.IGNORECASE)
+                                   for pattern in template.identify):
+                return template
+        return None
+    
+    @staticmethod
+    def _shared_extractor(key: str) -> BaseExtractor:
+        if registry.version != TemplateManager._registry_version:
+            TemplateManager._extractors = {}
+            TemplateManager._registry_version = registry.version
+        
+        extractor = TemplateManager._extractors.get(key)
+        if extractor is None:
+            extractor = RegistryExtractor(registry.get(key) or registry.generic)
+            TemplateManager._extractors[key] = extractor
+        return extractor
@@ -0,0 +1,47 @@
+import os
+import threading
+
+import pytesseract
+
+from config import settings
+
+
+def max_tesseract_procs() -> int:
+    """
+    OCR_MAX_TESSERACT_PROCS, or one per CPU core when 0. Every pipeline
+    worker OCRs OCR_PAGE_WORKERS pages at once, so without a cap a pool of
+    one worker per core would run several tesseracts per core.
+    """
+    return settings.OCR_MAX_TESSERACT_PROCS or os.cpu_count() or 1
+
+
+# Caps concurrent tesseract processes. The pipeline pool replaces this with a
+# multiprocessing semaphore shared by every worker process.
+_tesseract_slots = threading.BoundedSemaphore(max_tesseract_procs())
+
+
+def set_tesseract_slots(semaphore) -> None:
+    global _tesseract_slots
+    _tesseract_slots = semaphore
+
+
+def _slot():
+    return _tesseract_slots
+
+
+def image_to_string(image, **kwargs) -> str:
+    """pytesseract.image_to_string bounded by the tesseract process cap."""
+    with _slot():
+        return pytesseract.image_to_string(image, **kwargs)
+
+
+def image_to_osd(image, **kwargs):
+    """pytesseract.image_to_osd bounded by the tesseract process cap."""
+    with _slot():
+        return pytesseract.image_to_osd(image, **kwargs)
+
+
+def image_to_data(image, **kwargs):
+    """pytesseract.image_to_data bounded by the tesseract process cap."""
+    with _slot():
+        return pytesseract.image_to_data(image, **kwargs)
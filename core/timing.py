@@ -0,0 +1,34 @@
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Iterable, Optional
+
+
+class StageTimer:
+    """
+    Accumulates wall-clock seconds per named stage.
+    Not thread-safe: use one timer per page/task and merge the results.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self.details: Dict[str, Any] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def as_dict(self) -> Dict[str, float]:
+        return {name: round(seconds, 4) for name, seconds in self.stages.items()}
+
+
+def merge_stages(stage_dicts: Iterable[Optional[Dict[str, float]]]) -> Dict[str, float]:
+    """Sum several stage-timing dicts into one."""
+    merged: Dict[str, float] = {}
+    for stages in stage_dicts:
+        for name, seconds in (stages or {}).items():
+            merged[name] = merged.get(name, 0.0) + seconds
+    return {name: round(seconds, 4) for name, seconds in merged.items()}
@@ -0,0 +1,84 @@
+import hashlib
+import logging
+import os
+import uuid
+from pathlib import Path
+from typing import NamedTuple, Optional, Tuple
+
+import aiofiles
+from fastapi import UploadFile
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds MAX_FILE_SIZE while streaming."""
+
+
+class StoredUpload(NamedTuple):
+    path: Path
+    size: int
+    sha256: str
+
+
+def unique_upload_path(suffix: str, dest_dir: Optional[str] = None, name: Optional[str] = None) -> Path:
+    """Collision-free path in the upload directory; never derived from the client filename."""
+    return Path(dest_dir or settings.UPLOAD_DIR) / f"{name or uuid.uuid4().hex}{suffix}"
+
+
+async def save_upload(file: UploadFile, path: Path, max_size: Optional[int] = None) -> StoredUpload:
+    """
+    Stream an upload to disk in chunks without blocking the event loop.
+    The size limit is enforced as bytes arrive and the SHA-256 is computed
+    on the way through. Data goes to a .part file that is renamed into place
+    only once complete, so readers never see a partial upload.
+    """
+    max_size = max_size or settings.MAX_FILE_SIZE
+    part_path = path.with_name(path.name + ".part")
+    digest = hashlib.sha256()
+    size = 0
+
+    try:
+        async with aiofiles.open(part_path, 'wb') as out:
+            while True:
+                chunk = await file.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadTooLarge(
+                        f"File too large. Max size: {max_size / 1024 / 1024}MB"
+                    )
+                digest.update(chunk)
+                await out.write(chunk)
+        os.replace(part_path, path)
+    except BaseException:
+        if part_path.exists():
+            part_path.unlink()
+        raise
+
+    return StoredUpload(path=path, size=size, sha256=digest.hexdigest())
+
+
+async def read_upload(file: UploadFile, max_size: Optional[int] = None) -> Tuple[bytes, str]:
+    """Read a small upload into memory, enforcing the size limit and hashing as it goes."""
+    max_size = max_size or settings.MAX_FILE_SIZE
+    digest = hashlib.sha256()
+    chunks = []
+    size = 0
+
+    while True:
+        chunk = await file.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > max_size:
+            raise UploadTooLarge(f"File too large. Max size: {max_size / 1024 / 1024}MB")
+        digest.update(chunk)
+        chunks.append(chunk)
+
+    return b"".join(chunks), digest.hexdigest()
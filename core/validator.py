@@ -250,6 +250,12 @@ class DataValidator:
                 f"Missing required fields: {', '.join(missing_fields)}"
             )
         
+        # Fields abandoned because their patterns ran out of time
+        if data.get('low_confidence_fields'):
+            validation_results['warnings'].append(
+                f"Extraction timed out for: {', '.join(data['low_confidence_fields'])}"
+            )
+        
         # Overall confidence check
         if data.get('confidence_score', 0) < 50:
             validation_results['warnings'].append(
@@ -274,6 +280,10 @@ class DataValidator:
         if data.get('confidence_score', 0) < 70:
             return True
         
+        # Flag if any field extraction was abandoned
+        if data.get('low_confidence_fields'):
+            return True
+        
         # Flag if multiple warnings
         if len(validation_results['warnings']) >= 3:
             return True
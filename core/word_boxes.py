@@ -0,0 +1,178 @@
+import re
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from core.literal_scanner import fold_case
+
+# tesseract TSV level for individual words
+WORD_LEVEL = 5
+
+
+class LayoutValue(NamedTuple):
+    text: str
+    confidence: float  # mean tesseract word confidence, 0-100
+    left: int
+    top: int
+    right: int
+    bottom: int
+
+
+class WordBoxes:
+    """
+    Word-level OCR output for one or more pages, stored column-wise: one NumPy
+    array per attribute and all words in a single newline-joined string, so a
+    page of a few thousand words costs a handful of allocations instead of a
+    dict per word. Coordinates are pixels at the OCR resolution.
+    """
+
+    __slots__ = ('text', 'offsets', 'page', 'line', 'left', 'top', 'width', 'height',
+                 'conf', '_folded')
+
+    def __init__(self, words: Sequence[str], page, line, left, top, width, height, conf):
+        self.text = "\n".join(words)
+        lengths = np.fromiter((len(word) + 1 for word in words), dtype=np.int32, count=len(words))
+        self.offsets = np.concatenate(([0], np.cumsum(lengths))).astype(np.int32)
+        self.page = np.asarray(page, dtype=np.int16)
+        self.line = np.asarray(line, dtype=np.int32)  # unique per (page, block, par, line)
+        self.left = np.asarray(left, dtype=np.int32)
+        self.top = np.asarray(top, dtype=np.int32)
+        self.width = np.asarray(width, dtype=np.int32)
+        self.height = np.asarray(height, dtype=np.int32)
+        self.conf = np.asarray(conf, dtype=np.float32)
+        self._folded: Optional[str] = None
+
+    @classmethod
+    def from_tesseract(cls, data: Dict[str, list], page: int = 1) -> "WordBoxes":
+        """Build from pytesseract.image_to_data(..., output_type=Output.DICT)."""
+        level = np.asarray(data['level'], dtype=np.int16)
+        words = [str(word).strip() for word in data['text']]
+        keep = np.flatnonzero((level == WORD_LEVEL) & np.fromiter(
+            (bool(word) for word in words), dtype=bool, count=len(words)
+        ))
+
+        line_keys = (np.asarray(data['block_num'], dtype=np.int64) * 1_000_000
+                     + np.asarray(data['par_num'], dtype=np.int64) * 1_000
+                     + np.asarray(data['line_num'], dtype=np.int64))[keep]
+        _, line_ids = np.unique(line_keys, return_inverse=True)
+
+        return cls(
+            [words[i] for i in keep],
+            page=np.full(len(keep), page),
+            line=line_ids,
+            left=np.asarray(data['left'])[keep],
+            top=np.asarray(data['top'])[keep],
+            width=np.asarray(data['width'])[keep],
+            height=np.asarray(data['height'])[keep],
+            conf=np.asarray(data['conf'], dtype=np.float32)[keep],
+        )
+
+    @classmethod
+    def concat(cls, parts: List["WordBoxes"]) -> "WordBoxes":
+        """Join per-page boxes into one document, keeping line ids unique."""
+        words: List[str] = []
+        lines = []
+        line_base = 0
+        for part in parts:
+            words.extend(part.words())
+            lines.append(part.line + line_base)
+            line_base += int(part.line.max()) + 1 if len(part) else 0
+
+        def column(name):
+            arrays = [getattr(part, name) for part in parts]
+            return np.concatenate(arrays) if arrays else np.empty(0)
+
+        return cls(
+            words, page=column('page'), line=np.concatenate(lines) if lines else np.empty(0),
+            left=column('left'), top=column('top'), width=column('width'),
+            height=column('height'), conf=column('conf'),
+        )
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def word(self, index: int) -> str:
+        return self.text[self.offsets[index]:self.offsets[index + 1] - 1]
+
+    def words(self) -> List[str]:
+        return self.text.split("\n") if len(self) else []
+
+    def to_text(self) -> str:
+        """Plain text in reading order, one OCR line per text line."""
+        words = self.words()
+        lines: List[str] = []
+        current: List[str] = []
+        for index, word in enumerate(words):
+            if index and (self.line[index] != self.line[index - 1]
+                          or self.page[index] != self.page[index - 1]):
+                lines.append(" ".join(current))
+                current = []
+            current.append(word)
+        if current:
+            lines.append(" ".join(current))
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def find_label(self, label: str) -> Optional[int]:
+        """
+        Index of the last word of the first occurrence of `label` (case-insensitive,
+        trailing colon allowed) whose words all sit on one OCR line, or None.
+        """
+        tokens = fold_case(label).split()
+        if not tokens:
+            return None
+        if self._folded is None:
+            self._folded = fold_case(self.text)
+
+        needle = re.compile(
+            r'(?:^|(?<=\n))' + r'\n'.join(re.escape(token) for token in tokens) + r':?(?=\n|$)'
+        )
+        for match in needle.finditer(self._folded):
+            first = int(np.searchsorted(self.offsets, match.start(), side='right')) - 1
+            last = first + len(tokens) - 1
+            if self.line[first] == self.line[last] and self.page[first] == self.page[last]:
+                return last
+        return None
+
+    def right_of(self, label: str, max_gap: float = 2.5,
+                 max_words: Optional[int] = None) -> Optional[LayoutValue]:
+        """
+        Words to the right of `label` on the same visual row (vertical centre
+        within the label's box, any OCR block). The nearest word starts the
+        value however far across the page it is, as in two-column forms; the
+        value then runs left to right until a gap wider than `max_gap` word
+        heights.
+        """
+        anchor = self.find_label(label)
+        if anchor is None:
+            return None
+
+        label_right = self.left[anchor] + self.width[anchor]
+        top, bottom = self.top[anchor], self.top[anchor] + self.height[anchor]
+        centre = self.top + self.height / 2
+        candidates = np.flatnonzero(
+            (self.page == self.page[anchor]) & (self.left >= label_right)
+            & (centre >= top) & (centre <= bottom)
+        )
+        if not len(candidates):
+            return None
+        candidates = candidates[np.argsort(self.left[candidates], kind='stable')]
+
+        gap_limit = max_gap * max(int(self.height[anchor]), 1)
+        selected = [candidates[0]]
+        for index in candidates[1:]:
+            previous = selected[-1]
+            if self.left[index] - (self.left[previous] + self.width[previous]) > gap_limit:
+                break
+            if max_words is not None and len(selected) >= max_words:
+                break
+            selected.append(index)
+
+        selected = np.asarray(selected)
+        return LayoutValue(
+            text=" ".join(self.word(i) for i in selected),
+            confidence=round(float(self.conf[selected].mean()), 2),
+            left=int(self.left[selected].min()),
+            top=int(self.top[selected].min()),
+            right=int((self.left[selected] + self.width[selected]).max()),
+            bottom=int((self.top[selected] + self.height[selected]).max()),
+        )
@@ -0,0 +1,68 @@
+import hashlib
+from typing import Dict, List, NamedTuple, Tuple
+
+import cv2
+import numpy as np
+
+# Zones are cut with a little slack around the template box (fraction of the
+# page) so a slightly shifted scan still contains the whole value
+ZONE_PADDING = 0.004
+# Crops shorter than this are upscaled; tesseract reads small text poorly
+ZONE_MIN_HEIGHT = 48
+ZONE_BORDER = 10
+# Bump when zone cropping or preparation changes, to invalidate cached zone reads
+ZONAL_VERSION = 1
+
+
+class ZoneText(NamedTuple):
+    text: str
+    confidence: float  # mean tesseract word confidence, 0 when nothing was read
+
+
+def template_key(template) -> str:
+    """Identifies a ZoneTemplate's exact contents, so reads made with an edited template aren't reused."""
+    return hashlib.sha256(repr(tuple(template)).encode('utf-8')).hexdigest()
+
+
+def crop_zone(page: np.ndarray, box: Tuple[float, float, float, float],
+              padding: float = ZONE_PADDING) -> np.ndarray:
+    """Cut a normalised (x, y, width, height) box out of a page array."""
+    height, width = page.shape[:2]
+    x, y, w, h = box
+    left = max(0, round((x - padding) * width))
+    top = max(0, round((y - padding) * height))
+    right = min(width, round((x + w + padding) * width))
+    bottom = min(height, round((y + h + padding) * height))
+    return page[top:bottom, left:right]
+
+
+def prepare_zone(crop: np.ndarray) -> np.ndarray:
+    """Grayscale, upscale small crops, binarise and add a white margin."""
+    if len(crop.shape) == 3:
+        crop = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+    if 0 < crop.shape[0] < ZONE_MIN_HEIGHT:
+        scale = ZONE_MIN_HEIGHT / crop.shape[0]
+        crop = cv2.resize(crop, None, fx=scale, fy=scale, interpolation=cv2.INTER_CUBIC)
+    _, crop = cv2.threshold(crop, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    return cv2.copyMakeBorder(crop, ZONE_BORDER, ZONE_BORDER, ZONE_BORDER, ZONE_BORDER,
+                              cv2.BORDER_CONSTANT, value=255)
+
+
+def zone_text(data: Dict[str, list]) -> ZoneText:
+    """Text and mean word confidence from image_to_data(..., output_type=Output.DICT)."""
+    lines: Dict[Tuple[int, int, int], List[str]] = {}
+    confidences = []
+    for block, par, line, word, conf in zip(data['block_num'], data['par_num'], data['line_num'],
+                                            data['text'], data['conf']):
+        word = str(word).strip()
+        if not word or float(conf) < 0:
+            continue
+        lines.setdefault((block, par, line), []).append(word)
+        confidences.append(float(conf))
+
+    text = " ".join(" ".join(words) for words in lines.values())
+    # Stray brackets and quotes at the zone edges are box lines and ticks, not text
+    text = text.strip(" |()[]'\"’‘:;")
+    if not text:
+        return ZoneText("", 0.0)
+    return ZoneText(text, round(float(np.mean(confidences)), 2))
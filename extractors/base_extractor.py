@@ -1,44 +1,191 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Any, List, NamedTuple, Optional, Pattern
 import re
+import time
 import logging
 
+from config import settings
+from core.literal_scanner import AnchorIndex
+from core.pattern_analysis import leading_literal
+from core.word_boxes import WordBoxes
+
+try:
+    import regex as timed_re  # supports a per-call timeout
+except ImportError:  # optional: without it patterns run unguarded
+    timed_re = None
+
 logger = logging.getLogger(__name__)
 
+FIELD_FLAGS = re.IGNORECASE | re.MULTILINE
+
+
+class FieldTimeout(Exception):
+    """A field's patterns used up EXTRACTION_FIELD_TIMEOUT."""
+
+
+class FieldPattern(NamedTuple):
+    pattern: str
+    regex: Pattern
+    anchor: Optional[str]  # literal every match starts with, if any
+    guarded: bool  # compiled with the regex module and run under the field budget
+
+
+CompiledPatterns = Dict[str, List[FieldPattern]]
+
 class BaseExtractor(ABC):
+    """
+    Extractors are shared between requests and must stay stateless apart from
+    the compiled-pattern table, which is built once on first use.
+    """
+    
     def __init__(self):
         self.company_name = "Unknown"
+        self._compiled: Optional[CompiledPatterns] = None
     
     @abstractmethod
     def get_patterns(self) -> Dict[str, list]:
         pass
     
-    def extract(self, text: str) -> Dict[str, Any]:
-        patterns = self.get_patterns()
+    def get_labels(self) -> Dict[str, List[str]]:
+        """Printed labels per field, read from OCR word boxes when available."""
+        return {}
+    
+    def compiled_patterns(self) -> CompiledPatterns:
+        """get_patterns() compiled once: field -> [FieldPattern] in priority order."""
+        if self._compiled is None:
+            compiled = {}
+            for field, pattern_list in self.get_patterns().items():
+                compiled[field] = []
+                for pattern in pattern_list:
+                    try:
+                        compiled[field].append(self._compile(pattern))
+                    except (re.error, ValueError) as e:
+                        logger.warning(f"Pattern error: {e}")
+            self._compiled = compiled
+        return self._compiled
+    
+    @staticmethod
+    def _compile(pattern: str) -> FieldPattern:
+        """
+        Every pattern gets the regex module so it can time out: the static
+        analyser only catches known shapes of runaway backtracking.
+        """
+        anchor = leading_literal(pattern, FIELD_FLAGS)
+        guard = timed_re is not None and settings.EXTRACTION_FIELD_TIMEOUT > 0
+        if guard:
+            compiled = timed_re.compile(pattern, timed_re.IGNORECASE | timed_re.MULTILINE)
+        else:
+            compiled = re.compile(pattern, FIELD_FLAGS)
+        return FieldPattern(pattern, compiled, anchor, guard)
+    
+    def extract(self, text: str, layout: Optional[WordBoxes] = None) -> Dict[str, Any]:
+        """
+        With word boxes, a field's labels are tried first (value to the right
+        of the label); its regex patterns run on the text if none is found.
+        """
         data = {}
+        anchors = AnchorIndex(text)
+        low_confidence = []
+        compiled = self.compiled_patterns()
+        labels = self.get_labels() if layout is not None else {}
         
-        for field, pattern_list in patterns.items():
-            data[field] = self._extract_field(text, pattern_list)
+        for field in dict.fromkeys([*compiled, *labels]):
+            value = self._extract_by_label(field, labels.get(field, []), layout)
+            if value is not None:
+                data[field] = value
+                continue
+            try:
+                data[field] = self._extract_field(text, compiled.get(field, []), anchors)
+            except FieldTimeout:
+                logger.warning(f"{self.company_name}: {field} abandoned after "
+                               f"{settings.EXTRACTION_FIELD_TIMEOUT}s of pattern matching")
+                data[field] = None
+                low_confidence.append(field)
         
+        data['low_confidence_fields'] = low_confidence
         data['detected_company'] = self.company_name
         data['confidence_score'] = self._calculate_confidence(data)
         data['raw_text_preview'] = text[:500]
         
         return data
     
-    def _extract_field(self, text: str, patterns: list) -> Any:
-        for pattern in patterns:
+    def extract_zones(self, zones: Dict[str, str]) -> Dict[str, Any]:
+        """
+        Same result shape as extract(), from zonal OCR text per field.
+        Confidence is scored over the carrier's complete field set, so a
+        field without a zone counts as missing.
+        """
+        data = dict.fromkeys([*self.compiled_patterns(), *self.get_labels()])
+        for field, text in zones.items():
+            value = ' '.join(text.split())
+            data[field] = self._format_value(field, value) if value else None
+        
+        data['low_confidence_fields'] = []
+        data['detected_company'] = self.company_name
+        data['confidence_score'] = self._calculate_confidence(data)
+        data['raw_text_preview'] = "\n".join(zones.values())[:500]
+        
+        return data
+    
+    def _extract_field(self, text: str, patterns: List[FieldPattern],
+                       anchors: Optional[AnchorIndex] = None) -> Any:
+        """
+        First pattern that yields a value wins. A field's patterns share one
+        EXTRACTION_FIELD_TIMEOUT budget; running out raises FieldTimeout.
+        """
+        deadline = time.monotonic() + settings.EXTRACTION_FIELD_TIMEOUT
+        for pattern, regex, anchor, guarded in patterns:
             try:
-                match = re.search(pattern, text, re.IGNORECASE | re.MULTILINE)
+                if anchor is not None and anchors is not None:
+                    match = self._match_at_anchors(
+                        text, regex, anchors.positions(anchor), deadline if guarded else None
+                    )
+                elif guarded:
+                    match = regex.search(text, timeout=self._remaining(deadline))
+                else:
+                    match = regex.search(text)
                 if match:
                     value = match.group(1).strip()
                     value = ' '.join(value.split())
                     return self._format_value(pattern, value)
+            except (TimeoutError, FieldTimeout):
+                raise FieldTimeout(pattern)
             except Exception as e:
                 logger.warning(f"Pattern error: {e}")
                 continue
         return None
     
+    def _extract_by_label(self, field: str, labels: List[str],
+                          layout: Optional[WordBoxes]) -> Optional[str]:
+        for label in labels:
+            found = layout.right_of(label)
+            if found is not None:
+                return self._format_value(field, found.text)
+        return None
+    
+    @staticmethod
+    def _remaining(deadline: float) -> float:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise FieldTimeout()
+        return remaining
+    
+    @staticmethod
+    def _match_at_anchors(text: str, regex: Pattern, positions: List[int],
+                          deadline: Optional[float] = None):
+        """
+        Leftmost match, trying only where the pattern's leading literal occurs.
+        Same result as regex.search(text): no match can start anywhere else.
+        """
+        for pos in positions:
+            if deadline is None:
+                match = regex.match(text, pos)
+            else:
+                match = regex.match(text, pos, timeout=BaseExtractor._remaining(deadline))
+            if match:
+                return match
+        return None
+    
     def _format_value(self, pattern: str, value: str) -> str:
         if any(word in pattern.lower() for word in ['premium', 'coverage', 'liability', 'deductible', 'amount']):
             if not value.startswith('$') and value[0].isdigit():
@@ -51,7 +198,7 @@ class BaseExtractor(ABC):
         Fixed to ensure result never exceeds 100.
         """
         # Fields to exclude from calculation
-        exclude = ['detected_company', 'confidence_score', 'raw_text_preview']
+        exclude = ['detected_company', 'confidence_score', 'raw_text_preview', 'low_confidence_fields']
         
         # Get all data fields (excluding metadata)
         data_fields = {k: v for k, v in data.items() if k not in exclude}
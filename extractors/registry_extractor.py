@@ -0,0 +1,20 @@
+from typing import Dict, List
+
+from core.carrier_registry import Carrier
+from extractors.base_extractor import BaseExtractor
+
+
+class RegistryExtractor(BaseExtractor):
+    """Field patterns for one carrier, taken from the carrier registry."""
+    
+    def __init__(self, carrier: Carrier):
+        super().__init__()
+        self.company_name = carrier.name
+        self.patterns = carrier.fields
+        self.labels = carrier.labels
+    
+    def get_patterns(self) -> Dict[str, List[str]]:
+        return self.patterns
+    
+    def get_labels(self) -> Dict[str, List[str]]:
+        return self.labels
@@ -1,11 +1,55 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Text
+from sqlalchemy import create_engine, event, inspect, text, Column, Integer, String, Float, DateTime, Text
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
+import json
+from typing import Optional
 from config import settings
 
 Base = declarative_base()
-engine = create_engine(settings.DATABASE_URL)
+
+
+def create_db_engine(url: Optional[str] = None) -> Engine:
+    """
+    Engine for DATABASE_URL tuned from settings. SQLite connections get the
+    SQLITE_* pragmas that are set; server databases (PostgreSQL) get the
+    DB_POOL_* sizing. The journal mode is left alone unless configured: WAL
+    persists in the database file, and the models open DATABASE_URL on import.
+    """
+    url = make_url(url or settings.DATABASE_URL)
+    if url.get_backend_name() != 'sqlite':
+        return create_engine(
+            url,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_pre_ping=True,
+        )
+    
+    engine = create_engine(url, connect_args={'check_same_thread': False})
+    in_memory = url.database in (None, '', ':memory:')
+    
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        if not in_memory:
+            if settings.SQLITE_JOURNAL_MODE:
+                cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+            if settings.SQLITE_MMAP_SIZE:
+                cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+        if settings.SQLITE_SYNCHRONOUS:
+            cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT * 1000)}")
+        if settings.SQLITE_CACHE_SIZE:
+            cursor.execute(f"PRAGMA cache_size={-int(settings.SQLITE_CACHE_SIZE // 1024)}")
+        cursor.close()
+    
+    return engine
+
+
+engine = create_db_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 class InsuranceRecord(Base):
@@ -52,5 +96,127 @@ class InsuranceRecord(Base):
             'processing_time': self.processing_time,
             'needs_review': self.needs_review,
         }
+    
+    @classmethod
+    def from_extraction(cls, filename: str, extracted_data: dict,
+                        processing_time: float, needs_review: bool) -> "InsuranceRecord":
+        """Build a record from extractor output."""
+        return cls(
+            filename=filename,
+            policy_number=extracted_data.get('policy_number'),
+            policyholder_name=extracted_data.get('policyholder_name'),
+            property_address=extracted_data.get('property_address'),
+            coverage_amount=extracted_data.get('coverage_amount'),
+            liability_coverage=extracted_data.get('liability_coverage'),
+            deductible=extracted_data.get('deductible'),
+            effective_date=extracted_data.get('effective_date'),
+            expiration_date=extracted_data.get('expiration_date'),
+            premium_amount=extracted_data.get('premium_amount'),
+            insurance_company=extracted_data.get('insurance_company'),
+            detected_company=extracted_data.get('detected_company'),
+            confidence_score=extracted_data.get('confidence_score'),
+            raw_text=extracted_data.get('raw_text_preview'),
+            processing_time=processing_time,
+            needs_review=1 if needs_review else 0
+        )
+
+class RecordStageTiming(Base):
+    """Seconds per processing stage of one record, for finding slow documents."""
+    __tablename__ = "record_stage_timings"
+    
+    id = Column(Integer, primary_key=True)
+    record_id = Column(Integer, nullable=False, index=True)
+    stage = Column(String(50), nullable=False)
+    seconds = Column(Float, nullable=False)
+    
+    @classmethod
+    def for_record(cls, record_id: int, stages: dict) -> list:
+        return [cls(record_id=record_id, stage=stage, seconds=seconds)
+                for stage, seconds in stages.items()]
+
+class ProcessingJob(Base):
+    """Queued document processing job."""
+    __tablename__ = "processing_jobs"
+    
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    
+    DOCUMENT = "document"
+    ARCHIVE = "archive"  # expanded into one document job per entry
+    
+    id = Column(String(36), primary_key=True)
+    batch_id = Column(String(36), index=True)
+    kind = Column(String(20), default=DOCUMENT)
+    filename = Column(String(255), nullable=False)
+    file_path = Column(Text)
+    file_ext = Column(String(10))
+    file_hash = Column(String(64))  # SHA-256 computed while the upload was stored
+    upload_seconds = Column(Float)  # upload_write stage, saved with the record's stage timings
+    status = Column(String(20), default=QUEUED, index=True)
+    attempts = Column(Integer, default=0)
+    error = Column(Text)
+    record_id = Column(Integer)
+    result = Column(Text)  # JSON-encoded upload response
+    
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    heartbeat_at = Column(DateTime)  # refreshed by the consumer while the job runs
+    finished_at = Column(DateTime)
+    
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'batch_id': self.batch_id,
+            'kind': self.kind or self.DOCUMENT,
+            'filename': self.filename,
+            'status': self.status,
+            'attempts': self.attempts,
+            'error': self.error,
+            'record_id': self.record_id,
+            'result': json.loads(self.result) if self.result else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+class OCRCacheEntry(Base):
+    """OCR text keyed by file content hash and OCR settings."""
+    __tablename__ = "ocr_cache"
+    
+    key = Column(String(64), primary_key=True)
+    text = Column(Text, nullable=False)
+    size = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_accessed_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+class OCRCacheStats(Base):
+    """Single-row hit/miss counters shared by every worker process."""
+    __tablename__ = "ocr_cache_stats"
+    
+    id = Column(Integer, primary_key=True)
+    hits = Column(Integer, default=0, nullable=False)
+    misses = Column(Integer, default=0, nullable=False)
+    evictions = Column(Integer, default=0, nullable=False)
+
+def add_missing_columns(bind: Engine) -> None:
+    """
+    create_all() skips tables that already exist, so columns added to a model
+    since its table was created are added here (nullable, no default).
+    """
+    inspector = inspect(bind)
+    with bind.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    connection.execute(text(
+                        f"ALTER TABLE {table.name} ADD COLUMN {column.name} "
+                        f"{column.type.compile(bind.dialect)}"
+                    ))
 
 Base.metadata.create_all(bind=engine)
+add_missing_columns(engine)
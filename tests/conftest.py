@@ -0,0 +1,38 @@
+import os
+
+import pytest
+
+# models.database creates its tables on import; keep the tracked insurance.db
+# (and any DATABASE_URL from the environment or .env) out of the tests
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    """Sessions on a scratch SQLite file with every table created."""
+    from sqlalchemy.orm import sessionmaker
+    from models.database import Base, create_db_engine
+
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def api(monkeypatch, session_factory, tmp_path):
+    """TestClient for the API router on a scratch database and upload directory."""
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from api import routes
+
+    uploads = tmp_path / 'uploads'
+    uploads.mkdir()
+    monkeypatch.setattr('config.settings.UPLOAD_DIR', str(uploads))
+    for module in ('api.routes', 'core.job_queue'):
+        monkeypatch.setattr(f'{module}.SessionLocal', session_factory)
+    monkeypatch.setattr(routes.record_writer, 'session_factory', session_factory)
+    app = FastAPI()
+    app.include_router(routes.router, prefix="/api")
+    with TestClient(app) as client:
+        yield client
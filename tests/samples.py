@@ -0,0 +1,75 @@
+"""Declarations text, tesseract output and PDFs shared by several test modules."""
+
+import io
+
+STATE_FARM = """State Farm Insurance
+Like a good neighbor, State Farm is there
+Policy Number: SF-1234567
+Named Insured: John Smith
+Property Address: 123 Main Street Apt 4, Austin, TX 78701
+Personal Property: $25,000
+Personal Liability: $100,000
+Deductible: $500
+Effective Date: 01/01/2025
+Expiration Date: 01/01/2026
+Total Premium: $180.00
+"""
+
+NATIONWIDE = """NATIONWIDE MUTUAL INSURANCE COMPANY
+TENANT CUSTOMER NOTICE
+Issued By: NATIONWIDE GENERAL INSURANCE COMPANY   Issued: SEP 12, 2024
+Policyholder: (Named Insured) JANE Q PUBLIC
+Policy Number: 
+78 42 HS 027914
+Policy Period From: OCT 04, 2024 to OCT 04, 2025
+Residence Premises
+12345 OAK HOLLOW DR APT 210
+AUSTIN TX 78759-1234
+COVERAGE-C-PERSONAL PROPERTY $30,000
+COVERAGE-E-PERSONAL LIABILITY EACH OCCURRENCE $300,000
+Deductible: $1,000 ALL OTHER PERILS
+Annual Renewal Premium $214.50
+NATIONWIDE 24-HOUR CLAIM REPORTING 1-800-421-3535
+"""
+
+
+def tesseract_data(rows):
+    """image_to_data DICT output for (block, line, left, top, width, text) words."""
+    data = {key: [] for key in ('level', 'block_num', 'par_num', 'line_num', 'left', 'top',
+                                'width', 'height', 'conf', 'text')}
+    data['level'].append(1)  # page row, as tesseract emits
+    for key in data:
+        if key != 'level':
+            data[key].append('' if key == 'text' else 0)
+    for block, line, left, top, width, text in rows:
+        for key, value in zip(('level', 'block_num', 'par_num', 'line_num', 'left', 'top',
+                               'width', 'height', 'conf', 'text'),
+                              (5, block, 1, line, left, top, width, 30, 91.0, text)):
+            data[key].append(value)
+    return data
+
+
+def make_pdf(pages: list) -> bytes:
+    """A PDF with one page per item: a line of embedded text, or None for an image-only page."""
+    objects = ['<< /Type /Catalog /Pages 2 0 R >>', None,
+               '<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>']
+    kids = []
+    for text in pages:
+        content = f'BT /F1 12 Tf 72 720 Td ({text}) Tj ET' if text else ''
+        objects.append(f'<< /Length {len(content)} >>\nstream\n{content}\nendstream')
+        objects.append(f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] '
+                       f'/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>')
+        kids.append(f'{len(objects)} 0 R')
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = io.BytesIO()
+    out.write(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(f'{number} 0 obj\n{body}\nendobj\n'.encode())
+    xref = out.tell()
+    out.write(f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'.encode())
+    out.write(''.join(f'{offset:010d} 00000 n \n' for offset in offsets).encode())
+    out.write(f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode())
+    return out.getvalue()
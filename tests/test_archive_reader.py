@@ -0,0 +1,109 @@
+import asyncio
+import io
+import tarfile
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from api import routes
+from core import archive_reader
+from core.archive_reader import archive_suffix, check_entry, extract_entries, list_entries
+from core.upload_writer import UploadTooLarge
+from models.database import ProcessingJob
+
+
+def make_zip(path: Path, files: dict) -> Path:
+    with zipfile.ZipFile(path, 'w') as archive:
+        for name, data in files.items():
+            archive.writestr(name, data)
+    return path
+
+
+@pytest.mark.parametrize('kind', ['zip', 'tar.gz'])
+def test_archive_entries_are_streamed(kind, tmp_path, monkeypatch):
+    monkeypatch.setattr('config.settings.UPLOAD_DIR', str(tmp_path))
+    monkeypatch.setattr('config.settings.MAX_FILE_SIZE', 1000)
+    files = {'certs/a.pdf': b'%PDF a', 'certs/b.PNG': b'png', 'notes.txt': b'x',
+             'big.pdf': b'0' * 1001, '__MACOSX/certs/._a.pdf': b'x', 'certs/.DS_Store': b'x'}
+    path = tmp_path / f'batch.{kind}'
+    if kind == 'zip':
+        make_zip(path, files)
+    else:
+        with tarfile.open(path, 'w:gz') as archive:
+            for name, data in files.items():
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                archive.addfile(info, io.BytesIO(data))
+
+    assert archive_suffix(path.name) == f'.{kind}'
+    entries = list_entries(path)
+    assert [entry.name for entry in entries] == ['certs/a.pdf', 'certs/b.PNG', 'notes.txt', 'big.pdf']
+    assert [bool(check_entry(entry)) for entry in entries] == [False, False, True, True]
+
+    stored = {}
+    for index, entry, upload, error in extract_entries(path):
+        assert error is None
+        stored[index, entry.name] = upload.path.read_bytes()
+        upload.path.unlink()
+    assert stored == {(0, 'certs/a.pdf'): b'%PDF a', (1, 'certs/b.PNG'): b'png'}
+    assert sorted(p.name for p in tmp_path.iterdir()) == [path.name]
+
+    # The caller names each entry's file, or skips it (e.g. already queued)
+    skipped = [(index, entry.name) for index, entry, _, _ in
+               extract_entries(path, destination=lambda index, entry: tmp_path / f'{index}{entry.file_ext}'
+                               if index else None)]
+    assert skipped == [(1, 'certs/b.PNG')]
+    assert (tmp_path / '1.png').read_bytes() == b'png'
+
+
+def test_archive_endpoint_queues_entry_jobs(api, tmp_path, monkeypatch):
+    uploads = tmp_path / 'uploads'
+    archive = make_zip(tmp_path / 'certs.zip', {'a.pdf': b'%PDF a', 'b.png': b'png', 'c.pdf': b'%PDF c',
+                                                 'notes.txt': b'x'})
+    copy_entry = archive_reader._copy_entry
+
+    def fail_c(source, path, max_size):
+        if source.name == 'c.pdf':  # e.g. larger than its header declared
+            raise UploadTooLarge("File too large. Max size: 0.0MB")
+        return copy_entry(source, path, max_size)
+
+    monkeypatch.setattr(archive_reader, '_copy_entry', fail_c)
+    monkeypatch.setattr('config.settings.ARCHIVE_PREFETCH', 10)  # no consumers run here
+
+    response = api.post('/api/jobs/archive', files={'file': ('certs.zip', archive.read_bytes())})
+    assert response.status_code == 202
+    body = response.json()
+    batch_id = body['batch_id']
+    assert (body['total'], body['queued'], body['rejected']) == (4, 3, 1)
+    assert body['errors'][0]['filename'] == 'notes.txt'
+
+    # The archive is stored as a durable job until the queue expands it
+    archive_job = api.get(f'/api/jobs/{batch_id}').json()
+    assert (archive_job['kind'], archive_job['status']) == (ProcessingJob.ARCHIVE, ProcessingJob.QUEUED)
+    assert [p.name for p in uploads.iterdir()] == [f'{batch_id}.zip']
+
+    asyncio.run(routes.job_queue.expand_archive(batch_id))
+
+    jobs = {job['filename']: job for job in api.get('/api/jobs', params={'batch_id': batch_id}).json()}
+    assert {name: job['status'] for name, job in jobs.items()} == {
+        'certs.zip': ProcessingJob.COMPLETED, 'a.pdf': ProcessingJob.QUEUED,
+        'b.png': ProcessingJob.QUEUED, 'c.pdf': ProcessingJob.FAILED,
+    }
+    assert jobs['c.pdf']['error'].startswith('File too large')
+    assert jobs['c.pdf']['attempts'] == 0
+    assert jobs['certs.zip']['result'] == {'batch_id': batch_id, 'queued': 2, 'failed': 1}
+    # Only the queued documents are left; the archive itself is gone
+    assert sorted(p.suffix for p in uploads.iterdir()) == ['.pdf', '.png']
+
+
+@pytest.mark.parametrize('filename, data, detail', [
+    ('certs.rar', b'Rar!', 'Invalid archive type'),
+    ('certs.zip', b'not a zip', 'Cannot read archive'),
+])
+def test_archive_endpoint_rejects_unusable_archives(api, tmp_path, filename, data, detail):
+    response = api.post('/api/jobs/archive', files={'file': (filename, data)})
+    assert response.status_code == 400
+    assert response.json()['detail'].startswith(detail)
+    assert list((tmp_path / 'uploads').iterdir()) == []
+    assert api.get('/api/jobs').json() == []
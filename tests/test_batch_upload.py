@@ -0,0 +1,118 @@
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+
+from api import routes
+
+RESULT = {
+    'extracted_data': {'policy_number': 'SF-1234567', 'detected_company': 'State Farm',
+                       'confidence_score': 100.0},
+    'validation_results': {'is_valid': True, 'errors': [], 'warnings': []},
+    'needs_review': False,
+    'stages': {'extract_fields': 0.01},
+}
+
+
+@pytest.fixture
+def batch_pipeline(monkeypatch):
+    """
+    A pipeline that takes as many seconds as the stored upload's contents
+    say, fails on 'fail', and records how many documents it ran at once.
+    """
+    state = {'running': 0, 'most': 0, 'paths': []}
+
+    async def run(file_path, file_ext, file_hash=None):
+        state['paths'].append(Path(file_path))
+        state['running'] += 1
+        state['most'] = max(state['most'], state['running'])
+        try:
+            content = Path(file_path).read_text()
+            if content == 'fail':
+                raise RuntimeError('unreadable scan')
+            await asyncio.sleep(float(content))
+            return RESULT
+        finally:
+            state['running'] -= 1
+
+    monkeypatch.setattr(routes.pipeline, 'run', run)
+    return state
+
+
+def batch(api, files: dict, **kwargs):
+    response = api.post('/api/batch-upload', files=[('files', (name, data)) for name, data in files.items()],
+                        **kwargs)
+    assert response.status_code == 200
+    return response
+
+
+def test_results_stream_in_completion_order(api, batch_pipeline, monkeypatch):
+    monkeypatch.setattr('config.settings.BATCH_CONCURRENCY', 3)
+    response = batch(api, {'slow.pdf': b'0.3', 'fast.pdf': b'0', 'middle.pdf': b'0.15'})
+    assert response.headers['content-type'] == 'application/x-ndjson'
+
+    *results, summary = [json.loads(line) for line in response.text.splitlines()]
+    assert [(item['index'], item['filename']) for item in results] == \
+        [(1, 'fast.pdf'), (2, 'middle.pdf'), (0, 'slow.pdf')]
+    assert all(item['success'] and item['record_id'] for item in results)
+    assert summary == {'total': 3, 'successful': 3, 'failed': 0}
+
+
+def test_server_sent_events(api, batch_pipeline):
+    response = batch(api, {'a.pdf': b'0', 'b.pdf': b'0'}, headers={'Accept': 'text/event-stream'})
+    assert response.headers['content-type'].startswith('text/event-stream')
+
+    events = response.text.split('\n\n')
+    assert events.pop() == ''  # every event ends with a blank line
+    assert [event.split('\n')[0] for event in events] == ['event: result'] * 2 + ['event: summary']
+    assert all(event.split('\n')[1].startswith('data: ') for event in events)
+    assert json.loads(events[-1].split('\n')[1][len('data: '):]) == \
+        {'total': 2, 'successful': 2, 'failed': 0}
+
+
+def test_concurrency_is_capped(api, batch_pipeline, monkeypatch):
+    monkeypatch.setattr('config.settings.BATCH_CONCURRENCY', 2)
+    response = batch(api, {f'doc-{i}.pdf': b'0.05' for i in range(6)})
+    assert json.loads(response.text.splitlines()[-1])['successful'] == 6
+    assert batch_pipeline['most'] == 2
+
+
+def test_failing_files_do_not_stop_the_batch(api, batch_pipeline):
+    response = batch(api, {'bad.pdf': b'fail', 'notes.txt': b'0', 'good.pdf': b'0'})
+    items = [json.loads(line) for line in response.text.splitlines()]
+    by_name = {item['filename']: item for item in items[:-1]}
+
+    assert by_name['bad.pdf'] == {'index': 0, 'filename': 'bad.pdf', 'success': False,
+                                  'error': 'unreadable scan'}
+    assert not by_name['notes.txt']['success']
+    assert by_name['notes.txt']['error'].startswith('Invalid file type')
+    assert by_name['good.pdf']['success']
+    assert items[-1] == {'total': 3, 'successful': 1, 'failed': 2}
+
+
+def test_uploads_are_removed(api, batch_pipeline, tmp_path):
+    batch(api, {'a.pdf': b'0', 'b.pdf': b'fail', 'c.png': b'0'})
+    # Stored on disk while processed, even the small image, and gone afterwards
+    assert len(batch_pipeline['paths']) == 3
+    assert all(path.parent == tmp_path / 'uploads' for path in batch_pipeline['paths'])
+    assert list((tmp_path / 'uploads').iterdir()) == []
+
+
+def test_client_leaving_cancels_the_rest(api, batch_pipeline, tmp_path, monkeypatch):
+    monkeypatch.setattr('config.settings.BATCH_CONCURRENCY', 3)
+    received = []
+    for index, seconds in enumerate(['0', '30', '30']):
+        path = tmp_path / 'uploads' / f'{index}.pdf'
+        path.write_text(seconds)
+        received.append((index, path.name, routes.ReceivedUpload(path.name, '.pdf', None, path, 'hash', {})))
+
+    async def read_one():
+        stream = routes._stream_batch(received, sse=False)
+        first = json.loads(await stream.__anext__())
+        await stream.aclose()
+        return first
+
+    assert asyncio.run(read_one())['index'] == 0
+    assert batch_pipeline['running'] == 0
+    assert list((tmp_path / 'uploads').iterdir()) == []
@@ -0,0 +1,114 @@
+import logging
+import os
+
+import pytest
+
+from core.carrier_registry import CarrierRegistry, CarrierRegistryError
+from core.template_manager import TemplateManager
+
+REGISTRY = """
+carriers:
+  acme:
+    name: 'Acme Mutual'
+    detect: ['Acme\\s*Mutual']
+    fields:
+      policy_number: ['Policy\\s*#?\\s*(AC-\\d+)']
+  generic:
+    fields:
+      policy_number: ['Policy\\s*(?:Number|No\\.?)\\s*:?\\s*([A-Z0-9-]+)']
+"""
+
+
+@pytest.fixture
+def registry_file(tmp_path):
+    path = tmp_path / 'carriers.yaml'
+    path.write_text(REGISTRY)
+    return path
+
+
+@pytest.fixture
+def carrier_registry(registry_file):
+    # Any interval above zero, but short enough that every access re-checks the file
+    carrier_registry = CarrierRegistry(str(registry_file), reload_interval=1e-9)
+    carrier_registry.load()
+    return carrier_registry
+
+
+def edit(path, old: str, new: str) -> None:
+    path.write_text(path.read_text().replace(old, new))
+
+
+def test_load(carrier_registry):
+    assert carrier_registry.version == 1
+    assert set(carrier_registry.carriers) == {'acme', 'generic'}
+    assert carrier_registry.get('acme').name == 'Acme Mutual'
+    assert carrier_registry.get('missing') is None
+
+
+def test_changed_file_is_reloaded(carrier_registry, registry_file):
+    carrier_registry.refresh()
+    assert carrier_registry.version == 1  # unchanged file, nothing re-read
+
+    edit(registry_file, 'Acme Mutual', 'Acme Mutual Insurance')
+    assert carrier_registry.get('acme').name == 'Acme Mutual Insurance'
+    assert carrier_registry.version == 2
+
+    # Same size, newer mtime
+    edit(registry_file, 'Acme Mutual Insurance', 'Acme Mutual Assurance')
+    stat = registry_file.stat()
+    os.utime(registry_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert carrier_registry.get('acme').name == 'Acme Mutual Assurance'
+    assert carrier_registry.version == 3
+
+
+def test_reload_waits_for_the_interval(registry_file):
+    carrier_registry = CarrierRegistry(str(registry_file), reload_interval=3600)
+    carrier_registry.load()
+    edit(registry_file, 'Acme Mutual', 'Acme Mutual Insurance')
+    assert carrier_registry.get('acme').name == 'Acme Mutual'
+
+    never = CarrierRegistry(str(registry_file), reload_interval=0)
+    never.load()
+    edit(registry_file, 'Acme Mutual Insurance', 'Acme')
+    assert never.get('acme').name == 'Acme Mutual Insurance'
+
+
+@pytest.mark.parametrize('broken', [
+    'carriers: [unclosed',  # not YAML
+    'carriers: {}',  # no generic fallback
+    REGISTRY.replace("(AC-\\d+)", "(AC-\\d+"),  # bad pattern
+])
+def test_broken_edit_keeps_previous_version(carrier_registry, registry_file, caplog, broken):
+    registry_file.write_text(broken)
+    with caplog.at_level(logging.ERROR, logger='core.carrier_registry'):
+        assert carrier_registry.get('acme').name == 'Acme Mutual'
+        carrier_registry.refresh()
+    assert carrier_registry.version == 1
+    # Logged once, not on every check until the file changes again
+    assert len(caplog.records) == 1
+    assert 'keeping previous version' in caplog.records[0].getMessage()
+
+    registry_file.write_text(REGISTRY.replace('Acme Mutual', 'Acme Fixed'))
+    assert carrier_registry.get('acme').name == 'Acme Fixed'
+    assert carrier_registry.version == 2
+
+
+def test_missing_file_fails_the_first_load(tmp_path):
+    with pytest.raises(CarrierRegistryError):
+        CarrierRegistry(str(tmp_path / 'missing.yaml')).load()
+
+
+def test_template_manager_rebuilds_extractors_on_reload(carrier_registry, registry_file, monkeypatch):
+    monkeypatch.setattr('core.template_manager.registry', carrier_registry)
+    monkeypatch.setattr(TemplateManager, '_extractors', {})
+    monkeypatch.setattr(TemplateManager, '_registry_version', 0)
+
+    extractor = TemplateManager.get_extractor('acme', 0.95)
+    assert TemplateManager.get_extractor('acme', 0.95) is extractor
+    assert extractor.extract('Policy # AC-123')['policy_number'] == 'AC-123'
+
+    edit(registry_file, "(AC-\\d+)", "(AC-\\d+-[A-Z])")
+    rebuilt = TemplateManager.get_extractor('acme', 0.95)
+    assert rebuilt is not extractor
+    assert rebuilt.extract('Policy # AC-123-X')['policy_number'] == 'AC-123-X'
+    assert TemplateManager.get_extractor('acme', 0.95) is rebuilt
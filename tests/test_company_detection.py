@@ -0,0 +1,84 @@
+import random
+import re
+
+import pytest
+
+from core.company_detector import CompanyDetector
+from core.literal_scanner import LiteralScanner, fold_case
+from core.pattern_analysis import required_literal
+
+
+def legacy_detect_company(text):
+    """The original per-pattern re.search loop, kept as the reference."""
+    text_sample = text[:2000]
+    best_match = ('generic', 0.0)
+    for company, data in CompanyDetector.COMPANY_PATTERNS.items():
+        match_count = 0
+        for pattern in data['patterns']:
+            if re.search(pattern, text_sample, re.IGNORECASE):
+                match_count += 1
+        if match_count > 0:
+            confidence = data['confidence'] * (match_count / len(data['patterns']))
+            if confidence > best_match[1]:
+                best_match = (company, confidence)
+    return best_match
+
+
+SAMPLES = [
+    "",
+    "Renters policy declarations with no carrier name",
+    "State Farm Insurance\nLike a good neighbor, State Farm is there\nstatefarm.com",
+    "STATEFARM renters policy",
+    "Allstate - You're in good hands.",
+    "NATIONWIDE MUTUAL INSURANCE COMPANY\nTENANT CUSTOMER NOTICE\nNATIONWIDE 24-HOUR CLAIM line",
+    "Nationwide and Allstate are both mentioned; nationwide.com",
+    "Liberty  Mutual quote, see libertymutual.com",
+    "AAA Insurance / CSAA Insurance Group, csaa-ig.com",
+    "The Hartford and The Hanover comparison",
+    "GEICO geico.com Progressive progressive.com USAA",
+    "Lemonade Insurance lemonade.com Chubb",
+    "Farmers Insurance Group vs State Farm",
+    "Country Financial countryfinancial.com Erie Insurance",
+    "American Family amfam.com Amica Mutual amica.com Travelers",
+    "ſtate Farm and Lemonade İnsurance with KELVIN Keico",
+    "x" * 1990 + "State Farm",  # straddles the 2000-character sample
+]
+
+
+@pytest.mark.parametrize("text", SAMPLES)
+def test_matches_legacy_detection(text):
+    assert CompanyDetector.detect_company(text) == legacy_detect_company(text)
+
+
+def test_matches_legacy_on_random_pattern_mixes():
+    rng = random.Random(0)
+    fragments = [
+        'State Farm', 'statefarm.com', 'Like a good neighbor', 'Allstate', "You're in good hands",
+        'NATIONWIDE MUTUAL INSURANCE', 'Nationwide', 'Travelers', 'The Hartford', 'GEICO',
+        'Policy Number: 12345', 'Deductible $500', 'csaa-ig.com', 'AAA Insurance', 'Chubb',
+        'hanover.com', 'The Hanover', 'Amica Mutual', 'amfam.com', 'Erie Insurance',
+    ]
+    for _ in range(300):
+        words = rng.choices(fragments, k=rng.randint(0, 8))
+        text = " ".join(w.upper() if rng.random() < 0.3 else w for w in words)
+        assert CompanyDetector.detect_company(text) == legacy_detect_company(text), text
+
+
+def test_required_literal():
+    assert required_literal(r'State\s*Farm', re.IGNORECASE) == 'state'
+    assert required_literal(r'statefarm\.com', re.IGNORECASE) == 'statefarm.com'
+    assert required_literal(r'(?:a|b)c', re.IGNORECASE) is None
+    assert required_literal(r'Policy\s*(?:Number|No\.?)\s*:?\s*([A-Z0-9-]+)') == 'policy'
+
+
+def test_literal_scanner_finds_overlapping_literals():
+    scanner = LiteralScanner(['nationwide', 'nationwide mutual', 'wide', 'mutual insurance'])
+    found = scanner.find('NATIONWIDE MUTUAL INSURANCE')
+    assert found == {'nationwide', 'nationwide mutual', 'wide', 'mutual insurance'}
+    assert scanner.find('nothing here') == set()
+
+
+def test_fold_case_matches_re_ignorecase():
+    for char in ['İ', 'ı', 'ſ', 'K']:
+        for letter in 'iks':
+            assert (fold_case(char) == letter) == bool(re.fullmatch(letter, char, re.IGNORECASE))
@@ -0,0 +1,53 @@
+from sqlalchemy import inspect, text
+
+from models.database import add_missing_columns, create_db_engine
+
+
+def test_sqlite_engine_pragmas(tmp_path, monkeypatch):
+    monkeypatch.setattr('config.settings.SQLITE_JOURNAL_MODE', 'WAL')
+    monkeypatch.setattr('config.settings.SQLITE_SYNCHRONOUS', 'NORMAL')
+    monkeypatch.setattr('config.settings.SQLITE_MMAP_SIZE', 16 * 1024 * 1024)
+    monkeypatch.setattr('config.settings.SQLITE_CACHE_SIZE', 8 * 1024 * 1024)
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'records.db'}")
+    with engine.connect() as connection:
+        pragma = lambda name: connection.execute(text(f"PRAGMA {name}")).scalar()
+        assert pragma('journal_mode') == 'wal'
+        assert pragma('synchronous') == 1  # NORMAL
+        assert pragma('busy_timeout') == 5000
+        assert pragma('mmap_size') == 16 * 1024 * 1024
+        assert pragma('cache_size') == -8192
+    engine.dispose()
+
+
+def test_sqlite_file_keeps_its_journal_mode_by_default(tmp_path):
+    path = tmp_path / 'insurance.db'
+    engine = create_db_engine(f"sqlite:///{path}")
+    with engine.begin() as connection:
+        pragma = lambda name: connection.execute(text(f"PRAGMA {name}")).scalar()
+        assert pragma('journal_mode') == 'delete'
+        assert pragma('synchronous') == 2  # FULL
+        assert pragma('mmap_size') == 0
+        connection.execute(text("CREATE TABLE t (id INTEGER)"))
+    engine.dispose()
+    # Opening a database leaves no WAL side files next to it
+    assert [p.name for p in tmp_path.iterdir()] == ['insurance.db']
+
+
+def test_in_memory_sqlite_keeps_its_journal(monkeypatch):
+    monkeypatch.setattr('config.settings.SQLITE_SYNCHRONOUS', 'FULL')
+    engine = create_db_engine('sqlite://')
+    with engine.connect() as connection:
+        pragma = lambda name: connection.execute(text(f"PRAGMA {name}")).scalar()
+        assert pragma('journal_mode') == 'memory'  # WAL needs a file
+        assert pragma('synchronous') == 2  # FULL
+    engine.dispose()
+
+
+def test_missing_columns_are_added_to_existing_tables(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE processing_jobs (id VARCHAR(36) PRIMARY KEY, filename VARCHAR(255))"))
+    add_missing_columns(engine)
+    columns = {column['name'] for column in inspect(engine).get_columns('processing_jobs')}
+    engine.dispose()
+    assert {'heartbeat_at', 'attempts', 'status'} <= columns
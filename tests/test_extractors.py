@@ -0,0 +1,236 @@
+import logging
+import re
+import time
+
+import pytest
+
+from core.carrier_registry import _report_risky_patterns, registry
+from core.literal_scanner import AnchorIndex
+from core.pattern_analysis import backtracking_risks, leading_literal
+from core.template_manager import TemplateManager
+from core.word_boxes import WordBoxes
+from core.validator import DataValidator
+from extractors.base_extractor import FIELD_FLAGS, BaseExtractor, timed_re
+from tests.samples import NATIONWIDE, STATE_FARM, tesseract_data
+
+GENERIC = """Acme Renters Insurance Company
+POL # AC-99-0001
+Policyholder Name: Maria Del Carmen Lopez
+Premises: 9 Elm Ct, Unit 3, Springfield, IL 62701
+Contents Coverage: $15,000
+Family Liability: $50,000
+All Perils Deductible: $250
+Policy Start: 3/15/24 through 3/15/25
+Amount Due: 97.20
+Carrier: Acme Mutual Group
+"""
+
+MESSY = """policy no. ab-12 POLICY ID: ZZ9 named insured: john  smith
+İnsured Location: 1 ſtreet Road
+Coverage C $1,234 coverage e: 5,000 DEDUCTIBLE 100
+Expiry Date 12-31-2025 to 01/02/2026 premium: $12.5
+Personal Property
+$40,000
+Insured\tName :   Ann   Lee
+"""
+
+FIXTURES = [STATE_FARM, NATIONWIDE, GENERIC, MESSY, "", "no fields at all", STATE_FARM * 3 + MESSY]
+
+
+def legacy_extract_field(extractor, text, patterns):
+    """
+    The original full-text search path, kept as the reference for anchoring.
+    Patterns are compiled with the engine extraction uses: the regex module
+    folds case differently from re for a few non-ASCII letters (e.g. 'ſ').
+    """
+    for pattern in patterns:
+        try:
+            engine = timed_re if pattern.guarded else re
+            match = engine.compile(pattern.pattern, FIELD_FLAGS).search(text)
+            if match:
+                value = match.group(1).strip()
+                value = ' '.join(value.split())
+                return extractor._format_value(pattern.pattern, value)
+        except Exception:
+            continue
+    return None
+
+
+def legacy_extract(extractor, text):
+    data = {field: legacy_extract_field(extractor, text, patterns)
+            for field, patterns in extractor.compiled_patterns().items()}
+    data['low_confidence_fields'] = []
+    data['detected_company'] = extractor.company_name
+    data['confidence_score'] = extractor._calculate_confidence(data)
+    data['raw_text_preview'] = text[:500]
+    return data
+
+
+@pytest.mark.parametrize("carrier", list(registry.carriers))
+@pytest.mark.parametrize("text", FIXTURES)
+def test_anchored_extraction_matches_search(carrier, text):
+    extractor = TemplateManager._shared_extractor(carrier)
+    assert extractor.extract(text) == legacy_extract(extractor, text)
+
+
+def test_fixture_values():
+    extractor = TemplateManager.get_extractor('state_farm', 0.95)
+    data = extractor.extract(STATE_FARM)
+    assert data['policy_number'] == 'SF-1234567'
+    assert data['deductible'] == '$500'
+    assert data['premium_amount'] == '$180.00'
+
+    data = TemplateManager.get_extractor('nationwide', 0.95).extract(NATIONWIDE)
+    assert data['policy_number'] == '78 42 HS 027914'
+    assert data['effective_date'] == 'OCT 04, 2024'
+
+    # Non-ASCII case folding as the standard re module does it
+    assert TemplateManager.get_extractor('unknown', 0.0).extract(MESSY)['property_address'] == '1 ſtreet Road'
+
+
+def test_get_extractor_returns_shared_instances():
+    assert TemplateManager.get_extractor('allstate', 0.9) is TemplateManager.get_extractor('allstate', 0.95)
+    assert TemplateManager.get_extractor('allstate', 0.5) is TemplateManager.get_extractor('unknown', 0.9)
+
+
+def test_leading_literal():
+    assert leading_literal(r'Policy\s*ID\s*:?\s*([A-Z0-9\-]+)', FIELD_FLAGS) == 'policy'
+    assert leading_literal(r'(State\s*Farm[^\n]*)', FIELD_FLAGS) == 'state'
+    assert leading_literal(r'(NATIONWIDE\s+MUTUAL)', FIELD_FLAGS) == 'nationwide'
+    assert leading_literal(r'Renter\'s\s*Property', FIELD_FLAGS) == "renter's"
+    assert leading_literal(r'(?:Named\s*)?Insured', FIELD_FLAGS) is None
+    assert leading_literal(r'(?:to|through)\s*(\d+)', FIELD_FLAGS) is None
+    assert leading_literal(r'(\d{5}\s+[A-Z]+)', FIELD_FLAGS) is None
+
+
+def test_anchor_index_positions():
+    anchors = AnchorIndex("Policy x POLICY y policy")
+    assert anchors.positions('policy') == [0, 9, 18]
+    assert anchors.positions('missing') == []
+
+
+def test_risky_fields_are_logged_once(caplog, monkeypatch):
+    monkeypatch.setattr('core.carrier_registry._reported_risky', set())
+    with caplog.at_level(logging.DEBUG, logger='core.carrier_registry'):
+        _report_risky_patterns(registry.carriers)
+        _report_risky_patterns(registry.carriers)
+    summaries = [r for r in caplog.records if r.levelno == logging.INFO]
+    assert [r.getMessage() for r in summaries] == [
+        "1 carrier fields have super-linear patterns, matched under EXTRACTION_FIELD_TIMEOUT: "
+        "nationwide.property_address"
+    ]
+    assert not [r for r in caplog.records if r.levelno >= logging.WARNING]
+
+
+def test_backtracking_risks():
+    nationwide = r'(\d{5}\s+[A-Z\s]+\n?[A-Z\s]+\n?[A-Z]+\s+TX\s+\d{5}-\d{4})'
+    assert 'degree 4' in backtracking_risks(nationwide, FIELD_FLAGS)[0]
+    assert backtracking_risks(r'Address\s*:?\s*(.+?)(?:\n|$)', FIELD_FLAGS) == []
+    assert backtracking_risks(r'Deductible\s*:?\s*\$?\s*([\d,]+)', FIELD_FLAGS) == []
+    assert backtracking_risks(r'Name\s*(?:Insured)?\s*:?\s*(.+)', FIELD_FLAGS) == []
+    # An optional newline that the runs on both sides can also match keeps them one chain
+    assert 'degree 3' in backtracking_risks(r'([A-Z\s]+\n?[A-Z\s]+\n?[A-Z\s]+)', FIELD_FLAGS)[0]
+    assert 'exponential' in backtracking_risks(r'(\d+\.?\d*)+%', FIELD_FLAGS)[0]
+    assert 'exponential' in backtracking_risks(r'(?:1|11)+%', FIELD_FLAGS)[0]
+    assert backtracking_risks(r'Policy\s*ID\s*:?\s*([A-Z0-9\-]+)', FIELD_FLAGS) == []
+    assert backtracking_risks(r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)+)', FIELD_FLAGS) == []
+
+
+class CatastrophicExtractor(BaseExtractor):
+    def get_patterns(self):
+        return {
+            'slow': [r'Total\s*((?:1|11)+)%'],
+            'fast': [r'Policy\s*ID\s*:?\s*([A-Z0-9]+)'],
+        }
+
+
+@pytest.mark.skipif(timed_re is None, reason="regex module not installed")
+def test_runaway_pattern_is_abandoned_and_flagged(monkeypatch):
+    monkeypatch.setattr('config.settings.EXTRACTION_FIELD_TIMEOUT', 0.05)
+    extractor = CatastrophicExtractor()
+    data = extractor.extract("Policy ID: AB12\nTotal " + "1" * 40 + "x%")
+
+    assert data['slow'] is None
+    assert data['fast'] == 'AB12'
+    assert data['low_confidence_fields'] == ['slow']
+    validation = DataValidator.validate_all(data)
+    assert any('timed out' in warning for warning in validation['warnings'])
+    assert DataValidator.should_flag_for_review(data, validation)
+
+
+class QuadraticExtractor(BaseExtractor):
+    def get_patterns(self):
+        # Lazy runs between commas: slow on a long line, but no shape the analyser flags
+        return {'named_insured': [r'Named\s*Insured\s*((?:.*?,){11})P']}
+
+
+@pytest.mark.skipif(timed_re is None, reason="regex module not installed")
+def test_unflagged_pattern_runs_under_the_field_budget(monkeypatch):
+    monkeypatch.setattr('config.settings.EXTRACTION_FIELD_TIMEOUT', 0.05)
+    extractor = QuadraticExtractor()
+    assert backtracking_risks(extractor.get_patterns()['named_insured'][0], FIELD_FLAGS) == []
+    assert all(pattern.guarded for pattern in extractor.compiled_patterns()['named_insured'])
+
+    start = time.perf_counter()
+    data = extractor.extract("Named Insured " + "," * 10 + "a" * 20000)
+    assert time.perf_counter() - start < 0.3
+    assert data['named_insured'] is None
+    assert data['low_confidence_fields'] == ['named_insured']
+
+
+# Two-column form: labels in block 1, values in block 2, so the flat text
+# puts every label before every value
+FORM = tesseract_data([
+    (1, 1, 100, 100, 90, 'Policy'), (1, 1, 200, 100, 110, 'Number:'),
+    (1, 2, 100, 200, 150, 'Deductible:'),
+    (1, 3, 100, 300, 120, 'Premium'),
+    (2, 1, 380, 102, 160, 'HO-778812'),
+    (2, 2, 380, 198, 60, '500'),
+    (2, 3, 380, 301, 50, '$90'), (2, 3, 440, 301, 30, '00'),
+    (2, 3, 900, 300, 80, 'Annual'),
+])
+
+
+def test_word_boxes_from_tesseract():
+    boxes = WordBoxes.from_tesseract(FORM)
+    assert len(boxes) == 9
+    assert boxes.word(4) == 'HO-778812'
+    assert boxes.to_text().splitlines()[0] == 'Policy Number:'
+    assert boxes.find_label('policy number') == 1
+    assert boxes.find_label('Number Deductible') is None  # not on one line
+
+    value = boxes.right_of('Policy Number')
+    assert value.text == 'HO-778812'
+    assert (value.left, value.right, value.confidence) == (380, 540, 91.0)
+    assert boxes.right_of('Premium').text == '$90 00'  # 'Annual' is past the gap
+    assert boxes.right_of('Missing') is None
+
+    pages = WordBoxes.concat([boxes, WordBoxes.from_tesseract(FORM, page=2)])
+    assert len(pages) == 18 and pages.page[-1] == 2
+    assert pages.to_text().count('Policy Number:') == 2
+
+
+class LabelledExtractor(BaseExtractor):
+    def get_patterns(self):
+        return {
+            'policy_number': [r'Policy\s*Number\s*:?\s*([A-Z0-9\-]+)'],
+            'deductible': [r'Deductible\s*:?\s*\$?\s*([\d,]+)'],
+        }
+
+    def get_labels(self):
+        return {'policy_number': ['Policy Number'], 'deductible': ['Deductible']}
+
+
+def test_extract_reads_values_beside_labels():
+    boxes = WordBoxes.from_tesseract(FORM)
+    text = boxes.to_text()
+    extractor = LabelledExtractor()
+
+    assert extractor.extract(text)['policy_number'] == 'Deductible'  # flat text loses the row
+    data = extractor.extract(text, layout=boxes)
+    assert data['policy_number'] == 'HO-778812'
+    assert data['deductible'] == '$500'
+
+    # Without a label hit the patterns still run on the text
+    data = extractor.extract("Policy Number: AB-1\n", layout=WordBoxes.from_tesseract(tesseract_data([])))
+    assert data['policy_number'] == 'AB-1'
@@ -0,0 +1,74 @@
+import cv2
+import numpy as np
+import pytest
+
+from core.image_processor import ImageProcessor
+from core.timing import StageTimer
+
+
+def text_page(shape=(800, 600)) -> np.ndarray:
+    """Grey page with rows of dark text; not white, so added noise isn't clipped."""
+    page = np.full(shape, 200, np.uint8)
+    for y in range(50, shape[0] - 50, 40):
+        for x in range(40, shape[1] - 80, 70):
+            cv2.putText(page, 'Policy', (x, y), cv2.FONT_HERSHEY_SIMPLEX, 0.6, 30, 2)
+    return page
+
+
+def add_noise(page: np.ndarray, sigma: float) -> np.ndarray:
+    noise = np.random.default_rng(0).normal(0, sigma, page.shape)
+    return np.clip(page + noise, 0, 255).astype(np.uint8)
+
+
+@pytest.mark.parametrize('shape', [(800, 600), (1400, 1100)])  # the second is sampled from its centre
+@pytest.mark.parametrize('sigma', [2, 5, 10, 15])
+def test_estimate_noise(shape, sigma):
+    assert ImageProcessor.estimate_noise(add_noise(text_page(shape), sigma)) == pytest.approx(sigma, rel=0.1)
+
+
+def test_text_is_not_mistaken_for_noise():
+    assert ImageProcessor.estimate_noise(text_page()) < 0.5
+
+
+def test_auto_mode_denoises_by_noise_level(monkeypatch):
+    monkeypatch.setattr('config.settings.PREPROCESS_NOISE_THRESHOLD', 4.0)
+    for sigma, mode in [(1, 'fast'), (10, 'full')]:
+        timer = StageTimer()
+        ImageProcessor.denoise(add_noise(text_page(), sigma), 'auto', timer)
+        assert timer.details['preprocess_mode'] == mode
+        assert timer.details['noise_sigma'] == pytest.approx(sigma, rel=0.1)
+        assert {'noise_estimate', 'denoise'} <= set(timer.as_dict())
+
+    timer = StageTimer()
+    ImageProcessor.denoise(add_noise(text_page(), 10), 'fast', timer)
+    assert timer.details == {'preprocess_mode': 'fast'}
+
+
+def lines_page(shape=(1100, 850)) -> np.ndarray:
+    """White page of left-aligned text lines of varying length."""
+    page = np.full(shape, 255, np.uint8)
+    words = 'Policy Number Coverage Deductible Premium'
+    for index, y in enumerate(range(80, shape[0] - 60, 45)):
+        cv2.putText(page, words[:20 + index * 7 % 25], (60, y), cv2.FONT_HERSHEY_SIMPLEX, 0.9, 0, 2)
+    return page
+
+
+def rotate(image: np.ndarray, angle: float) -> np.ndarray:
+    h, w = image.shape[:2]
+    matrix = cv2.getRotationMatrix2D((w // 2, h // 2), angle, 1.0)
+    return cv2.warpAffine(image, matrix, (w, h), flags=cv2.INTER_CUBIC, borderMode=cv2.BORDER_REPLICATE)
+
+
+@pytest.mark.parametrize('skew', [-9.0, -4.5, -2.0, -0.8, -0.2, 0.0, 0.3, 1.5, 3.0, 7.0])
+def test_estimate_skew(skew):
+    # The estimate is the rotation that undoes the skew
+    assert ImageProcessor.estimate_skew(rotate(lines_page(), skew)) == pytest.approx(-skew, abs=0.15)
+
+
+def test_deskew_leaves_small_skew_alone(monkeypatch):
+    monkeypatch.setattr('config.settings.DESKEW_MIN_ANGLE', 0.5)
+    slight = rotate(lines_page(), 0.2)
+    assert ImageProcessor.deskew_image(slight) is slight
+
+    straightened = ImageProcessor.deskew_image(rotate(lines_page(), 3.0))
+    assert ImageProcessor.estimate_skew(straightened) == pytest.approx(0.0, abs=0.15)
@@ -0,0 +1,198 @@
+import asyncio
+import json
+import zipfile
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+from core import archive_reader
+from core.job_queue import (JobQueue, archive_entry_job_id, claim_job, complete_job, create_job, fail_job,
+                            heartbeat_jobs, queued_job_ids, requeue_stale_jobs)
+from core.upload_writer import UploadTooLarge
+from models.database import InsuranceRecord, ProcessingJob
+
+RESULT = {
+    'extracted_data': {'policy_number': 'SF-1234567', 'detected_company': 'state_farm',
+                       'confidence_score': 100.0, 'raw_text_preview': 'State Farm'},
+    'validation_results': {'is_valid': True, 'errors': [], 'warnings': []},
+    'needs_review': False,
+    'stages': {'tesseract': 0.5},
+}
+
+
+@pytest.fixture
+def jobs_db(monkeypatch, session_factory):
+    monkeypatch.setattr('core.job_queue.SessionLocal', session_factory)
+    return session_factory
+
+
+def get_job(session_factory, job_id: str) -> ProcessingJob:
+    db = session_factory()
+    try:
+        return db.query(ProcessingJob).filter(ProcessingJob.id == job_id).one()
+    finally:
+        db.close()
+
+
+def backdate(session_factory, job_id: str, seconds: float) -> None:
+    """Pretend a running job's consumer last reported `seconds` ago."""
+    db = session_factory()
+    try:
+        db.query(ProcessingJob).filter(ProcessingJob.id == job_id).update({
+            ProcessingJob.heartbeat_at: datetime.utcnow() - timedelta(seconds=seconds)
+        })
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_job_lifecycle(jobs_db):
+    create_job('a', 'a.pdf', '/tmp/a.pdf', '.pdf', batch_id='batch')
+    create_job('b', 'b.pdf', '/tmp/b.pdf', '.pdf', batch_id='batch')
+    assert queued_job_ids() == ['a', 'b']
+
+    job = claim_job('a')
+    assert job.status == ProcessingJob.RUNNING
+    assert job.attempts == 1
+    assert job.heartbeat_at is not None
+    assert claim_job('a') is None
+    assert queued_job_ids() == ['b']
+
+    record_id = complete_job('a', 'a.pdf', RESULT, 1.5)
+    job = get_job(jobs_db, 'a')
+    assert job.status == ProcessingJob.COMPLETED
+    assert job.record_id == record_id
+    response = json.loads(job.result)
+    assert response['record_id'] == record_id
+    assert response['data']['policy_number'] == 'SF-1234567'
+    assert 'raw_text_preview' not in response['data']
+    db = jobs_db()
+    assert db.get(InsuranceRecord, record_id).filename == 'a.pdf'
+    db.close()
+
+    claim_job('b')
+    fail_job('b', 'Pipeline timed out')
+    job = get_job(jobs_db, 'b')
+    assert job.status == ProcessingJob.FAILED
+    assert job.error == 'Pipeline timed out'
+    assert job.finished_at is not None
+
+
+def test_requeue_stale_jobs(jobs_db):
+    for job_id in ('fresh', 'stale', 'exhausted'):
+        create_job(job_id, f'{job_id}.pdf', f'/tmp/{job_id}.pdf', '.pdf')
+    for attempt in range(3):
+        claim_job('exhausted')
+        if attempt < 2:
+            backdate(jobs_db, 'exhausted', 120)
+            requeue_stale_jobs(60, max_attempts=3)
+    claim_job('fresh')
+    claim_job('stale')
+    backdate(jobs_db, 'stale', 120)
+    backdate(jobs_db, 'exhausted', 120)
+    backdate(jobs_db, 'fresh', 120)
+    heartbeat_jobs({'fresh'})
+
+    assert requeue_stale_jobs(60, max_attempts=3) == (1, 1)
+    assert get_job(jobs_db, 'fresh').status == ProcessingJob.RUNNING
+    assert get_job(jobs_db, 'stale').status == ProcessingJob.QUEUED
+    exhausted = get_job(jobs_db, 'exhausted')
+    assert exhausted.status == ProcessingJob.FAILED
+    assert exhausted.attempts == 3
+    assert exhausted.error == 'Abandoned after 3 attempts'
+
+
+def test_claim_is_exclusive_across_threads(jobs_db):
+    create_job('only', 'only.pdf', '/tmp/only.pdf', '.pdf')
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        claims = list(pool.map(lambda _: claim_job('only'), range(8)))
+    assert sum(job is not None for job in claims) == 1
+    assert get_job(jobs_db, 'only').attempts == 1
+
+
+class FakePipeline:
+    """Counts documents run; every run takes a moment so pollers overlap."""
+    max_workers = 2
+    timeout = None
+
+    def __init__(self, runs: Counter):
+        self.runs = runs
+
+    async def run(self, file_path: str, file_ext: str, file_hash=None):
+        self.runs[file_path] += 1
+        await asyncio.sleep(0.01)
+        return RESULT
+
+
+def test_concurrent_pollers_run_each_job_once(jobs_db, tmp_path):
+    runs = Counter()
+    paths = []
+    for index in range(20):
+        path = tmp_path / f'{index}.pdf'
+        path.write_bytes(b'%PDF')
+        paths.append(str(path))
+        create_job(f'job-{index}', path.name, str(path), '.pdf')
+
+    async def drain():
+        # Two consumers (e.g. the web server and worker.py) polling one table
+        queues = [JobQueue(FakePipeline(runs), concurrency=3, poll_interval=0.01) for _ in range(2)]
+        for queue in queues:
+            await queue.start()
+        for _ in range(500):
+            if not queued_job_ids() and not any(queue._running for queue in queues):
+                break
+            await asyncio.sleep(0.01)
+        for queue in queues:
+            await queue.stop()
+
+    asyncio.run(drain())
+    assert runs == Counter(paths)
+    db = jobs_db()
+    statuses = [status for status, in db.query(ProcessingJob.status)]
+    db.close()
+    assert statuses == [ProcessingJob.COMPLETED] * 20
+    assert not any((tmp_path / f'{index}.pdf').exists() for index in range(20))
+
+
+def test_archive_expansion_resumes_and_records_failed_entries(jobs_db, tmp_path, monkeypatch):
+    uploads = tmp_path / 'uploads'
+    uploads.mkdir()
+    monkeypatch.setattr('config.settings.UPLOAD_DIR', str(uploads))
+    monkeypatch.setattr('config.settings.ARCHIVE_PREFETCH', 10)  # nothing consumes the jobs here
+    batch_id = '6f1c9a56-4e8a-4d0b-9a57-0c5cbe3e8d11'
+    archive_path = uploads / f'{batch_id}.zip'
+    with zipfile.ZipFile(archive_path, 'w') as archive:
+        for name in ('a.pdf', 'b.png', 'c.pdf'):
+            archive.writestr(name, f'{name} data')
+    create_job(batch_id, 'certs.zip', str(archive_path), '.zip', batch_id, ProcessingJob.ARCHIVE)
+    # A previous expansion queued the first entry before the process died
+    create_job(archive_entry_job_id(batch_id, 0), 'a.pdf', '/tmp/a.pdf', '.pdf', batch_id)
+
+    copy_entry = archive_reader._copy_entry
+
+    def fail_c(source, path, max_size):
+        if source.name == 'c.pdf':
+            raise UploadTooLarge("File too large. Max size: 0.0MB")
+        return copy_entry(source, path, max_size)
+
+    monkeypatch.setattr(archive_reader, '_copy_entry', fail_c)
+    queue = JobQueue(FakePipeline(Counter()), concurrency=1)
+    asyncio.run(queue.expand_archive(batch_id))
+
+    archive_job = get_job(jobs_db, batch_id)
+    assert archive_job.status == ProcessingJob.COMPLETED
+    assert json.loads(archive_job.result) == {'batch_id': batch_id, 'queued': 1, 'failed': 1}
+    assert not archive_path.exists()
+
+    second = get_job(jobs_db, archive_entry_job_id(batch_id, 1))
+    assert (second.filename, second.status) == ('b.png', ProcessingJob.QUEUED)
+    assert open(second.file_path).read() == 'b.png data'
+    third = get_job(jobs_db, archive_entry_job_id(batch_id, 2))
+    assert (third.filename, third.status, third.file_path) == ('c.pdf', ProcessingJob.FAILED, None)
+    assert third.error.startswith('File too large')
+    assert third.attempts == 0
+    # The entry queued before the restart wasn't extracted again
+    assert [p.name for p in uploads.iterdir()] == [Path(second.file_path).name]
@@ -0,0 +1,114 @@
+import asyncio
+
+import pytest
+
+from api import routes
+from core.metrics import MetricsRegistry
+
+DATA = b'%PDF-1.4 certificate'
+
+RESULT = {
+    'extracted_data': {'policy_number': 'SF-1234567', 'detected_company': 'State Farm',
+                       'confidence_score': 100.0},
+    'validation_results': {'is_valid': True, 'errors': [], 'warnings': []},
+    'needs_review': False,
+    'ocr_metrics': {'strategy': 'text'},
+    'stages': {'text_layer': 0.002, 'extract_fields': 0.01},
+}
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    histogram = registry.histogram('stage_seconds', 'Seconds per stage.', ('stage',), buckets=(1.0, 0.25))
+    for seconds in (0.125, 0.25, 0.5, 2.0):
+        histogram.observe(seconds, stage='ocr')
+    histogram.observe(0.5, stage='db')
+
+    assert registry.render() == (
+        '# HELP stage_seconds Seconds per stage.\n'
+        '# TYPE stage_seconds histogram\n'
+        'stage_seconds_bucket{stage="db",le="0.25"} 0\n'
+        'stage_seconds_bucket{stage="db",le="1.0"} 1\n'
+        'stage_seconds_bucket{stage="db",le="+Inf"} 1\n'
+        'stage_seconds_sum{stage="db"} 0.5\n'
+        'stage_seconds_count{stage="db"} 1\n'
+        # A value on a bucket's bound counts in that bucket
+        'stage_seconds_bucket{stage="ocr",le="0.25"} 2\n'
+        'stage_seconds_bucket{stage="ocr",le="1.0"} 3\n'
+        'stage_seconds_bucket{stage="ocr",le="+Inf"} 4\n'
+        'stage_seconds_sum{stage="ocr"} 2.875\n'
+        'stage_seconds_count{stage="ocr"} 4\n'
+    )
+
+
+def test_counter_renders_escaped_labels():
+    registry = MetricsRegistry()
+    counter = registry.counter('documents_total', 'Documents.', ('carrier', 'strategy'))
+    counter.inc(carrier='Acme "Mutual"\\\n', strategy='text')
+    counter.inc(2, carrier='Acme "Mutual"\\\n', strategy='text')
+    counter.inc(carrier='Other')  # a missing label renders empty
+    empty = registry.counter('unused_total', 'Never incremented.', ())
+
+    assert registry.render() == (
+        '# HELP documents_total Documents.\n'
+        '# TYPE documents_total counter\n'
+        'documents_total{carrier="Acme \\"Mutual\\"\\\\\\n",strategy="text"} 3.0\n'
+        'documents_total{carrier="Other",strategy=""} 1.0\n'
+        '# HELP unused_total Never incremented.\n'
+        '# TYPE unused_total counter\n'
+    )
+    assert empty.render() == ['# HELP unused_total Never incremented.', '# TYPE unused_total counter']
+
+
+@pytest.fixture
+def pipeline_result(monkeypatch):
+    """The pipeline, on both the upload and job paths, returns RESULT without running OCR."""
+    async def run(file_path, file_ext, file_hash=None):
+        return RESULT
+
+    monkeypatch.setattr(routes.pipeline, 'run', run)
+    monkeypatch.setattr(routes.job_queue.pipeline, 'run', run)
+
+
+def stage_timings(api, record_id: int) -> dict:
+    return api.get(f'/api/records/{record_id}').json()['stage_timings']
+
+
+def test_upload_stage_timings_reach_the_record(api, pipeline_result):
+    response = api.post('/api/upload', files={'file': ('cert.pdf', DATA)})
+    assert response.status_code == 200
+
+    timings = stage_timings(api, response.json()['record_id'])
+    assert set(timings) == {'text_layer', 'extract_fields', 'upload_write', 'db_commit'}
+    assert timings['text_layer'] == RESULT['stages']['text_layer']
+    assert timings['db_commit'] >= 0
+
+
+def test_job_stage_timings_reach_the_record(api, pipeline_result):
+    job_id = api.post('/api/jobs', files={'file': ('cert.pdf', DATA)}).json()['job_id']
+    asyncio.run(routes.job_queue.run_job(job_id))
+
+    job = api.get(f'/api/jobs/{job_id}').json()
+    assert job['status'] == 'completed'
+    timings = stage_timings(api, job['record_id'])
+    assert set(timings) == {'text_layer', 'extract_fields', 'upload_write'}
+    assert timings['upload_write'] >= 0
+
+
+def test_metrics_endpoint(api, pipeline_result):
+    def documents() -> float:
+        response = api.get('/api/metrics')
+        assert response.headers['content-type'] == 'text/plain; version=0.0.4; charset=utf-8'
+        series = 'insurance_documents_total{carrier="State Farm",file_type=".pdf",strategy="text",needs_review="false"}'
+        values = [line.split()[-1] for line in response.text.splitlines() if line.startswith(series + ' ')]
+        return float(values[0]) if values else 0.0
+
+    # The registry is process-wide, so compare before and after
+    before = documents()
+    assert api.post('/api/upload', files={'file': ('cert.pdf', DATA)}).status_code == 200
+    assert documents() == before + 1
+
+    text = api.get('/api/metrics').text
+    assert '# TYPE insurance_stage_seconds histogram' in text
+    for stage in ('text_layer', 'upload_write', 'db_commit'):
+        assert f'insurance_stage_seconds_count{{stage="{stage}",carrier="State Farm",file_type=".pdf"}}' in text
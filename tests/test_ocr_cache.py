@@ -0,0 +1,85 @@
+import pytest
+
+from core.ocr_cache import STATS_ROW_ID, OCRCache
+from models.database import OCRCacheStats
+
+TEXT = 'x' * 10  # 10 bytes per entry
+
+
+@pytest.fixture
+def cache_db(monkeypatch, session_factory):
+    monkeypatch.setattr('core.ocr_cache.SessionLocal', session_factory)
+    return session_factory
+
+
+def stored_counts(session_factory):
+    """Counters as written to the database, without flushing anything."""
+    db = session_factory()
+    try:
+        row = db.get(OCRCacheStats, STATS_ROW_ID)
+        return (row.hits, row.misses, row.evictions) if row else (0, 0, 0)
+    finally:
+        db.close()
+
+
+def test_evicts_least_recently_used_first(cache_db):
+    cache = OCRCache(max_bytes=30, enabled=True, flush_interval=3600)
+    for key in 'abc':
+        cache.put(key, TEXT)
+    assert cache.get('a') == TEXT  # a is now more recent than b and c
+
+    cache.put('d', TEXT)
+    assert cache.get('b') is None
+    cache.put('e', TEXT)
+    assert cache.get('c') is None
+    assert [cache.get(key) for key in 'ade'] == [TEXT] * 3
+    assert cache.stats()['evictions'] == 2
+
+
+def test_size_cap(cache_db):
+    cache = OCRCache(max_bytes=35, enabled=True)
+    cache.put('too-big', 'y' * 36)
+    assert cache.get('too-big') is None
+
+    for index in range(10):
+        cache.put(f'key-{index}', TEXT)
+    stats = cache.stats()
+    assert (stats['entries'], stats['size_bytes'], stats['max_bytes']) == (3, 30, 35)
+    assert [cache.get(f'key-{index}') is not None for index in range(7, 10)] == [True] * 3
+
+
+def test_counters_are_buffered_until_flushed(cache_db):
+    cache = OCRCache(max_bytes=1000, enabled=True, flush_interval=3600)
+    cache.put('a', TEXT)
+    cache.get('a')
+    cache.get('a')
+    cache.get('missing')
+    assert stored_counts(cache_db) == (0, 0, 0)  # lookups wrote nothing
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['hit_rate']) == (2, 1, 0.6667)
+    assert stored_counts(cache_db) == (2, 1, 0)
+
+    # With no interval every lookup is written straight away
+    eager = OCRCache(max_bytes=1000, enabled=True, flush_interval=0)
+    eager.get('a')
+    assert stored_counts(cache_db) == (3, 1, 0)
+
+
+def test_counters_from_several_caches_add_up(cache_db):
+    # One instance per pool worker, all sharing the stats row
+    workers = [OCRCache(max_bytes=1000, enabled=True, flush_interval=3600) for _ in range(3)]
+    workers[0].put('a', TEXT)
+    for worker in workers:
+        worker.get('a')
+        worker.get('b')
+        worker.flush()
+    assert stored_counts(cache_db) == (3, 3, 0)
+
+
+def test_disabled_cache_does_nothing(cache_db):
+    cache = OCRCache(enabled=False)
+    cache.put('a', TEXT)
+    assert cache.get('a') is None
+    cache.flush()
+    assert stored_counts(cache_db) == (0, 0, 0)
@@ -0,0 +1,177 @@
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from config import settings
+from core.ocr_cache import OCRCache
+from core.image_processor import PREPROCESSING_VERSION
+from core.ocr_engine import OCREngine
+from tests.samples import make_pdf
+
+TEXT_PAGE = 'State Farm Insurance Company declarations for policy SF-1234567'
+SCANNED_TEXT = 'Scanned page read by tesseract'
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    """An OCR engine whose pages render blank and whose tesseract reads SCANNED_TEXT."""
+    monkeypatch.setattr('config.settings.OCR_CACHE_ENABLED', False)
+    monkeypatch.setattr('config.settings.OCR_PAGE_WORKERS', 1)
+    monkeypatch.setattr('core.tesseract.pytesseract.image_to_string', lambda image, **kwargs: SCANNED_TEXT)
+    engine = OCREngine()
+    engine.rendered = []
+
+    def render(file_path, page_number, dpi=None):
+        engine.rendered.append(page_number)
+        return np.full((200, 150), 255, np.uint8)
+
+    monkeypatch.setattr(engine, '_render_page', render)
+    return engine
+
+
+def test_pdf_pages_use_text_layer_or_ocr(engine, tmp_path):
+    path = tmp_path / 'packet.pdf'
+    path.write_bytes(make_pdf([TEXT_PAGE, None, 'Too short', TEXT_PAGE, None]))
+    engine.max_pages = 2
+
+    pages = []
+    text = engine.extract_text_from_pdf(str(path), pages)
+    # Only pages without enough embedded text are rendered, up to max_pages
+    assert engine.rendered == [2, 3]
+    assert [page['source'] for page in pages] == ['text', 'ocr', 'ocr', 'text', 'skipped']
+    assert [page['chars'] for page in pages] == [len(TEXT_PAGE), len(SCANNED_TEXT), len(SCANNED_TEXT),
+                                                 len(TEXT_PAGE), 0]
+    assert text == f'{TEXT_PAGE}\n{SCANNED_TEXT}\n{SCANNED_TEXT}\n{TEXT_PAGE}\n'
+
+
+def test_pdf_with_text_on_every_page_is_not_rendered(engine, tmp_path):
+    path = tmp_path / 'digital.pdf'
+    path.write_bytes(make_pdf([TEXT_PAGE, TEXT_PAGE]))
+    pages = []
+    assert engine.extract_text_from_pdf(str(path), pages) == f'{TEXT_PAGE}\n{TEXT_PAGE}\n'
+    assert engine.rendered == []
+    assert [page['source'] for page in pages] == ['text', 'text']
+
+
+@pytest.fixture
+def scan(tmp_path):
+    image = np.full((300, 200), 255, np.uint8)
+    image[100:110, 20:180] = 0
+    path = tmp_path / 'scan.png'
+    cv2.imwrite(str(path), image)
+    return path
+
+
+def test_image_bytes_are_read_like_the_file(engine, scan, monkeypatch):
+    seen = []
+    monkeypatch.setattr('core.tesseract.pytesseract.image_to_string',
+                        lambda image, **kwargs: (seen.append(image.copy()), SCANNED_TEXT)[1])
+    data = scan.read_bytes()
+
+    from_file, from_bytes, from_view = {}, {}, {}
+    assert engine.extract_text(str(scan), '.png', metrics=from_file) == SCANNED_TEXT
+    assert engine.extract_text_from_bytes(data, '.png', metrics=from_bytes) == SCANNED_TEXT
+    assert engine.extract_text_from_bytes(memoryview(data), '.png', metrics=from_view) == SCANNED_TEXT
+    # The same preprocessed page reaches tesseract whichever way it came in
+    assert len(seen) == 3
+    assert all(np.array_equal(image, seen[0]) for image in seen[1:])
+    assert [m['pages'][0]['source'] for m in (from_file, from_bytes, from_view)] == ['ocr'] * 3
+
+    with pytest.raises(ValueError):
+        engine.extract_text_from_bytes(b'%PDF', '.pdf')
+
+
+def test_pdf_pages_and_images_share_the_timed_page_stages(engine, scan, tmp_path):
+    path = tmp_path / 'packet.pdf'
+    path.write_bytes(make_pdf([TEXT_PAGE, None, None]))
+    pdf, image = {}, {}
+    engine.extract_text(str(path), '.pdf', metrics=pdf)
+    engine.extract_text(str(scan), '.png', metrics=image)
+
+    preprocessing = {'deskew', 'noise_estimate', 'denoise', 'contrast', 'binarize', 'tesseract'}
+    text_page, *scanned = pdf['pages']
+    assert set(text_page['stages']) == {'text_layer'}
+    for page in scanned:
+        assert set(page['stages']) == {'text_layer', 'rasterize'} | preprocessing
+        assert page['preprocess_mode'] == 'fast'
+    assert set(image['pages'][0]['stages']) >= preprocessing
+    # The document totals add up the pages
+    assert pdf['stages']['tesseract'] == pytest.approx(
+        sum(page['stages']['tesseract'] for page in scanned), abs=1e-3
+    )
+
+
+def test_page_stages_setting(monkeypatch, engine, scan):
+    monkeypatch.setattr('config.settings.PAGE_STAGES', ['binarize'])
+    metrics = {}
+    engine.extract_text(str(scan), '.png', metrics=metrics)
+    assert set(metrics['pages'][0]['stages']) == {'binarize', 'tesseract'}
+
+    monkeypatch.setattr('config.settings.PAGE_STAGES', ['binarize', 'sharpen'])
+    with pytest.raises(ValueError, match='sharpen'):
+        OCREngine()
+
+
+def test_parallel_pages_keep_page_order(engine, monkeypatch, tmp_path):
+    path = tmp_path / 'scanned.pdf'
+    path.write_bytes(make_pdf([None] * 4))
+    engine.max_pages = 4
+    engine.page_workers = 4
+    # Each rendered page is as tall as 100 + its number; later pages finish first
+    monkeypatch.setattr(engine, '_render_page',
+                        lambda file_path, page_number, dpi=None: np.full((100 + page_number, 150), 255, np.uint8))
+
+    def image_to_string(image, **kwargs):
+        page_number = image.shape[0] - 100
+        time.sleep(0.05 * (4 - page_number))
+        return f'page {page_number}'
+
+    monkeypatch.setattr('core.tesseract.pytesseract.image_to_string', image_to_string)
+    pages = []
+    assert engine.extract_text_from_pdf(str(path), pages) == 'page 1\npage 2\npage 3\npage 4\n'
+    assert [page['page'] for page in pages] == [1, 2, 3, 4]
+
+
+@pytest.fixture
+def cached_engine(engine, monkeypatch, session_factory):
+    """The engine fixture with the OCR cache on, counting tesseract runs."""
+    monkeypatch.setattr('core.ocr_cache.SessionLocal', session_factory)
+    monkeypatch.setattr('config.settings.OCR_CACHE_ENABLED', True)
+    engine.cache = OCRCache()
+    engine.runs = []
+    monkeypatch.setattr('core.tesseract.pytesseract.image_to_string',
+                        lambda image, **kwargs: (engine.runs.append(1), SCANNED_TEXT)[1])
+    return engine
+
+
+@pytest.mark.parametrize('setting, value', [
+    ('PDF_TEXT_MIN_CHARS', 10),
+    ('PREPROCESS_NOISE_THRESHOLD', 8.0),
+    ('PREPROCESS_MODE', 'full'),
+    ('PAGE_STAGES', ['binarize']),
+    ('DESKEW_WORK_WIDTH', 400),
+    ('DESKEW_MAX_ANGLE', 5.0),
+    ('DESKEW_MIN_ANGLE', 1.0),
+])
+def test_settings_that_change_ocr_output_miss_the_cache(cached_engine, scan, monkeypatch, setting, value):
+    cached_engine.extract_text(str(scan), '.png')
+    cached_engine.extract_text(str(scan), '.png')
+    assert len(cached_engine.runs) == 1
+
+    monkeypatch.setattr(f'config.settings.{setting}', value)
+    cached_engine.min_page_chars = settings.PDF_TEXT_MIN_CHARS
+    metrics = {}
+    cached_engine.extract_text(str(scan), '.png', metrics=metrics)
+    assert not metrics['cache_hit']
+    assert len(cached_engine.runs) == 2
+
+
+def test_preprocessing_version_is_part_of_the_cache_key(cached_engine, scan, monkeypatch):
+    cached_engine.extract_text(str(scan), '.png')
+    monkeypatch.setattr('core.ocr_engine.PREPROCESSING_VERSION', PREPROCESSING_VERSION + 1)
+    metrics = {}
+    cached_engine.extract_text(str(scan), '.png', metrics=metrics)
+    assert not metrics['cache_hit']
+    assert len(cached_engine.runs) == 2
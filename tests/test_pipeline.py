@@ -0,0 +1,195 @@
+import cv2
+import numpy as np
+import pytest
+
+from core import pipeline
+from core.carrier_registry import registry
+from core.ocr_engine import OCREngine
+from tests.samples import NATIONWIDE, STATE_FARM, make_pdf, tesseract_data
+
+
+@pytest.fixture
+def page_image(tmp_path):
+    path = tmp_path / 'notice.png'
+    cv2.imwrite(str(path), np.full((1056, 816), 255, np.uint8))
+    return str(path)
+
+
+ZONE_VALUES = ['NATIONWIDE', '78 42 HS 027914', 'JANE Q PUBLIC', '12345 OAK HOLLOW DR', '30,000',
+               '300,000', '1,000', 'OCT 04, 2024', 'OCT 04, 2025', '214.50']
+
+
+def read_zones(monkeypatch):
+    """Zone OCR that reads the Nationwide notice's zone values, once each, in template order."""
+    words = iter(ZONE_VALUES)
+    monkeypatch.setattr('core.tesseract.pytesseract.image_to_data', lambda image, **kwargs: tesseract_data(
+        [(1, 1, i * 10, 0, 10, word) for i, word in enumerate(next(words).split())]
+    ))
+
+
+@pytest.fixture
+def zonal_pipeline(monkeypatch):
+    """
+    Fresh pipeline components whose zones read the Nationwide values in
+    template order and whose page OCR reads the Nationwide notice.
+    """
+    read_zones(monkeypatch)
+    monkeypatch.setattr('core.tesseract.pytesseract.image_to_string', lambda image, **kwargs: NATIONWIDE)
+    # The OCR engine imports the database models; keep them off insurance.db
+    monkeypatch.setattr('config.settings.DATABASE_URL', 'sqlite://')
+    monkeypatch.setattr('config.settings.OCR_CACHE_ENABLED', False)
+    monkeypatch.setattr('core.pipeline._components', None)
+    monkeypatch.setattr('config.settings.OCR_PAGE_WORKERS', 1)
+    return monkeypatch
+
+
+def test_zonal_pipeline_and_fallback(zonal_pipeline, page_image):
+    result = pipeline.process_document(page_image, '.png')
+    data = result['extracted_data']
+    assert data['detected_company'] == 'Nationwide'
+    assert data['policy_number'] == '78 42 HS 027914'
+    assert data['coverage_amount'] == '$30,000'
+    assert data['insurance_company'] == 'NATIONWIDE'
+    assert data['liability_coverage'] == '$300,000'
+    assert data['deductible'] == '$1,000'
+    assert data['effective_date'] == 'OCT 04, 2024'
+    assert data['expiration_date'] == 'OCT 04, 2025'
+    assert data['premium_amount'] == '$214.50'
+    assert data['confidence_score'] == 100.0
+    assert result['ocr_metrics']['strategy'] == 'zonal'
+    assert [page['source'] for page in result['ocr_metrics']['pages']] == ['zonal']
+    assert {'rasterize', 'tesseract', 'extract_fields', 'validate'} <= set(result['stages'])
+
+    template = registry.get('nationwide').zones[0]
+    zonal_pipeline.setattr('core.tesseract.pytesseract.image_to_data',
+                           lambda image, **kwargs: {**tesseract_data([(1, 1, 0, 0, 10, '7B')]),
+                                                    'conf': [-1, 20.0]})
+    metrics = {}
+    assert pipeline._process_zones(page_image, '.png', 'nationwide', template, metrics) is None
+    assert metrics['zonal']['fallback'] == list(template.fields)
+
+
+def test_zonal_document_skips_full_page_ocr(zonal_pipeline, page_image):
+    pages = []
+    zonal_pipeline.setattr('core.tesseract.pytesseract.image_to_string',
+                           lambda image, **kwargs: (pages.append(image.shape), NATIONWIDE[:120])[1])
+    result = pipeline.process_document(page_image, '.png')
+    assert result['ocr_metrics']['strategy'] == 'zonal'
+    # Only the top of the page, at EARLY_DETECTION_DPI, for detection
+    assert pages == [(158, 408)]
+
+
+def test_missing_zones_count_against_confidence(zonal_pipeline):
+    extractor = pipeline._get_components()[2].get_extractor('nationwide', 1.0)
+    data = extractor.extract_zones({'policy_number': '78 42 HS 027914', 'coverage_amount': ''})
+    assert data['policy_number'] == '78 42 HS 027914'
+    assert data['coverage_amount'] is None
+    assert data['premium_amount'] is None
+    assert data['confidence_score'] == 10.0
+
+
+def test_early_detection_picks_strategy(zonal_pipeline, page_image):
+    zonal_pipeline.setattr('core.tesseract.pytesseract.image_to_string',
+                           lambda image, **kwargs: NATIONWIDE[:120])
+    result = pipeline.process_document(page_image, '.png')
+    assert result['ocr_metrics']['strategy'] == 'zonal'
+    assert result['ocr_metrics']['detection']['company'] == 'nationwide'
+
+    zonal_pipeline.setattr('core.tesseract.pytesseract.image_to_string',
+                           lambda image, **kwargs: STATE_FARM)
+    result = pipeline.process_document(page_image, '.png')
+    assert result['ocr_metrics']['detection']['company'] == 'state_farm'
+    assert result['ocr_metrics']['strategy'] == 'full'
+    assert {'early_detection', 'tesseract', 'detect_company', 'extract_fields'} <= set(result['stages'])
+    assert result['extracted_data']['policy_number'] == 'SF-1234567'
+
+
+def test_confident_header_detection_is_reused(zonal_pipeline, page_image):
+    # State Farm has no zonal template: the full path runs on the header's detection
+    zonal_pipeline.setattr('core.tesseract.pytesseract.image_to_string',
+                           lambda image, **kwargs: STATE_FARM + 'statefarm.com\n')
+    result = pipeline.process_document(page_image, '.png')
+    assert result['ocr_metrics']['detection']['company'] == 'state_farm'
+    assert result['ocr_metrics']['detection']['confidence'] == 0.95
+    assert result['ocr_metrics']['strategy'] == 'full'
+    assert 'detect_company' not in result['stages']
+    assert result['extracted_data']['detected_company'] == 'State Farm'
+
+
+@pytest.fixture
+def pdf_reads(zonal_pipeline):
+    """Count PDF parses; pages render blank and poppler reports one page."""
+    reads = []
+    reader = OCREngine.read_text_layer
+    zonal_pipeline.setattr('core.ocr_engine.OCREngine.read_text_layer',
+                           lambda engine, file_path: (reads.append(file_path), reader(engine, file_path))[1])
+    zonal_pipeline.setattr('core.ocr_engine.OCREngine._render_page',
+                           lambda engine, file_path, page_number, dpi=None: np.full((1056, 816), 255, np.uint8))
+    zonal_pipeline.setattr('core.ocr_engine.pdfinfo_from_path', lambda file_path: {'Pages': 1})
+    return reads
+
+
+def test_text_layer_pdf_skips_the_header_read(zonal_pipeline, pdf_reads, tmp_path):
+    path = tmp_path / 'digital.pdf'
+    path.write_bytes(make_pdf(['State Farm Insurance Company Policy Number: SF-1234567 statefarm.com']))
+    zonal_pipeline.setattr('core.tesseract.pytesseract.image_to_string',
+                           lambda image, **kwargs: pytest.fail('a text-layer page was OCR\'d'))
+    result = pipeline.process_document(str(path), '.pdf')
+    assert pdf_reads == [str(path)]
+    assert 'detection' not in result['ocr_metrics']
+    assert result['ocr_metrics']['strategy'] == 'text'
+    assert result['extracted_data']['policy_number'] == 'SF-1234567'
+
+
+def test_scanned_pdf_text_layer_is_read_once(zonal_pipeline, pdf_reads, tmp_path):
+    path = tmp_path / 'scanned.pdf'
+    path.write_bytes(make_pdf([None]))
+    result = pipeline.process_document(str(path), '.pdf')
+    assert result['ocr_metrics']['strategy'] == 'zonal'
+
+    # A low zonal read falls back to full OCR of the same text layer
+    zonal_pipeline.setattr('core.tesseract.pytesseract.image_to_data',
+                           lambda image, **kwargs: {**tesseract_data([(1, 1, 0, 0, 10, '7B')]),
+                                                    'conf': [-1, 20.0]})
+    result = pipeline.process_document(str(path), '.pdf')
+    assert result['ocr_metrics']['strategy'] == 'full'
+    assert [page['source'] for page in result['ocr_metrics']['pages']] == ['ocr']
+    assert pdf_reads == [str(path)] * 2
+
+
+@pytest.fixture
+def ocr_cache(zonal_pipeline, session_factory):
+    """The OCR cache switched on, backed by a scratch database."""
+    zonal_pipeline.setattr('core.ocr_cache.SessionLocal', session_factory)
+    zonal_pipeline.setattr('config.settings.OCR_CACHE_ENABLED', True)
+    return zonal_pipeline
+
+
+def test_cache_is_checked_before_early_detection(ocr_cache, page_image):
+    calls = []
+    ocr_cache.setattr('core.tesseract.pytesseract.image_to_string',
+                      lambda image, **kwargs: (calls.append('page'), NATIONWIDE)[1])
+    first = pipeline.process_document(page_image, '.png')
+    assert first['ocr_metrics']['strategy'] == 'zonal'
+    assert not first['ocr_metrics']['cache_hit']
+
+    # A re-upload reads the zones from the cache: no header read, no zone OCR
+    ocr_cache.setattr('core.tesseract.pytesseract.image_to_data', lambda image, **kwargs: calls.append('zone'))
+    calls.clear()
+    again = pipeline.process_document(page_image, '.png')
+    assert calls == []
+    assert 'detection' not in again['ocr_metrics']
+    assert again['ocr_metrics']['strategy'] == 'zonal'
+    assert again['ocr_metrics']['cache_hit']
+    assert again['extracted_data'] == first['extracted_data']
+
+    # Reads made with a different template are stale and the zones are read again
+    nationwide = registry.get('nationwide')
+    template = nationwide.zones[0]._replace(min_confidence=71.0)
+    ocr_cache.setitem(registry.carriers, 'nationwide', nationwide._replace(zones=[template]))
+    read_zones(ocr_cache)
+    result = pipeline.process_document(page_image, '.png')
+    assert calls == ['page']  # the header read
+    assert result['ocr_metrics']['strategy'] == 'zonal'
+    assert not result['ocr_metrics']['cache_hit']
+    assert result['extracted_data']['policy_number'] == '78 42 HS 027914'
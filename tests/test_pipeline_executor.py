@@ -0,0 +1,62 @@
+import asyncio
+import os
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from core.pipeline import PipelineExecutor, PipelineTimeout
+
+
+def worker_pid(_=None) -> int:
+    return os.getpid()
+
+
+def sleep(seconds: float) -> float:
+    time.sleep(seconds)
+    return seconds
+
+
+def crash() -> None:
+    os._exit(1)
+
+
+@pytest.fixture
+def executor():
+    executor = PipelineExecutor(max_workers=2, timeout=0)
+    yield executor
+    executor.shutdown()
+
+
+def test_work_runs_in_the_pool(executor):
+    async def run():
+        return await asyncio.gather(*(executor._submit('test', worker_pid) for _ in range(4)))
+
+    pids = asyncio.run(run())
+    assert os.getpid() not in pids
+    assert len(set(pids)) <= executor.max_workers
+
+
+def test_timeout_abandons_the_document(executor):
+    async def run():
+        await executor._submit('warm-up', worker_pid)  # don't time the pool starting
+        executor.timeout = 0.2
+        start = time.perf_counter()
+        with pytest.raises(PipelineTimeout):
+            await executor._submit('slow.pdf', sleep, 1.5)
+        waited = time.perf_counter() - start
+        # The other worker still takes new documents
+        return waited, await executor._submit('fast.pdf', sleep, 0)
+
+    waited, result = asyncio.run(run())
+    assert waited < 1
+    assert result == 0
+
+
+def test_crashed_worker_replaces_the_pool(executor):
+    async def run():
+        with pytest.raises(BrokenProcessPool):
+            await executor._submit('crash.pdf', crash)
+        return await executor._submit('next.pdf', worker_pid)
+
+    assert asyncio.run(run()) != os.getpid()
@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+from core.record_writer import RecordWriter
+from models.database import InsuranceRecord, RecordStageTiming
+
+
+@pytest.fixture
+def commits(monkeypatch, session_factory):
+    """Every commit made through session_factory."""
+    made = []
+    real_commit = session_factory.class_.commit
+    monkeypatch.setattr(session_factory.class_, 'commit',
+                        lambda self: (made.append(1), real_commit(self))[1])
+    return made
+
+
+def make_records(count: int) -> list:
+    return [InsuranceRecord.from_extraction(f'doc-{i}.pdf', {}, 0.1, False) for i in range(count)]
+
+
+def count_rows(session_factory) -> tuple:
+    db = session_factory()
+    try:
+        return db.query(InsuranceRecord).count(), db.query(RecordStageTiming).count()
+    finally:
+        db.close()
+
+
+def test_record_writer_batches_and_isolates_failures(session_factory, commits):
+    async def save_all():
+        writer = RecordWriter(max_batch=4, max_delay=0.01, session_factory=session_factory)
+        records = make_records(8)
+        records[5].filename = None  # NOT NULL: fails its batch, then only itself
+        saved = await asyncio.gather(*(writer.save(r, {'validate': 0.01}) for r in records),
+                                     return_exceptions=True)
+        await writer.close()
+        return saved
+
+    saved = asyncio.run(save_all())
+    assert isinstance(saved[5], Exception)
+    assert sorted(saved[:5] + saved[6:]) == list(range(1, 8))
+    assert len(commits) == 1 + 3  # the good batch, then the failed one retried per record
+    assert count_rows(session_factory) == (7, 14)  # each record's stage plus its db_commit
+
+
+def test_record_writer_without_batching_commits_each_record(session_factory, commits):
+    async def save_all():
+        writer = RecordWriter(max_batch=1, session_factory=session_factory)
+        return await asyncio.gather(*(writer.save(r) for r in make_records(3)))
+
+    assert sorted(asyncio.run(save_all())) == [1, 2, 3]
+    assert len(commits) == 3
+    assert count_rows(session_factory) == (3, 3)  # db_commit only
+
+
+def test_record_writer_close_writes_what_is_queued(session_factory, commits):
+    async def save_and_close():
+        # A delay far longer than the test: only close() can write the batch
+        writer = RecordWriter(max_batch=10, max_delay=60, session_factory=session_factory)
+        saves = [asyncio.create_task(writer.save(r, {'validate': 0.01})) for r in make_records(3)]
+        await asyncio.sleep(0)
+        await writer.close()
+        return await asyncio.gather(*saves)
+
+    assert sorted(asyncio.run(save_and_close())) == [1, 2, 3]
+    assert len(commits) == 1
+    assert count_rows(session_factory) == (3, 6)
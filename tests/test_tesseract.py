@@ -0,0 +1,45 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from core import tesseract
+from core.pipeline import PipelineExecutor
+
+
+def worker_cap() -> int:
+    return tesseract._tesseract_slots.get_value()
+
+
+@pytest.mark.parametrize('setting, cap', [(3, 3), (0, os.cpu_count())])
+def test_pool_workers_share_the_cap(monkeypatch, setting, cap):
+    monkeypatch.setattr('config.settings.OCR_MAX_TESSERACT_PROCS', setting)
+    executor = PipelineExecutor(max_workers=2, timeout=0)
+    try:
+        assert asyncio.run(executor._submit('test', worker_cap)) == cap
+    finally:
+        executor.shutdown()
+
+
+def test_cap_holds_across_threads(monkeypatch):
+    running, peak = [0], [0]
+    lock = threading.Lock()
+
+    def image_to_string(image, **kwargs):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+        return ''
+
+    monkeypatch.setattr('core.tesseract.pytesseract.image_to_string', image_to_string)
+    monkeypatch.setattr('core.tesseract._tesseract_slots', threading.BoundedSemaphore(2))
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda _: tesseract.image_to_string(np.zeros((1, 1))), range(16)))
+    assert peak[0] == 2
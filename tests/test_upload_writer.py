@@ -0,0 +1,101 @@
+import asyncio
+import hashlib
+from pathlib import Path
+
+import pytest
+
+from api import routes
+from core.upload_writer import unique_upload_path
+from models.database import ProcessingJob
+
+DATA = b'%PDF-1.4 certificate'
+
+
+def stored_jobs(session_factory) -> dict:
+    db = session_factory()
+    try:
+        return {job.id: job for job in db.query(ProcessingJob)}
+    finally:
+        db.close()
+
+
+def test_unique_upload_paths(tmp_path):
+    paths = {unique_upload_path('.pdf', str(tmp_path)) for _ in range(1000)}
+    assert len(paths) == 1000
+    assert all(path.parent == tmp_path and path.suffix == '.pdf' for path in paths)
+    assert unique_upload_path('.png', str(tmp_path), name='job') == tmp_path / 'job.png'
+
+
+def test_same_filename_is_stored_twice(api, session_factory, tmp_path):
+    for _ in range(2):
+        assert api.post('/api/jobs', files={'file': ('../../etc/cert.pdf', DATA)}).status_code == 202
+
+    paths = [Path(job.file_path) for job in stored_jobs(session_factory).values()]
+    assert len(set(paths)) == 2
+    assert all(path.parent == tmp_path / 'uploads' and 'cert' not in path.name for path in paths)
+    assert all(path.read_bytes() == DATA for path in paths)
+
+
+def test_upload_hash_is_passed_to_the_pipeline(api, session_factory, monkeypatch):
+    runs = []
+
+    async def run(file_path, file_ext, file_hash=None):
+        runs.append(file_hash)
+        raise RuntimeError('stop here')
+
+    monkeypatch.setattr(routes.job_queue.pipeline, 'run', run)
+    job_id = api.post('/api/jobs', files={'file': ('cert.pdf', DATA)}).json()['job_id']
+    digest = hashlib.sha256(DATA).hexdigest()
+    assert stored_jobs(session_factory)[job_id].file_hash == digest
+
+    asyncio.run(routes.job_queue.run_job(job_id))
+    assert runs == [digest]
+
+
+@pytest.mark.parametrize('url', ['/api/upload', '/api/jobs'])
+def test_oversized_upload_is_rejected(api, session_factory, tmp_path, monkeypatch, url):
+    monkeypatch.setattr('config.settings.MAX_FILE_SIZE', len(DATA) - 1)
+    response = api.post(url, files={'file': ('cert.pdf', DATA)})
+    assert response.status_code == 413
+    assert response.json()['detail'].startswith('File too large')
+    # Nothing half-written is left behind and no job was queued
+    assert list((tmp_path / 'uploads').iterdir()) == []
+    assert stored_jobs(session_factory) == {}
+
+
+@pytest.fixture
+def pipeline_calls(monkeypatch):
+    """Record which pipeline entry point /upload uses instead of running OCR."""
+    calls = []
+    result = {
+        'extracted_data': {'policy_number': 'SF-1234567', 'confidence_score': 100.0},
+        'validation_results': {'is_valid': True, 'errors': [], 'warnings': []},
+        'needs_review': False,
+        'stages': {'tesseract': 0.5},
+    }
+
+    async def run(file_path, file_ext, file_hash=None):
+        calls.append(('disk', Path(file_path).read_bytes(), file_hash))
+        return result
+
+    async def run_bytes(data, file_ext, file_hash=None):
+        calls.append(('memory', data, file_hash))
+        return result
+
+    monkeypatch.setattr(routes.pipeline, 'run', run)
+    monkeypatch.setattr(routes.pipeline, 'run_bytes', run_bytes)
+    return calls
+
+
+@pytest.mark.parametrize('filename, limit, path', [
+    ('scan.png', 1024, 'memory'),
+    ('scan.png', len(DATA) - 1, 'disk'),
+    ('scan.pdf', 1024, 'disk'),  # poppler needs a file
+])
+def test_small_images_are_processed_in_memory(api, pipeline_calls, tmp_path, monkeypatch, filename, limit, path):
+    monkeypatch.setattr('config.settings.IN_MEMORY_OCR_MAX_BYTES', limit)
+    response = api.post('/api/upload', files={'file': (filename, DATA)})
+    assert response.status_code == 200
+    assert response.json()['data']['policy_number'] == 'SF-1234567'
+    assert pipeline_calls == [(path, DATA, hashlib.sha256(DATA).hexdigest())]
+    assert list((tmp_path / 'uploads').iterdir()) == []
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from core.carrier_registry import CarrierRegistryError, parse_carriers
+from core.template_manager import TemplateManager
+from core.zonal_ocr import crop_zone, zone_text
+from tests.samples import NATIONWIDE, tesseract_data
+
+
+def test_zone_templates_are_validated():
+    def carriers(box):
+        return {'carriers': {
+            'generic': {'fields': {}},
+            'acme': {'fields': {}, 'zones': {'v1': {'fields': {'policy_number': box}}}},
+        }}
+
+    template = parse_carriers(carriers([0.5, 0.1, 0.2, 0.02]))['acme'].zones[0]
+    assert (template.form, template.page, template.fields['policy_number']) == \
+        ('v1', 1, (0.5, 0.1, 0.2, 0.02))
+    for bad in ([0.9, 0.1, 0.2, 0.02], [0.5, 0.1, 0.2], [0.5, 0.1, 0, 0.02], "0.5 0.1 0.2 0.02"):
+        with pytest.raises(CarrierRegistryError):
+            parse_carriers(carriers(bad))
+
+    # Every field the carrier extracts needs a zone
+    incomplete = carriers([0.5, 0.1, 0.2, 0.02])
+    incomplete['carriers']['acme']['fields'] = {'premium_amount': [r'Premium\s+(\S+)']}
+    with pytest.raises(CarrierRegistryError, match='no zone for premium_amount'):
+        parse_carriers(incomplete)
+
+    nationwide = TemplateManager.get_zone_template('nationwide', NATIONWIDE)
+    assert nationwide.form == 'tenant_customer_notice'
+    assert TemplateManager.get_zone_template('nationwide', "NATIONWIDE AUTO ID CARD") is None
+    assert TemplateManager.get_zone_template('state_farm') is None
+
+
+def test_crop_zone_and_zone_text():
+    page = np.arange(100 * 200).reshape(100, 200)
+    assert crop_zone(page, (0.5, 0.1, 0.25, 0.2), padding=0).shape == (20, 50)
+    assert crop_zone(page, (0.9, 0.9, 0.1, 0.1), padding=0.05).shape == (15, 30)  # clipped
+
+    data = tesseract_data([(1, 1, 0, 0, 10, '(HO-778812'), (1, 2, 0, 40, 10, 'AUSTIN'),
+                           (1, 2, 20, 40, 10, 'TX)')])
+    assert zone_text(data) == ('HO-778812 AUSTIN TX', 91.0)
+    assert zone_text(tesseract_data([])) == ('', 0.0)
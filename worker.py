@@ -0,0 +1,41 @@
+import asyncio
+import logging
+import signal
+
+from config import settings
+from core.pipeline import PipelineExecutor
+from core.job_queue import JobQueue
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.FileHandler('worker.log'),
+        logging.StreamHandler()
+    ]
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    """Process queued jobs outside the web server (set JOB_QUEUE_IN_PROCESS=False)."""
+    pipeline = PipelineExecutor()
+    queue = JobQueue(pipeline)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    logger.info(f"Starting {settings.APP_NAME} job worker")
+    await queue.start()
+    await stop.wait()
+
+    logger.info("Job worker shutting down")
+    await queue.stop()
+    pipeline.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())